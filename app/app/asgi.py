@@ -0,0 +1,25 @@
+"""
+ASGI config for app project.
+
+Django 2.2 has no async views, so requests are received and answered on
+the event loop while the views run on bounded thread pools, see
+core.asgi.OffloadingASGIHandler.
+
+It exposes the ASGI callable as a module-level variable named
+``application``.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import OffloadingASGIHandler
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+application = OffloadingASGIHandler(
+    get_wsgi_application(),
+    workers=int(os.environ.get('ASGI_THREADS', 16)),
+    upload_workers=int(os.environ.get('ASGI_UPLOAD_THREADS', 4)),
+    max_body_size=int(os.environ.get('ASGI_MAX_BODY_MB', 20)) << 20
+)
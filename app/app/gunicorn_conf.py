@@ -0,0 +1,53 @@
+"""
+Gunicorn configuration for serving the app in production.
+
+WSGI with threaded workers (default):
+    gunicorn -c app/gunicorn_conf.py app.wsgi
+ASGI with uvicorn workers:
+    WORKER_CLASS=uvicorn.workers.UvicornWorker \\
+        gunicorn -c app/gunicorn_conf.py app.asgi
+
+Send HUP to the master for a graceful restart of the workers. The app is
+preloaded in the master, so deploying new code needs USR2 followed by
+TERM of the old master instead.
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('BIND', '0.0.0.0:8000')
+worker_class = os.environ.get('WORKER_CLASS', 'gthread')
+
+cpus = multiprocessing.cpu_count()
+if worker_class == 'sync':
+    # Workers block on every request, so keep more than the cores
+    default_workers, default_threads = cpus * 2 + 1, 1
+elif worker_class == 'gthread':
+    default_workers, default_threads = cpus + 1, 4
+else:
+    # Event loop workers handle concurrency inside each process
+    default_workers, default_threads = cpus, 1
+
+workers = int(os.environ.get('WEB_CONCURRENCY', default_workers))
+threads = int(os.environ.get('THREADS', default_threads))
+
+# Import Django and the apps once in the master and share the memory
+preload_app = True
+
+timeout = int(os.environ.get('WORKER_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Recycle workers regularly, staggered so they do not restart together
+max_requests = int(os.environ.get('MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+# Heartbeat files on tmpfs, the container filesystem may block
+worker_tmp_dir = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+accesslog = '-'
+
+
+def post_fork(server, worker):
+    """Drops connections the master opened, they cannot be shared"""
+    from django.db import connections
+    connections.close_all()
@@ -30,8 +30,10 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# The admin modules are registered when app.urls is loaded, so processes
+# that never serve the admin do not import them
 INSTALLED_APPS = [
-    'django.contrib.admin',
+    'django.contrib.admin.apps.SimpleAdminConfig',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -45,6 +47,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.HealthCheckMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.RequestProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -78,16 +83,78 @@ WSGI_APPLICATION = 'app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# Connections are kept open for DB_CONN_MAX_AGE seconds and checked before
+# reuse, and connecting gives up after DB_CONNECT_TIMEOUT seconds rather
+# than waiting on an unreachable host. Setting DB_POOL_SIZE instead shares
+# a bounded pool of connections between the threads of each process, see
+# core.db.backends.postgresql
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'core.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS')
+        'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'connect_timeout': int(os.environ.get('DB_CONNECT_TIMEOUT', 5)),
+        },
     }
 }
 
+if os.environ.get('DB_POOL_SIZE'):
+    DATABASES['default'].update({
+        # Connections go back to the pool at the end of each request
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': int(os.environ['DB_POOL_SIZE']),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+        },
+    })
+
+# Setting DB_REPLICA_HOST adds a read replica used by views with
+# core.db.routers.ReadReplicaMixin
+
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        HOST=os.environ['DB_REPLICA_HOST'],
+        TEST={'MIRROR': 'default'},
+    )
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['core.db.routers.PrimaryReplicaRouter']
+
+# Seconds a user keeps reading from the primary after writing
+REPLICA_STICKY_SECONDS = int(os.environ.get('REPLICA_STICKY_SECONDS', 5))
+
+# The default cache lives in each worker process. Read-your-writes pins
+# must be seen by every worker and host, so with replicas they are kept in
+# REPLICA_PIN_CACHE, a shared memcached by default. Every safe request
+# looks its user's pin up, so the pin cache must be cheaper to reach than
+# the primary; a DatabaseCache on the primary works but costs a primary
+# round trip per replica read. Startup fails when replicas are configured
+# with a per-process pin cache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'replica-pin': {
+        'BACKEND': os.environ.get(
+            'REPLICA_PIN_CACHE_BACKEND',
+            'django.core.cache.backends.memcached.MemcachedCache'
+        ),
+        'LOCATION': os.environ.get(
+            'REPLICA_PIN_CACHE_LOCATION', 'memcached:11211'
+        ),
+    },
+}
+
+REPLICA_PIN_CACHE = 'replica-pin'
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -131,4 +198,168 @@ MEDIA_URL = '/media/'
 STATIC_ROOT = '/vol/web/static'
 MEDIA_ROOT = '/vol/web/media'
 
-AUTH_USER_MODEL = 'core.User'
\ No newline at end of file
+AUTH_USER_MODEL = 'core.User'
+
+# Delta sync
+# Clients that last synced before removed tombstones get a full snapshot
+
+CHANGELOG_TOMBSTONE_DAYS = 30
+
+# Checkpoints only cover change log entries older than this, so a change
+# committed after one with a higher id is not skipped. Must exceed the
+# longest transaction writing recipes, tags or ingredients; newer entries
+# are sent again by the next sync.
+CHANGELOG_CHECKPOINT_LAG_SECONDS = 10
+
+# Recipe statistics are cached per user until the next change
+RECIPE_STATS_CACHE_SECONDS = 3600
+
+# Uploads whose perceptual hash is within MAX_DISTANCE bits of another
+# image of the same user reuse that image's file instead of a new copy
+RECIPE_IMAGE_DEDUPE = {
+    'ENABLED': os.environ.get('RECIPE_IMAGE_DEDUPE') == '1',
+    'MAX_DISTANCE': int(os.environ.get('RECIPE_IMAGE_DEDUPE_DISTANCE', 2)),
+}
+
+# Recipe image thumbnails are rendered on first request and kept in a
+# directory under MEDIA_ROOT, least recently used first out. Add 'webp'
+# to FORMATS when Pillow is built with libwebp.
+RECIPE_THUMBNAILS = {
+    'SIZES': (64, 128, 256, 512),
+    'FORMATS': ('jpeg', 'png'),
+    'QUALITY': 80,
+    'DIRECTORY': 'thumbnails',
+    'MAX_BYTES': int(os.environ.get('RECIPE_THUMBNAIL_CACHE_MB', 256)) << 20,
+    'MAX_AGE': 86400,
+}
+
+# Compress responses of at least MIN_SIZE bytes with the client's best
+# accepted encoding, in ENCODINGS order on ties. br and zstd are skipped
+# unless the brotli and zstandard packages are installed. Bodies compress
+# the same every time, so CACHE_MAX_BYTES of compressed bodies can be kept
+# for repeated responses; see bench/compression.py for level trade-offs.
+RESPONSE_COMPRESSION = {
+    'ENABLED': os.environ.get('RESPONSE_COMPRESSION', '1') == '1',
+    'ENCODINGS': ('br', 'zstd', 'gzip'),
+    'LEVELS': {'br': 4, 'zstd': 3, 'gzip': 6},
+    'MIN_SIZE': 1024,
+    'CONTENT_TYPES': (
+        'application/json', 'application/msgpack', 'application/javascript',
+        'application/xml', 'text/',
+    ),
+    'CACHE_MAX_BYTES': int(
+        os.environ.get('RESPONSE_COMPRESSION_CACHE_MB', 0)
+    ) << 20,
+}
+
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    'DEFAULT_RENDERER_CLASSES': [
+        'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+        'core.renderers.MessagePackRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+        'core.parsers.MessagePackParser',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.GCRAThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'read': os.environ.get('THROTTLE_READ_RATE', '600/min'),
+        'write': os.environ.get('THROTTLE_WRITE_RATE', '120/min'),
+        'upload': os.environ.get('THROTTLE_UPLOAD_RATE', '20/min'),
+    },
+    # Throttles key clients on REMOTE_ADDR. Behind NUM_PROXIES trusted
+    # proxies they use the address those proxies appended to
+    # X-Forwarded-For, never one the client can choose
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+}
+
+# Use core.throttling.CacheStore with a shared cache such as memcached to
+# enforce the rates across processes and hosts
+RATE_LIMIT_STORE = {
+    'BACKEND': 'core.throttling.LocalMemoryStore',
+}
+
+
+# Authentication
+# Passwords are hashed on a bounded thread pool, see user.backends
+
+AUTHENTICATION_BACKENDS = [
+    'user.backends.EmailBackend',
+]
+
+# Stored hashes are upgraded on login when the hasher or its cost changes,
+# run `manage.py benchmark_hashers` to pick iterations for this host
+
+PASSWORD_HASHERS = [
+    'core.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+]
+
+PASSWORD_HASH_ITERATIONS = int(
+    os.environ.get('PASSWORD_HASH_ITERATIONS', 150000)
+)
+
+LOGIN_HASH_POOL = {
+    'WORKERS': os.cpu_count() or 1,
+    'QUEUE_SIZE': 16,
+    'TIMEOUT': 2,
+}
+
+# Failed logins allowed per email and client address before backing off,
+# delays double from BASE_DELAY up to MAX_DELAY seconds. Counters live in
+# the CACHE alias; the default LocMemCache is per process, so N workers
+# allow N times the attempts unless it names a shared cache
+LOGIN_THROTTLE = {
+    'CACHE': os.environ.get('LOGIN_THROTTLE_CACHE', 'default'),
+    'EMAIL_FAILURES': 5,
+    'IP_FAILURES': 20,
+    'BASE_DELAY': 1,
+    'MAX_DELAY': 900,
+    'RESET_AFTER': 3600,
+}
+
+
+# Observability
+# Per-route timing histograms, and cProfile dumps of a sample of requests
+# and of requests sending the header X-Profile: <TOKEN>
+
+REQUEST_PROFILING = {
+    'ENABLED': os.environ.get('REQUEST_PROFILING') == '1',
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', 0)),
+    'TOKEN': os.environ.get('PROFILING_TOKEN'),
+    'DUMP_DIR': os.environ.get('PROFILING_DUMP_DIR', '/tmp/profiles'),
+}
+
+# Serve core.metrics at /metrics for Prometheus
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED') == '1'
+
+# Log queries slower than THRESHOLD_MS with their view and query plan,
+# summarize the log with `manage.py slow_queries`
+SLOW_QUERY_LOG = {
+    'ENABLED': os.environ.get('SLOW_QUERY_LOG') == '1',
+    'THRESHOLD_MS': float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 100)),
+    'PATH': os.environ.get('SLOW_QUERY_LOG_PATH', '/tmp/slow_queries.jsonl'),
+    'EXPLAIN': True,
+}
+
+# /readyz reports the last check of these databases and the media storage,
+# refreshed every INTERVAL seconds in the background. Queries are cancelled
+# after TIMEOUT seconds, and a result older than three intervals plus
+# TIMEOUT means the checks hang and reports not ready
+HEALTH_CHECK = {
+    'INTERVAL': float(os.environ.get('HEALTH_CHECK_INTERVAL', 5)),
+    'TIMEOUT': float(os.environ.get('HEALTH_CHECK_TIMEOUT', 2)),
+    'DATABASES': ['default'],
+    'STORAGE': True,
+}
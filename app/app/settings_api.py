@@ -0,0 +1,58 @@
+"""
+Settings of API-only processes.
+
+The API authenticates with tokens only, so sessions, messages, CSRF
+checks and the admin are left out of the app and middleware stack.
+Serve the admin from a separate process with app.settings.
+"""
+from app.settings import *  # noqa: F401,F403
+from app.settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+API_EXCLUDED_APPS = (
+    'django.contrib.admin.apps.SimpleAdminConfig',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+)
+
+API_EXCLUDED_MIDDLEWARE = (
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+)
+
+INSTALLED_APPS = [
+    app for app in INSTALLED_APPS if app not in API_EXCLUDED_APPS
+]
+
+MIDDLEWARE = [
+    middleware for middleware in MIDDLEWARE
+    if middleware not in API_EXCLUDED_MIDDLEWARE
+]
+
+ROOT_URLCONF = 'app.urls_api'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+            ],
+        },
+    },
+]
+
+REST_FRAMEWORK = dict(
+    REST_FRAMEWORK,
+    DEFAULT_AUTHENTICATION_CLASSES=[
+        'core.authentication.TokenAuthentication',
+    ],
+    DEFAULT_RENDERER_CLASSES=[
+        'rest_framework.renderers.JSONRenderer',
+        'core.renderers.MessagePackRenderer',
+    ],
+)
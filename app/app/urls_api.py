@@ -0,0 +1,14 @@
+"""URL configuration of API-only processes, see app.settings_api"""
+from django.urls import path, include
+from django.conf.urls.static import static
+from django.conf import settings
+
+from core import views as core_views
+
+urlpatterns = [
+    path('healthz', core_views.healthz, name='healthz'),
+    path('readyz', core_views.readyz, name='readyz'),
+    path('metrics', core_views.metrics, name='metrics'),
+    path('api/user/', include('user.urls')),
+    path('api/recipe', include('recipe.urls')),
+] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
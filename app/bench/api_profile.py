@@ -0,0 +1,128 @@
+"""
+Compares startup time and per-request overhead of the full settings and
+the API-only settings.
+
+Requests are sent directly to the WSGI application without credentials,
+so they are rejected by authentication before touching the database and
+measure the middleware and framework stack only.
+
+Run from the app directory:
+    python -m bench.api_profile --runs 5 --requests 5000
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from bench.server import APP_DIR
+
+PROFILES = (
+    ('full', 'app.settings'),
+    ('api-only', 'app.settings_api'),
+)
+
+
+def measure(requests):
+    """Returns the timings of this process, run in a fresh interpreter"""
+    start = time.perf_counter()
+    import django
+    from django.core.wsgi import get_wsgi_application
+    from django.urls import get_resolver, reverse
+
+    django.setup(set_prefix=False)
+    application = get_wsgi_application()
+    get_resolver().url_patterns
+    startup = time.perf_counter() - start
+    modules = len(sys.modules)
+
+    # Every request is rejected, which is not worth a warning here
+    logging.getLogger('django.request').setLevel(logging.ERROR)
+    path = reverse('recipe:recipe-list')
+
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    def request():
+        environ = {
+            'REQUEST_METHOD': 'GET',
+            'PATH_INFO': path,
+            'QUERY_STRING': '',
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '80',
+            'SERVER_PROTOCOL': 'HTTP/1.1',
+            'HTTP_HOST': 'localhost',
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(),
+            'wsgi.errors': sys.stderr,
+        }
+        response = application(environ, start_response)
+        b''.join(response)
+        response.close()
+
+    for _ in range(min(requests, 100)):
+        request()
+    start = time.perf_counter()
+    for _ in range(requests):
+        request()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'startup_ms': startup * 1000,
+        'modules': modules,
+        'request_us': elapsed / requests * 1e6,
+    }
+
+
+def run_profile(settings_module, requests):
+    """Measures a settings module in a child interpreter"""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings_module,
+               THROTTLE_READ_RATE='1000000/s')
+    output = subprocess.check_output(
+        [sys.executable, '-m', 'bench.api_profile', '--child',
+         '--requests', str(requests)],
+        cwd=APP_DIR,
+        env=env
+    )
+
+    return json.loads(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--output', help='Write results as JSON to file')
+    parser.add_argument('--child', action='store_true',
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.requests)))
+        return
+
+    results = {}
+    print(f'{"profile":<10} {"startup ms":>11} {"modules":>8} '
+          f'{"request us":>11}')
+    for name, settings_module in PROFILES:
+        runs = [run_profile(settings_module, args.requests)
+                for _ in range(args.runs)]
+        results[name] = {
+            key: statistics.median(run[key] for run in runs)
+            for key in runs[0]
+        }
+        print(f'{name:<10} {results[name]["startup_ms"]:>11.1f} '
+              f'{results[name]["modules"]:>8} '
+              f'{results[name]["request_us"]:>11.1f}')
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Measures the CPU time and bytes saved of every available response
+encoding and level on real API payloads.
+
+Seeds the benchmark_api dataset of one user when missing, renders
+responses in process and compresses each body the way
+core.middleware.CompressionMiddleware does.
+
+Run from the app directory against a migrated database:
+    python -m bench.compression --recipes 200 --repeat 20
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+LEVELS = {
+    'gzip': (1, 6, 9),
+    'br': (1, 4, 6, 11),
+    'zstd': (1, 3, 9, 19),
+}
+
+
+def payloads(recipes, media_type='application/json'):
+    """Returns the uncompressed bodies of typical requests by name"""
+    from django.test import Client
+    from django.urls import reverse
+
+    from core.management.commands.benchmark_api import Command
+
+    email, token, recipe_ids, tag_ids = Command().seed(0, {
+        'recipes': recipes,
+        'tags': 20,
+        'ingredients': 60,
+    })
+    client = Client(HTTP_AUTHORIZATION=f'Token {token}',
+                    HTTP_ACCEPT=media_type,
+                    HTTP_ACCEPT_ENCODING='identity')
+    paths = {
+        'recipe-list': reverse('recipe:recipe-list'),
+        'recipe-detail': reverse('recipe:recipe-detail',
+                                 args=[recipe_ids[0]]),
+        'tag-list': reverse('recipe:tag-list'),
+        'ingredient-list': reverse('recipe:ingredient-list'),
+        'changes': reverse('recipe:changes'),
+        'recipe-stats': reverse('recipe:recipe-stats'),
+    }
+    bodies = {}
+    for name, path in paths.items():
+        response = client.get(path, HTTP_HOST='localhost')
+        assert response.status_code == 200, (name, response.status_code)
+        bodies[name] = response.content
+
+    return bodies
+
+
+def measure(codec, body, repeat):
+    """Returns the median compression time and the compressed size"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        compressed = codec.compress(body)
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times), len(compressed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipes', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', help='Write results as JSON to file')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    import django
+    django.setup()
+    from core.compression import CODECS
+
+    results = []
+    print(f'{"payload":<16} {"bytes":>8} {"encoding":>8} {"level":>5} '
+          f'{"out":>8} {"ratio":>6} {"us":>8} {"MB/s":>7}')
+    for name, body in payloads(args.recipes).items():
+        for codec_class, module in CODECS:
+            if module is None:
+                continue
+            for level in LEVELS[codec_class.name]:
+                seconds, size = measure(codec_class(level), body,
+                                        args.repeat)
+                results.append({
+                    'payload': name,
+                    'bytes': len(body),
+                    'encoding': codec_class.name,
+                    'level': level,
+                    'compressed_bytes': size,
+                    'compress_us': seconds * 1e6,
+                })
+                print(f'{name:<16} {len(body):>8} {codec_class.name:>8} '
+                      f'{level:>5} {size:>8} {len(body) / size:>6.1f} '
+                      f'{seconds * 1e6:>8.0f} '
+                      f'{len(body) / seconds / 1e6:>7.1f}')
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
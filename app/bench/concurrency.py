@@ -0,0 +1,137 @@
+"""
+Measures how one worker process copes with slow clients: while clients
+trickle image uploads to upload-image, recipe list and detail requests
+are timed for a sync gunicorn worker and an ASGI worker.
+
+Run from the app directory with the database settings of the app:
+    python -m bench.concurrency --slow-clients 0 4 16 64
+"""
+import argparse
+import io
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+
+import django
+
+
+def jpeg_multipart(field='image'):
+    """Returns content type and multipart body with a small JPEG image"""
+    from PIL import Image
+
+    image = io.BytesIO()
+    Image.new('RGB', (256, 256), (200, 120, 40)).save(image, format='JPEG')
+    boundary = uuid.uuid4().hex
+    body = (
+        f'--{boundary}\r\n'
+        f'Content-Disposition: form-data; name="{field}"; '
+        f'filename="photo.jpg"\r\n'
+        'Content-Type: image/jpeg\r\n\r\n'
+    ).encode() + image.getvalue() + f'\r\n--{boundary}--\r\n'.encode()
+
+    return f'multipart/form-data; boundary={boundary}', body
+
+
+def slow_uploader(port, path, token, seconds, stop):
+    """Uploads an image repeatedly, spreading each body over seconds"""
+    content_type, body = jpeg_multipart()
+    chunk = max(len(body) // 20, 1)
+    while not stop.is_set():
+        try:
+            with socket.create_connection(('127.0.0.1', port), 60) as sock:
+                sock.sendall((
+                    f'POST {path} HTTP/1.1\r\nHost: localhost\r\n'
+                    f'Authorization: Token {token}\r\n'
+                    f'Content-Type: {content_type}\r\n'
+                    f'Content-Length: {len(body)}\r\n'
+                    'Connection: close\r\n\r\n'
+                ).encode())
+                for start in range(0, len(body), chunk):
+                    sock.sendall(body[start:start + chunk])
+                    time.sleep(seconds / 20)
+                sock.recv(65536)
+        except OSError:
+            time.sleep(0.1)
+
+
+def measure(server, token, recipe_id, slow_clients, args):
+    """Times list and detail requests while slow clients upload"""
+    from django.urls import reverse
+    from bench import loadgen
+
+    stop = threading.Event()
+    upload_path = reverse('recipe:recipe-upload-image', args=[recipe_id])
+    uploaders = [
+        threading.Thread(
+            target=slow_uploader,
+            args=(server.port, upload_path, token, args.upload_seconds, stop)
+        )
+        for _ in range(slow_clients)
+    ]
+    for uploader in uploaders:
+        uploader.start()
+
+    headers = {'Authorization': f'Token {token}'}
+    try:
+        return loadgen.run(server.url, [
+            loadgen.Target('recipe-list', reverse('recipe:recipe-list'),
+                           headers=headers),
+            loadgen.Target('recipe-detail',
+                           reverse('recipe:recipe-detail', args=[recipe_id]),
+                           headers=headers),
+        ], concurrency=args.concurrency, duration=args.duration)
+    finally:
+        stop.set()
+        for uploader in uploaders:
+            uploader.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--slow-clients', type=int, nargs='+',
+                        default=[0, 4, 16, 64])
+    parser.add_argument('--upload-seconds', type=float, default=2)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--output', help='Write results as JSON to file')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+    from django.urls import reverse
+    from bench.server import ApiClient, gunicorn
+
+    servers = (
+        ('sync', lambda: gunicorn('app.wsgi', 'sync', WEB_CONCURRENCY='1')),
+        ('asgi', lambda: gunicorn('app.asgi', 'uvicorn.workers.UvicornWorker',
+                                  WEB_CONCURRENCY='1')),
+    )
+    results = {}
+    for name, make_server in servers:
+        for slow_clients in args.slow_clients:
+            with make_server() as server:
+                client = ApiClient(server.url)
+                token = client.login('concurrency@example.com',
+                                     'concurrency-pass')
+                recipe_id = client.request(
+                    'POST', reverse('recipe:recipe-list'),
+                    {'title': 'Slow', 'time_minutes': 5, 'price': '5.00',
+                     'tags': [], 'ingredients': []}
+                )['id']
+                total = measure(server, token, recipe_id, slow_clients,
+                                args)['total']
+            results.setdefault(name, {})[slow_clients] = total
+            print(f'{name:<5} slow clients {slow_clients:>4}: '
+                  f'{total["rps"]:>8} req/s  p50 {total["p50_ms"]} ms  '
+                  f'p99 {total["p99_ms"]} ms')
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Compares JSON and MessagePack responses of the API by size, server-side
+render time and client-side parse time.
+
+Renders the payloads of bench.compression in both formats, then times
+the renderers the API uses and the parsers a Python client would use.
+
+Run from the app directory against a migrated database:
+    python -m bench.formats --recipes 200 --repeat 50
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import time
+
+
+def timed(function, argument, repeat):
+    """Returns the median seconds of calling function with argument"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        times.append(time.perf_counter() - start)
+
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--recipes', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--output', help='Write results as JSON to file')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    import django
+    django.setup()
+    import msgpack
+    from rest_framework.renderers import JSONRenderer
+
+    from bench.compression import payloads
+    from core.parsers import decode_ext
+    from core.renderers import MessagePackRenderer
+
+    formats = {
+        'json': (JSONRenderer(), json.loads),
+        'msgpack': (
+            MessagePackRenderer(),
+            lambda body: msgpack.unpackb(body, raw=False,
+                                         ext_hook=decode_ext)
+        ),
+    }
+    bodies = {
+        'json': payloads(args.recipes, 'application/json'),
+        'msgpack': payloads(args.recipes, 'application/msgpack'),
+    }
+
+    results = []
+    print(f'{"payload":<16} {"format":<8} {"bytes":>8} {"gzip":>7} '
+          f'{"render us":>10} {"parse us":>9}')
+    for name in bodies['json']:
+        for format_name, (renderer, parse) in formats.items():
+            body = bodies[format_name][name]
+            data = parse(body)
+            result = {
+                'payload': name,
+                'format': format_name,
+                'bytes': len(body),
+                'gzip_bytes': len(gzip.compress(body)),
+                'render_us': timed(renderer.render, data, args.repeat) * 1e6,
+                'parse_us': timed(parse, body, args.repeat) * 1e6,
+            }
+            results.append(result)
+            print(f'{name:<16} {format_name:<8} {result["bytes"]:>8} '
+                  f'{result["gzip_bytes"]:>7} {result["render_us"]:>10.0f} '
+                  f'{result["parse_us"]:>9.0f}')
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""Concurrent HTTP load generator used by the benchmark scripts"""
+import http.client
+import itertools
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def percentile(values, fraction):
+    """Returns the value below which the given fraction of values fall"""
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(int(round(fraction * (len(values) - 1))), len(values) - 1)
+
+    return values[index]
+
+
+class Target:
+    """Request sent by the load generator, named for the report"""
+
+    def __init__(self, name, path, method='GET', headers=None, body=None,
+                 weight=1):
+        self.name = name
+        self.path = path
+        self.method = method
+        self.headers = headers or {}
+        self.body = body
+        self.weight = weight
+
+    def prepare(self):
+        """Returns method, path, body and headers to send"""
+        body = self.body
+        headers = dict(self.headers)
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+
+        return self.method, self.path, body, headers
+
+
+class Stats:
+    """Latencies and errors of the requests to one target"""
+
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+        self.statuses = {}
+
+    def add(self, latency, status):
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if status is None or status >= 400:
+            self.errors += 1
+
+    def merge(self, other):
+        self.latencies.extend(other.latencies)
+        self.errors += other.errors
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+
+    def summary(self, elapsed):
+        """Returns throughput and latency percentiles in milliseconds"""
+        def ms(value):
+            return round(value * 1000, 3) if value is not None else None
+
+        count = len(self.latencies)
+        return {
+            'requests': count,
+            'errors': self.errors,
+            'statuses': {str(k): v for k, v in self.statuses.items()},
+            'rps': round(count / elapsed, 1) if elapsed else 0,
+            'p50_ms': ms(percentile(self.latencies, 0.5)),
+            'p90_ms': ms(percentile(self.latencies, 0.9)),
+            'p99_ms': ms(percentile(self.latencies, 0.99)),
+            'max_ms': ms(max(self.latencies) if self.latencies else None),
+        }
+
+
+def _worker(base_url, targets, deadline, remaining, results, lock):
+    """Sends requests over one keep-alive connection until done"""
+    url = urlsplit(base_url)
+    connection = http.client.HTTPConnection(url.hostname, url.port,
+                                            timeout=30)
+    stats = {}
+    weighted = [t for t in targets for _ in range(t.weight)]
+    for target in itertools.cycle(weighted):
+        if time.perf_counter() >= deadline:
+            break
+        with lock:
+            if remaining[0] is not None:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+
+        method, path, body, headers = target.prepare()
+        start = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            connection.close()
+            status = None
+        latency = time.perf_counter() - start
+        stats.setdefault(target.name, Stats()).add(latency, status)
+    connection.close()
+
+    with lock:
+        for name, target_stats in stats.items():
+            results.setdefault(name, Stats()).merge(target_stats)
+
+
+def run(base_url, targets, concurrency=10, duration=10, requests=None):
+    """
+    Sends the targets in turn from concurrency threads for duration
+    seconds or until requests were sent, and returns a summary per target
+    and in total
+    """
+    results = {}
+    lock = threading.Lock()
+    remaining = [requests]
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(base_url, targets, start + duration, remaining, results,
+                  lock)
+        )
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = Stats()
+    for stats in results.values():
+        total.merge(stats)
+    summary = {name: stats.summary(elapsed)
+               for name, stats in sorted(results.items())}
+    summary['total'] = total.summary(elapsed)
+
+    return summary
+
+
+def format_table(summary):
+    """Returns the summary as a text table"""
+    row_format = '{:<24} {:>9} {:>7} {:>9} {:>9} {:>9} {:>9} {:>8}'
+    lines = [row_format.format(
+        'endpoint', 'requests', 'errors', 'req/s', 'p50 ms', 'p90 ms',
+        'p99 ms', 'queries'
+    )]
+    for name, row in summary.items():
+        lines.append(row_format.format(
+            name, row['requests'], row['errors'], row['rps'],
+            row['p50_ms'] or '-', row['p90_ms'] or '-', row['p99_ms'] or '-',
+            row.get('queries', '-')
+        ))
+
+    return '\n'.join(lines)
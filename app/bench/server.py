@@ -0,0 +1,112 @@
+"""Helpers to start the app and call its API from benchmark scripts"""
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Benchmarks measure the app, not the rate limits
+UNTHROTTLED = {
+    'THROTTLE_READ_RATE': '1000000/s',
+    'THROTTLE_WRITE_RATE': '1000000/s',
+    'THROTTLE_UPLOAD_RATE': '1000000/s',
+}
+
+
+def free_port():
+    """Returns a free TCP port on localhost"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    """Waits until something accepts connections on the port"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+
+    raise RuntimeError(f'Server did not start on port {port}')
+
+
+class Server:
+    """Runs a server command from the app directory while in use"""
+
+    def __init__(self, args, env=None, port=None):
+        self.port = port or free_port()
+        self.args = [arg.format(port=self.port) for arg in args]
+        self.env = dict(os.environ, **UNTHROTTLED)
+        for key, value in (env or {}).items():
+            self.env[key] = value.format(port=self.port)
+        self.url = f'http://127.0.0.1:{self.port}'
+        self.process = None
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            self.args,
+            cwd=APP_DIR,
+            env=self.env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        wait_for_port(self.port)
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait(30)
+
+
+def gunicorn(module, worker_class, **env):
+    """Returns a Server running the module with gunicorn workers"""
+    return Server(
+        [sys.executable, '-m', 'gunicorn', '-c', 'app/gunicorn_conf.py',
+         module],
+        env=dict(env, WORKER_CLASS=worker_class, BIND='127.0.0.1:{port}')
+    )
+
+
+class ApiClient:
+    """Minimal JSON client for the API"""
+
+    def __init__(self, url):
+        self.url = url
+        self.headers = {}
+
+    def request(self, method, path, data=None):
+        """Sends a request and returns the decoded JSON response"""
+        body = json.dumps(data).encode() if data is not None else None
+        headers = dict(self.headers, **{'Content-Type': 'application/json'})
+        request = urllib.request.Request(
+            self.url + path, data=body, headers=headers, method=method
+        )
+        with urllib.request.urlopen(request) as response:
+            content = response.read()
+
+        return json.loads(content) if content else None
+
+    def login(self, email, password):
+        """Creates the user if needed and authenticates with its token"""
+        from django.urls import reverse
+
+        try:
+            self.request('POST', reverse('user:create'), {
+                'email': email, 'password': password, 'name': 'Benchmark'
+            })
+        except urllib.error.HTTPError:
+            pass
+        token = self.request('POST', reverse('user:token'), {
+            'email': email, 'password': password
+        })['token']
+        self.headers['Authorization'] = f'Token {token}'
+
+        return token
@@ -0,0 +1,80 @@
+"""
+Measures the import time of worker and management command startup with
+python -X importtime.
+
+Run from the app directory with the database settings of the app:
+    python -m bench.startup --runs 5 --top 15
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+from bench.server import APP_DIR
+
+WORKER = (
+    '-c',
+    'from django.core.wsgi import get_wsgi_application; '
+    'get_wsgi_application()',
+)
+COMMAND = ('manage.py', 'wait_for_db')
+
+SCENARIOS = (
+    ('worker', WORKER),
+    ('wait_for_db', COMMAND),
+)
+
+IMPORT_TIME = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def import_profile(args, env=None):
+    """
+    Runs python with args and returns (total seconds, cumulative seconds
+    of every imported module)
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', *args],
+        cwd=APP_DIR,
+        env=dict(os.environ, **(env or {})),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        check=True
+    )
+
+    total = 0
+    modules = {}
+    for line in result.stderr.decode().splitlines():
+        match = IMPORT_TIME.match(line)
+        if match is None:
+            continue
+        cumulative = int(match.group(2)) / 1e6
+        modules[match.group(4)] = cumulative
+        if not match.group(3):
+            total += cumulative
+
+    return total, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10,
+                        help='Show the slowest imports of each scenario')
+    args = parser.parse_args()
+
+    for name, scenario in SCENARIOS:
+        profiles = [import_profile(scenario) for _ in range(args.runs)]
+        total = statistics.median(total for total, _ in profiles)
+        modules = profiles[-1][1]
+        print(f'\n{name}: {total * 1000:.1f} ms importing '
+              f'{len(modules)} modules')
+        slowest = sorted(modules.items(), key=lambda item: item[1],
+                         reverse=True)
+        for module, seconds in slowest[:args.top]:
+            print(f'  {seconds * 1000:>8.1f} ms  {module}')
+
+
+if __name__ == '__main__':
+    main()
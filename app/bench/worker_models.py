@@ -0,0 +1,106 @@
+"""
+Compares throughput and latency of the main recipe endpoints under each
+gunicorn worker model.
+
+Run from the app directory with the database settings of the app:
+    python -m bench.worker_models --duration 20 --concurrency 32
+"""
+import argparse
+import json
+import os
+
+import django
+
+WORKER_MODELS = (
+    ('sync', 'app.wsgi', 'sync'),
+    ('gthread', 'app.wsgi', 'gthread'),
+    ('uvicorn', 'app.asgi', 'uvicorn.workers.UvicornWorker'),
+)
+
+
+def seed(client, recipes=20):
+    """
+    Creates tags, ingredients and recipes unless an earlier run did, and
+    returns a recipe and tag id
+    """
+    from django.urls import reverse
+
+    recipes_url = reverse('recipe:recipe-list')
+    recipe_ids = [recipe['id']
+                  for recipe in client.request('GET', recipes_url)]
+    # Tags and ingredients are sent by name, which reuses existing ones
+    for i in range(len(recipe_ids), recipes):
+        recipe_ids.append(client.request('POST', recipes_url, {
+            'title': f'Recipe {i}',
+            'time_minutes': 10 + i,
+            'price': '9.99',
+            'tags': [f'Tag {j % 5}' for j in range(i, i + 2)],
+            'ingredients': [f'Ingredient {j % 10}' for j in range(i, i + 4)],
+        })['id'])
+    tags = {tag['name']: tag['id'] for tag in
+            client.request('GET', reverse('recipe:tag-list'))}
+
+    return min(recipe_ids), tags['Tag 0']
+
+
+def targets(token, recipe_id, tag_id):
+    """Returns the endpoints to load"""
+    from django.urls import reverse
+    from bench.loadgen import Target
+
+    headers = {'Authorization': f'Token {token}'}
+    return [
+        Target('recipe-list', reverse('recipe:recipe-list'), headers=headers),
+        Target('recipe-filter',
+               reverse('recipe:recipe-list') + f'?tags={tag_id}',
+               headers=headers),
+        Target('recipe-detail',
+               reverse('recipe:recipe-detail', args=[recipe_id]),
+               headers=headers),
+        Target('tag-list', reverse('recipe:tag-list'), headers=headers),
+        Target('ingredient-list', reverse('recipe:ingredient-list'),
+               headers=headers),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--models', nargs='+',
+                        default=[name for name, _, _ in WORKER_MODELS])
+    parser.add_argument('--output', help='Write results as JSON to file')
+    args = parser.parse_args()
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+    from bench import loadgen
+    from bench.server import ApiClient, gunicorn
+
+    results = {}
+    fixtures = None
+    for name, module, worker_class in WORKER_MODELS:
+        if name not in args.models:
+            continue
+        with gunicorn(module, worker_class) as server:
+            client = ApiClient(server.url)
+            token = client.login('benchmark@example.com', 'benchmark-pass')
+            if fixtures is None:
+                fixtures = seed(client)
+            summary = loadgen.run(
+                server.url,
+                targets(token, *fixtures),
+                concurrency=args.concurrency,
+                duration=args.duration
+            )
+        results[name] = summary
+        print(f'\n{name} workers')
+        print(loadgen.format_table(summary))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
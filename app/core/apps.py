@@ -1,5 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.db.backends.signals import connection_created
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        if settings.DATABASE_REPLICAS:
+            from core.db.routers import check_pin_cache
+            check_pin_cache()
+        if settings.SLOW_QUERY_LOG['ENABLED']:
+            from core.db.instrumentation import install_queryset_origins, \
+                install_slow_query_logger
+            install_queryset_origins()
+            connection_created.connect(install_slow_query_logger)
@@ -0,0 +1,242 @@
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from tempfile import SpooledTemporaryFile
+
+from django.db import close_old_connections
+
+from core.metrics import REGISTRY
+
+requests_waiting = REGISTRY.gauge(
+    'asgi_requests_waiting',
+    'Received requests waiting for a thread to run their view',
+    ('pool',)
+)
+
+
+class OffloadingASGIHandler:
+    """
+    ASGI application running a Django WSGI handler on bounded thread pools.
+
+    Request bodies are received and responses sent on the event loop, so
+    slow clients hold no thread while they upload or download. Only the
+    view and the iteration of streaming responses run on a thread, and
+    image uploads run on a separate smaller pool so they cannot starve
+    list and detail requests. Bodies over max_body_size are answered with
+    413 before the view runs.
+    """
+    upload_path_suffix = '/upload-image/'
+    max_memory_body = 1024 * 1024
+
+    def __init__(self, wsgi_application, workers, upload_workers,
+                 max_body_size=20 * 1024 * 1024):
+        self.wsgi_application = wsgi_application
+        self.max_body_size = max_body_size
+        self.pools = {
+            'default': ThreadPoolExecutor(workers, 'asgi'),
+            'upload': ThreadPoolExecutor(upload_workers, 'asgi-upload'),
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        elif scope['type'] != 'http':
+            raise ValueError(f'Unsupported scope type {scope["type"]}')
+
+        body = await self.read_body(scope, receive, send)
+        if body is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        pool = self.get_pool(scope)
+        executor = self.pools[pool]
+        requests_waiting.inc(pool=pool)
+        try:
+            status, headers, chunks = await loop.run_in_executor(
+                executor,
+                self.run_wsgi,
+                self.get_environ(scope, body),
+                pool
+            )
+            await send({
+                'type': 'http.response.start',
+                'status': status,
+                'headers': headers,
+            })
+            if isinstance(chunks, list):
+                for chunk in chunks:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            else:
+                await self.send_stream(loop, executor, chunks, send)
+        finally:
+            body.close()
+
+        await send({'type': 'http.response.body', 'body': b''})
+
+    async def send_stream(self, loop, executor, result, send):
+        """Sends a streaming response chunk by chunk as the pool reads it"""
+        chunks = iter(result)
+        try:
+            while True:
+                chunk = await loop.run_in_executor(
+                    executor, next, chunks, None
+                )
+                if chunk is None:
+                    break
+                if chunk:
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(executor, result.close)
+
+    async def lifespan(self, receive, send):
+        """Handles server startup and shuts the pools down on exit"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                # Waiting for running views must not block the loop
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.shutdown
+                )
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def shutdown(self):
+        """Waits for the running requests and stops the pools"""
+        for pool in self.pools.values():
+            pool.shutdown(wait=True)
+
+    async def read_body(self, scope, receive, send):
+        """
+        Returns the request body, spooled to disk when large, or None when
+        the client disconnected or the body was too large
+        """
+        for name, value in scope.get('headers', []):
+            if (name.lower() == b'content-length' and value.isdigit()
+                    and int(value) > self.max_body_size):
+                await self.send_too_large(send)
+                return None
+
+        body = SpooledTemporaryFile(max_size=self.max_memory_body)
+        size = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return None
+            chunk = message.get('body', b'')
+            size += len(chunk)
+            if size > self.max_body_size:
+                body.close()
+                await self.send_too_large(send)
+                return None
+            body.write(chunk)
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+
+        return body
+
+    async def send_too_large(self, send):
+        """Answers 413 without running the view"""
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [(b'content-type', b'text/plain')],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'Request body too large',
+        })
+
+    def get_pool(self, scope):
+        """Returns the name of the pool running the request"""
+        if (scope['method'] == 'POST'
+                and scope['path'].endswith(self.upload_path_suffix)):
+            return 'upload'
+
+        return 'default'
+
+    def get_environ(self, scope, body):
+        """Builds the WSGI environ of an ASGI HTTP scope"""
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', ''),
+            # WSGI carries the raw path bytes as latin-1
+            'PATH_INFO': scope['path'].encode('utf8').decode('latin1'),
+            'QUERY_STRING': scope['query_string'].decode('ascii'),
+            'SERVER_PROTOCOL': f'HTTP/{scope["http_version"]}',
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1] or 80),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+            environ['REMOTE_PORT'] = str(scope['client'][1])
+
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin1').upper().replace('-', '_')
+            value = value.decode('latin1')
+            if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+                name = f'HTTP_{name}'
+            if name in environ:
+                value = f'{environ[name]},{value}'
+            environ[name] = value
+
+        if body is not None:
+            # The server has decoded chunked bodies, which come without a
+            # Content-Length, and Django reads only that many bytes
+            body.seek(0, os.SEEK_END)
+            environ['CONTENT_LENGTH'] = str(body.tell())
+            body.seek(0)
+
+        return environ
+
+    def run_wsgi(self, environ, pool):
+        """
+        Runs the WSGI application and returns its status, headers and
+        either the whole body as a list of chunks or, for streaming
+        responses, the unread response
+        """
+        requests_waiting.inc(-1, pool=pool)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        if getattr(result, 'streaming', False):
+            # Closing the response on another thread finishes the request
+            # there, so release this thread's connections now
+            close_old_connections()
+            return response['status'], response['headers'], result
+
+        try:
+            chunks = [chunk for chunk in result if chunk]
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+
+        return response['status'], response['headers'], chunks
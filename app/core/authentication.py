@@ -0,0 +1,11 @@
+from rest_framework import authentication
+
+from core.profiling import profile_phase
+
+
+class TokenAuthentication(authentication.TokenAuthentication):
+    """Token authentication timed by the request profiling middleware"""
+
+    def authenticate(self, request):
+        with profile_phase('auth'):
+            return super().authenticate(request)
@@ -0,0 +1,167 @@
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class GzipCodec:
+    """gzip, available everywhere"""
+    name = 'gzip'
+    default_level = 6
+
+    def __init__(self, level=None):
+        self.level = self.default_level if level is None else level
+
+    def compressor(self):
+        """Returns an object with compress(data) and flush() methods"""
+        # 31 window bits write a gzip header with zero mtime, so equal
+        # bodies compress to equal bytes
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        """Returns data compressed in one go"""
+        compressor = self.compressor()
+
+        return compressor.compress(data) + compressor.flush()
+
+
+class _BrotliCompressor:
+    """Brotli streaming compressor with the zlib method names"""
+
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def flush(self):
+        return self.compressor.finish()
+
+
+class BrotliCodec(GzipCodec):
+    """Brotli, when the brotli package is installed"""
+    name = 'br'
+    default_level = 4
+
+    def compressor(self):
+        return _BrotliCompressor(self.level)
+
+    def compress(self, data):
+        return brotli.compress(data, quality=self.level)
+
+
+class ZstdCodec(GzipCodec):
+    """Zstandard, when the zstandard package is installed"""
+    name = 'zstd'
+    default_level = 3
+
+    def compressor(self):
+        return zstandard.ZstdCompressor(level=self.level).compressobj()
+
+    def compress(self, data):
+        # Compressors are not thread safe, so every call gets its own
+        return zstandard.ZstdCompressor(level=self.level).compress(data)
+
+
+CODECS = (
+    (BrotliCodec, brotli),
+    (ZstdCodec, zstandard),
+    (GzipCodec, zlib),
+)
+
+
+def get_codecs(levels=None):
+    """Returns the available codecs by encoding name, best ratio first"""
+    levels = levels or {}
+
+    return OrderedDict(
+        (codec_class.name, codec_class(levels.get(codec_class.name)))
+        for codec_class, module in CODECS if module is not None
+    )
+
+
+def parse_accept_encoding(header):
+    """Returns the q-value of every encoding in an Accept-Encoding header"""
+    qvalues = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        qvalue = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    qvalue = float(value)
+                except ValueError:
+                    qvalue = 0.0
+        qvalues[name] = qvalue
+
+    return qvalues
+
+
+def negotiate(header, encodings):
+    """
+    Returns the encoding of encodings the client accepts with the highest
+    q-value, preferring earlier encodings on ties, or None
+    """
+    qvalues = parse_accept_encoding(header)
+    wildcard = qvalues.get('*', 0.0)
+    best, best_qvalue = None, 0.0
+    for encoding in encodings:
+        qvalue = qvalues.get(encoding, wildcard)
+        if qvalue > best_qvalue:
+            best, best_qvalue = encoding, qvalue
+
+    return best
+
+
+class CompressedBodyCache:
+    """
+    Least recently used compressed bodies keyed by encoding and a digest
+    of the uncompressed body, bounded in total size.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._bodies = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, encoding, body):
+        """Returns the cache key of a body compressed with encoding"""
+        return encoding, hashlib.sha1(body).digest()
+
+    def get(self, key):
+        """Returns the cached compressed body, or None"""
+        with self._lock:
+            compressed = self._bodies.get(key)
+            if compressed is not None:
+                self._bodies.move_to_end(key)
+
+        return compressed
+
+    def set(self, key, compressed):
+        """Stores a compressed body, evicting the least recently used"""
+        if len(compressed) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._bodies.pop(key, None)
+            if previous is not None:
+                self.size -= len(previous)
+            self._bodies[key] = compressed
+            self.size += len(compressed)
+            while self.size > self.max_bytes:
+                _, evicted = self._bodies.popitem(last=False)
+                self.size -= len(evicted)
@@ -0,0 +1,118 @@
+import threading
+
+from django.db.backends.postgresql import base
+
+from core.db.pool import ConnectionPool
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend adding two settings to a database entry:
+
+    CONN_HEALTH_CHECKS: check that a reused connection still works before
+    its first use in each request, and before a pooled connection is
+    taken from the idle connections.
+    POOL: dict with MAX_SIZE and TIMEOUT to share a bounded pool of
+    connections between the threads of the process.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_done = False
+
+    def get_pool(self):
+        """Returns the connection pool of this database, if enabled"""
+        options = self.settings_dict.get('POOL')
+        if not options:
+            return None
+
+        with _pools_lock:
+            pool = _pools.get(self.alias)
+            if pool is None:
+                pool = _pools[self.alias] = ConnectionPool(
+                    self.alias,
+                    max_size=options.get('MAX_SIZE', 10),
+                    timeout=options.get('TIMEOUT', 5)
+                )
+
+        return pool
+
+    def get_new_connection(self, conn_params):
+        pool = self.get_pool()
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        # Idle connections may have been closed by the server while in the
+        # pool, and connect() counts a pooled connection as checked
+        check = None
+        if self.settings_dict.get('CONN_HEALTH_CHECKS'):
+            check = self.is_connection_usable
+        connection = pool.acquire(
+            lambda: super(DatabaseWrapper, self).get_new_connection(
+                conn_params
+            ),
+            check
+        )
+        self.isolation_level = self.settings_dict['OPTIONS'].get(
+            'isolation_level',
+            connection.isolation_level
+        )
+
+        return connection
+
+    @staticmethod
+    def is_connection_usable(connection):
+        """Returns whether an idle DB-API connection still works"""
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            # End the transaction the check began outside autocommit
+            connection.rollback()
+        except base.Database.Error:
+            return False
+
+        return True
+
+    def _close(self):
+        pool = self.get_pool()
+        if pool is None or self.connection is None:
+            return super()._close()
+
+        connection = self.connection
+        discard = bool(connection.closed) or self.errors_occurred
+        if not discard:
+            try:
+                connection.rollback()
+            except base.Database.Error:
+                discard = True
+
+        if discard:
+            try:
+                connection.close()
+            except base.Database.Error:
+                pass
+        pool.release(connection, discard=discard)
+
+    def connect(self):
+        super().connect()
+        self.health_check_done = True
+
+    def ensure_connection(self):
+        if (self.connection is not None
+                and not self.health_check_done
+                and not self.in_atomic_block
+                and self.settings_dict.get('CONN_HEALTH_CHECKS')):
+            if not self.is_usable():
+                self.close()
+            self.health_check_done = True
+
+        super().ensure_connection()
+
+    def close_if_unusable_or_obsolete(self):
+        # Called when requests start and finish, so the next request
+        # checks its connection again on first use
+        super().close_if_unusable_or_obsolete()
+        self.health_check_done = False
@@ -0,0 +1,204 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+import django
+from django.conf import settings
+from django.db.models.query import QuerySet
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__)
+)))
+DJANGO_DIR = os.path.dirname(os.path.abspath(django.__file__))
+
+_NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s|\?'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def normalize_sql(sql):
+    """Replaces literals and parameter lists so similar queries match"""
+    for pattern, replacement in _NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+
+    return sql.strip()
+
+
+def fingerprint(normalized_sql):
+    """Returns a short stable id of a normalized query"""
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:16]
+
+
+def _is_app_frame(frame):
+    """Returns whether a frame runs app code outside of this package"""
+    filename = frame.f_code.co_filename
+
+    return filename.startswith(APP_DIR) \
+        and f'{os.sep}core{os.sep}db{os.sep}' not in filename
+
+
+def _describe(frame):
+    """Returns module, class and function of a frame, with its line"""
+    code = frame.f_code
+    module = os.path.relpath(code.co_filename, APP_DIR)[:-3]
+    name = code.co_name
+    instance = frame.f_locals.get('self')
+    if instance is not None:
+        name = f'{type(instance).__name__}.{name}'
+
+    return f'{module.replace(os.sep, ".")}.{name}:{frame.f_lineno}'
+
+
+_chain = QuerySet._chain
+
+
+def _chain_recording_origin(self, **kwargs):
+    """
+    QuerySet._chain remembering the app frame that built the queryset, or
+    the origin of the queryset it was chained from
+    """
+    clone = _chain(self, **kwargs)
+    frame = sys._getframe(1)
+    while frame is not None \
+            and frame.f_code.co_filename.startswith(DJANGO_DIR):
+        frame = frame.f_back
+    if frame is not None and _is_app_frame(frame):
+        clone._origin = _describe(frame)
+    else:
+        clone._origin = getattr(self, '_origin', None)
+
+    return clone
+
+
+def install_queryset_origins():
+    """Records where querysets are built, for find_origin"""
+    QuerySet._chain = _chain_recording_origin
+
+
+def find_origin():
+    """
+    Returns the API view and action running the query, and where its
+    queryset was built, or else the innermost app frame that executed it
+    """
+    view = origin = queryset_origin = None
+    frame = sys._getframe(2)
+    while frame is not None and view is None:
+        if origin is None and _is_app_frame(frame):
+            origin = _describe(frame)
+
+        instance = frame.f_locals.get('self')
+        if queryset_origin is None and isinstance(instance, QuerySet):
+            queryset_origin = getattr(instance, '_origin', None)
+        if instance is not None and hasattr(instance, 'dispatch') \
+                and hasattr(instance, 'request'):
+            action = getattr(instance, 'action', None) \
+                or getattr(instance.request, 'method', '').lower()
+            view = f'{type(instance).__name__}.{action}'
+        frame = frame.f_back
+
+    return view, queryset_origin or origin
+
+
+class SlowQueryLogger:
+    """
+    Database execute wrapper logging queries slower than the threshold as
+    JSON lines, with the query plan of the first occurrence of every
+    query fingerprint
+    """
+    max_explained = 10000
+
+    def __init__(self, threshold, path, explain=True):
+        self.threshold = threshold
+        self.path = path
+        self.explain = explain
+        self._explained = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            if duration >= self.threshold:
+                self.log(sql, params, many, context, duration)
+
+    def log(self, sql, params, many, context, duration):
+        """Records a slow query"""
+        normalized = normalize_sql(sql)
+        key = fingerprint(normalized)
+        connection = context['connection']
+        with self._lock:
+            explain = self.explain and not many \
+                and key not in self._explained \
+                and len(self._explained) < self.max_explained
+            if explain:
+                self._explained.add(key)
+
+        view, origin = find_origin()
+        entry = {
+            'time': time.time(),
+            'database': connection.alias,
+            'fingerprint': key,
+            'duration_ms': round(duration * 1000, 3),
+            'sql': normalized,
+            'view': view,
+            'origin': origin,
+            'plan': self.get_plan(connection, sql, params) if explain
+            else None,
+        }
+        logger.warning('Slow query %s took %.1f ms in %s: %s', key,
+                       entry['duration_ms'], view or origin, normalized)
+        with self._lock, open(self.path, 'a') as log_file:
+            log_file.write(json.dumps(entry) + '\n')
+
+    def get_plan(self, connection, sql, params):
+        """Returns the query plan of a SELECT, or None"""
+        if not sql.lstrip().upper().startswith('SELECT'):
+            return None
+        prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' \
+            else 'EXPLAIN '
+
+        # Use a raw cursor, so the plan is not logged as a query itself
+        cursor = connection.connection.cursor()
+        try:
+            if connection.vendor == 'sqlite':
+                sql = sql.replace('%s', '?')
+            cursor.execute(prefix + sql, params or ())
+            return '\n'.join(
+                ' '.join(str(column) for column in row)
+                for row in cursor.fetchall()
+            )
+        except Exception as exc:
+            return f'Unavailable: {exc}'
+        finally:
+            cursor.close()
+
+
+_slow_query_logger = None
+
+
+def install_slow_query_logger(sender, connection, **kwargs):
+    """Adds the slow query logger to a newly opened connection"""
+    global _slow_query_logger
+
+    if _slow_query_logger is None:
+        options = settings.SLOW_QUERY_LOG
+        _slow_query_logger = SlowQueryLogger(
+            options['THRESHOLD_MS'] / 1000,
+            options['PATH'],
+            options.get('EXPLAIN', True)
+        )
+    if _slow_query_logger not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_slow_query_logger)
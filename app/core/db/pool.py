@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+
+from django.db.utils import OperationalError
+
+from core.metrics import REGISTRY
+
+pool_connections = REGISTRY.gauge(
+    'db_pool_connections',
+    'Open pooled database connections',
+    ('alias', 'state')
+)
+pool_wait_seconds = REGISTRY.histogram(
+    'db_pool_wait_seconds',
+    'Time spent waiting for a pooled database connection',
+    ('alias',)
+)
+pool_timeouts = REGISTRY.counter(
+    'db_pool_timeouts_total',
+    'Requests for a pooled database connection that timed out',
+    ('alias',)
+)
+pool_discarded = REGISTRY.counter(
+    'db_pool_discarded_total',
+    'Idle pooled database connections closed after failing a check',
+    ('alias',)
+)
+
+
+class PoolTimeout(OperationalError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Bounded pool of DB-API connections shared by the threads of a process.
+    Idle connections are reused most recently released first, so rarely
+    needed extra connections stay idle.
+    """
+
+    def __init__(self, alias, max_size=10, timeout=5):
+        self.alias = alias
+        self.max_size = max_size
+        self.timeout = timeout
+        self._idle = deque()
+        self._size = 0
+        self._condition = threading.Condition()
+
+    def _update_metrics(self):
+        """Publishes the number of idle and used connections"""
+        idle = len(self._idle)
+        pool_connections.set(idle, alias=self.alias, state='idle')
+        pool_connections.set(
+            self._size - idle,
+            alias=self.alias,
+            state='in_use'
+        )
+
+    def acquire(self, connect, check=None):
+        """
+        Returns an idle connection, or one opened with connect while the
+        pool has room, waiting up to timeout seconds for either. Idle
+        connections for which check returns False are closed and replaced.
+        """
+        start = time.monotonic()
+        deadline = start + self.timeout
+        while True:
+            connection = self._take(deadline)
+            if connection is None:
+                break
+            if check is None or check(connection):
+                pool_wait_seconds.observe(time.monotonic() - start,
+                                          alias=self.alias)
+                return connection
+            pool_discarded.inc(alias=self.alias)
+            try:
+                connection.close()
+            except Exception:
+                pass
+            self.release(None, discard=True)
+        pool_wait_seconds.observe(time.monotonic() - start, alias=self.alias)
+
+        try:
+            return connect()
+        except Exception:
+            self.release(None, discard=True)
+            raise
+
+    def _take(self, deadline):
+        """
+        Returns an idle connection, or None after reserving room for a new
+        one, waiting until deadline for either
+        """
+        with self._condition:
+            while not self._idle and self._size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    pool_timeouts.inc(alias=self.alias)
+                    raise PoolTimeout(
+                        f'No connection available in pool {self.alias!r} '
+                        f'within {self.timeout} seconds'
+                    )
+                self._condition.wait(remaining)
+
+            connection = self._idle.pop() if self._idle else None
+            if connection is None:
+                self._size += 1
+            self._update_metrics()
+
+        return connection
+
+    def release(self, connection, discard=False):
+        """Returns a connection to the pool, or forgets a discarded one"""
+        with self._condition:
+            if discard:
+                self._size -= 1
+            else:
+                self._idle.append(connection)
+            self._update_metrics()
+            self._condition.notify()
+
+    def close(self):
+        """Closes all idle connections"""
+        with self._condition:
+            while self._idle:
+                self._idle.pop().close()
+                self._size -= 1
+            self._update_metrics()
@@ -0,0 +1,90 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.permissions import SAFE_METHODS
+
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+# Caches only seen by one process, which cannot hold read-your-writes pins
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.dummy.DummyCache',
+    'django.core.cache.backends.locmem.LocMemCache',
+)
+
+
+def _pin_key(user):
+    """Returns cache key marking that the user wrote recently"""
+    return f'replica-pin:{user.pk}'
+
+
+def check_pin_cache():
+    """Raises ImproperlyConfigured unless pins are shared by all workers"""
+    options = settings.CACHES.get(settings.REPLICA_PIN_CACHE)
+    if options is None or options['BACKEND'] in PROCESS_LOCAL_CACHES:
+        raise ImproperlyConfigured(
+            f'DATABASE_REPLICAS need the REPLICA_PIN_CACHE cache '
+            f'{settings.REPLICA_PIN_CACHE!r} to be shared between processes.'
+        )
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads to a random replica while a view allows it, and every
+    other query to the primary
+    """
+
+    def db_for_read(self, model, **hints):
+        if _read_from_replica.get() and settings.DATABASE_REPLICAS:
+            return random.choice(settings.DATABASE_REPLICAS)
+
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+
+        return None
+
+
+class ReadReplicaMixin:
+    """
+    Lets safe requests of an API view read from replicas once the user is
+    authenticated. Users who wrote within REPLICA_STICKY_SECONDS keep
+    reading from the primary, so they see their own writes.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+
+        if (request.method in SAFE_METHODS
+                and settings.DATABASE_REPLICAS
+                and not caches[settings.REPLICA_PIN_CACHE].get(
+                    _pin_key(request.user))):
+            self._replica_token = _read_from_replica.set(True)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _read_from_replica.reset(token)
+            self._replica_token = None
+        elif (request.method not in SAFE_METHODS
+                and settings.DATABASE_REPLICAS
+                and response.status_code < 400
+                and request.user.is_authenticated):
+            caches[settings.REPLICA_PIN_CACHE].set(
+                _pin_key(request.user),
+                True,
+                settings.REPLICA_STICKY_SECONDS
+            )
+
+        return super().finalize_response(request, response, *args, **kwargs)
@@ -0,0 +1,114 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+
+
+class ReadinessCheck:
+    """
+    Checks that the databases and media storage are reachable, on a
+    background thread every interval seconds, so that readiness probes
+    only read the last result. A result older than a few intervals means
+    the checks are stuck and is reported as not ready.
+    """
+    stale_intervals = 3
+
+    def __init__(self, interval, databases, storage=True, timeout=2):
+        self.interval = interval
+        self.databases = databases
+        self.storage = storage
+        self.timeout = timeout
+        self.status = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Returns the last status, starting the checks on first use"""
+        # Threads do not survive a fork, so a forked worker starts its own
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self.refresh()
+                    threading.Thread(
+                        target=self._run, name='readiness', daemon=True
+                    ).start()
+                    self._pid = os.getpid()
+
+        status = self.status
+        age = time.time() - status['checked_at']
+        if age > self.interval * self.stale_intervals + self.timeout:
+            return {
+                **status,
+                'ready': False,
+                'checks': {
+                    **status['checks'],
+                    'fresh': f'Last checked {age:.0f} seconds ago',
+                },
+            }
+
+        return status
+
+    def refresh(self):
+        """Runs the checks and stores their result"""
+        checks = {}
+        for alias in self.databases:
+            checks[f'database:{alias}'] = self.check_database(alias)
+        if self.storage:
+            checks['storage'] = self.check_storage()
+
+        self.status = {
+            'ready': all(result == 'ok' for result in checks.values()),
+            'checks': checks,
+            'checked_at': time.time(),
+        }
+
+    def check_database(self, alias):
+        """Returns 'ok' if the database answers a query, or the error"""
+        connection = connections[alias]
+        try:
+            if connection.vendor == 'postgresql':
+                # Local to the transaction, so a reused request connection
+                # keeps its own timeout
+                with transaction.atomic(using=alias), \
+                        connection.cursor() as cursor:
+                    cursor.execute('SET LOCAL statement_timeout = %s',
+                                   [int(self.timeout * 1000)])
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+            else:
+                with connection.cursor() as cursor:
+                    cursor.execute('SELECT 1')
+                    cursor.fetchone()
+        except Exception as exc:
+            return str(exc).strip().split('\n')[0] or type(exc).__name__
+
+        return 'ok'
+
+    def check_storage(self):
+        """Returns 'ok' if the media storage is reachable, or the error"""
+        try:
+            if not default_storage.exists(''):
+                return 'Media storage root does not exist'
+        except Exception as exc:
+            return str(exc) or type(exc).__name__
+
+        return 'ok'
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.refresh()
+            # Keep no idle connections open between checks
+            for alias in self.databases:
+                connections[alias].close()
+
+
+readiness = ReadinessCheck(
+    settings.HEALTH_CHECK['INTERVAL'],
+    settings.HEALTH_CHECK['DATABASES'],
+    settings.HEALTH_CHECK['STORAGE'],
+    settings.HEALTH_CHECK['TIMEOUT']
+)
@@ -0,0 +1,224 @@
+import json
+import random
+import subprocess
+import time
+from decimal import Decimal
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+
+from core.models import ChangeLog, Ingredient, Recipe, Tag
+
+PASSWORD = 'benchmark-pass'
+
+WORDS = (
+    'spicy', 'green', 'roast', 'curry', 'lemon', 'garlic', 'smoky',
+    'sweet', 'crispy', 'herb', 'ginger', 'honey', 'pepper', 'tomato',
+)
+
+
+class Command(BaseCommand):
+    help = 'Seeds benchmark data and measures the API under mixed load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=4)
+        parser.add_argument('--recipes', type=int, default=200,
+                            help='Recipes of every user')
+        parser.add_argument('--tags', type=int, default=20)
+        parser.add_argument('--ingredients', type=int, default=60)
+        parser.add_argument('--concurrency', type=int, default=8)
+        parser.add_argument('--duration', type=float, default=20)
+        parser.add_argument(
+            '--url',
+            help='Load a running server instead of starting one'
+        )
+        parser.add_argument(
+            '--worker-class',
+            default='gthread',
+            help='Gunicorn worker class of the started server'
+        )
+        parser.add_argument('--output', help='Write results as JSON to file')
+
+    def handle(self, *args, **options):
+        """Django command to benchmark the API"""
+        from bench import loadgen
+        from bench.server import gunicorn
+
+        start = time.perf_counter()
+        fixtures = [self.seed(index, options)
+                    for index in range(options['users'])]
+        self.stdout.write(f'Seeded {options["users"]} users in '
+                          f'{time.perf_counter() - start:.1f} sec')
+        targets = [target for user_fixtures in fixtures
+                   for target in self.targets(*user_fixtures)]
+
+        if options['url']:
+            queries = self.count_queries(targets, options['url'])
+            summary = loadgen.run(options['url'], targets,
+                                  options['concurrency'],
+                                  options['duration'])
+        else:
+            with gunicorn('app.wsgi', options['worker_class']) as server:
+                queries = self.count_queries(targets, server.url)
+                summary = loadgen.run(server.url, targets,
+                                      options['concurrency'],
+                                      options['duration'])
+
+        for name, count in queries.items():
+            summary[name]['queries'] = count
+        self.stdout.write(loadgen.format_table(summary))
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump({
+                    'commit': self.get_commit(),
+                    'time': time.time(),
+                    'options': {
+                        key: options[key] for key in (
+                            'users', 'recipes', 'tags', 'ingredients',
+                            'concurrency', 'duration', 'url',
+                            'worker_class',
+                        )
+                    },
+                    'results': summary,
+                }, output, indent=2)
+
+    def seed(self, index, options):
+        """
+        Creates a benchmark user with tags, ingredients and recipes unless
+        it exists, and returns its email, token, recipe and tag ids
+        """
+        email = f'benchmark-{index}@example.com'
+        user = get_user_model().objects.filter(email=email).first()
+        if user is None:
+            user = get_user_model().objects.create_user(
+                email, PASSWORD, name=f'Benchmark {index}'
+            )
+        if not Recipe.objects.filter(user=user).exists():
+            self.seed_recipes(user, random.Random(index), options)
+
+        token, _ = Token.objects.get_or_create(user=user)
+        recipe_ids = list(Recipe.objects.filter(user=user).order_by('id')
+                          .values_list('id', flat=True)[:20])
+        tag_ids = list(Tag.objects.filter(user=user).order_by('id')
+                       .values_list('id', flat=True)[:5])
+
+        return email, token.key, recipe_ids, tag_ids
+
+    @transaction.atomic
+    def seed_recipes(self, user, rand, options):
+        """Bulk creates the recipes of a user with their change log"""
+        Tag.objects.bulk_create([
+            Tag(user=user, name=f'{rand.choice(WORDS).title()} {i}')
+            for i in range(options['tags'])
+        ])
+        Ingredient.objects.bulk_create([
+            Ingredient(user=user, name=f'{rand.choice(WORDS)} {i}')
+            for i in range(options['ingredients'])
+        ])
+        Recipe.objects.bulk_create([
+            Recipe(
+                user=user,
+                title=f'{rand.choice(WORDS).title()} {rand.choice(WORDS)}',
+                time_minutes=rand.randint(5, 120),
+                price=Decimal(rand.randint(100, 5000)) / 100,
+            )
+            for _ in range(options['recipes'])
+        ])
+
+        tags = list(Tag.objects.filter(user=user).values_list('id', flat=True))
+        ingredients = list(Ingredient.objects.filter(user=user)
+                           .values_list('id', flat=True))
+        recipes = list(Recipe.objects.filter(user=user)
+                       .values_list('id', flat=True))
+        Recipe.tags.through.objects.bulk_create([
+            Recipe.tags.through(recipe_id=recipe, tag_id=tag)
+            for recipe in recipes
+            for tag in rand.sample(tags, min(3, len(tags)))
+        ])
+        Recipe.ingredients.through.objects.bulk_create([
+            Recipe.ingredients.through(recipe_id=recipe, ingredient_id=item)
+            for recipe in recipes
+            for item in rand.sample(ingredients, min(8, len(ingredients)))
+        ])
+
+        # bulk_create sends no signals, keep delta sync consistent
+        ChangeLog.objects.bulk_create(
+            [ChangeLog(user=user, kind=ChangeLog.TAG, object_id=pk)
+             for pk in tags] +
+            [ChangeLog(user=user, kind=ChangeLog.INGREDIENT, object_id=pk)
+             for pk in ingredients] +
+            [ChangeLog(user=user, kind=ChangeLog.RECIPE, object_id=pk)
+             for pk in recipes]
+        )
+
+    def targets(self, email, token, recipe_ids, tag_ids):
+        """Returns the weighted requests of one user"""
+        from bench.concurrency import jpeg_multipart
+        from bench.loadgen import Target
+
+        headers = {'Authorization': f'Token {token}'}
+        content_type, image = jpeg_multipart()
+        recipes = reverse('recipe:recipe-list')
+        tag_filter = ','.join(str(pk) for pk in tag_ids[:2])
+
+        return [
+            Target('token', reverse('user:token'), method='POST',
+                   body={'email': email, 'password': PASSWORD}),
+            Target('recipe-list', recipes, headers=headers, weight=4),
+            Target('recipe-filter', f'{recipes}?tags={tag_filter}',
+                   headers=headers, weight=2),
+            Target('recipe-detail',
+                   reverse('recipe:recipe-detail', args=[recipe_ids[0]]),
+                   headers=headers, weight=4),
+            Target('tag-list', reverse('recipe:tag-list'), headers=headers,
+                   weight=2),
+            Target('ingredient-list', reverse('recipe:ingredient-list'),
+                   headers=headers, weight=2),
+            Target('upload-image',
+                   reverse('recipe:recipe-upload-image',
+                           args=[recipe_ids[-1]]),
+                   method='POST', body=image,
+                   headers=dict(headers, **{'Content-Type': content_type})),
+        ]
+
+    def count_queries(self, targets, url):
+        """Returns the database queries of one request to every target"""
+        client = Client(HTTP_HOST=urlsplit(url).hostname)
+        counts = {}
+        for target in targets:
+            if target.name in counts:
+                continue
+            method, path, body, headers = target.prepare()
+            content_type = headers.pop('Content-Type',
+                                       'application/octet-stream')
+            extra = {
+                f'HTTP_{name.upper().replace("-", "_")}': value
+                for name, value in headers.items()
+            }
+            with CaptureQueriesContext(connection) as queries:
+                response = client.generic(method, path, body or '',
+                                          content_type, **extra)
+            if response.status_code >= 400:
+                self.stderr.write(f'{target.name} returned '
+                                  f'{response.status_code}')
+            counts[target.name] = len(queries)
+
+        return counts
+
+    def get_commit(self):
+        """Returns the current git commit, if any"""
+        try:
+            return subprocess.check_output(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                stderr=subprocess.DEVNULL
+            ).decode().strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,74 @@
+import statistics
+import time
+
+from django.contrib.auth.hashers import get_hashers
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = 'Measures configured password hashers and recommends a cost'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--target-ms',
+            type=float,
+            default=100,
+            help='Time a single password hash should take on this host'
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=5,
+            help='Number of hashes to time per hasher'
+        )
+
+    def _time_hash(self, hasher, samples, **kwargs):
+        """Returns the median seconds hasher takes to hash a password"""
+        timings = []
+        for _ in range(samples):
+            salt = hasher.salt()
+            start = time.perf_counter()
+            hasher.encode('benchmark-password', salt, **kwargs)
+            timings.append(time.perf_counter() - start)
+
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        """Django command to benchmark password hashers"""
+        target = options['target_ms'] / 1000
+        samples = options['samples']
+        recommended = None
+
+        for hasher in get_hashers():
+            try:
+                hasher.salt()
+                elapsed = self._time_hash(hasher, samples)
+            except ValueError:
+                # Hashers needing a library that is not installed
+                self.stdout.write(f'{hasher.algorithm}: unavailable')
+                continue
+
+            iterations = getattr(hasher, 'iterations', None)
+            cost = f' ({iterations} iterations)' if iterations else ''
+            self.stdout.write(
+                f'{hasher.algorithm}{cost}: {elapsed * 1000:.1f} ms'
+            )
+
+            if recommended is None and hasher.algorithm == 'pbkdf2_sha256':
+                # PBKDF2 cost grows linearly with iterations
+                recommended = max(
+                    int(iterations * target / elapsed) // 1000 * 1000,
+                    1000
+                )
+                measured = self._time_hash(
+                    hasher, samples, iterations=recommended
+                )
+
+        if recommended is None:
+            self.stdout.write('No PBKDF2 hasher configured to tune')
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f'PASSWORD_HASH_ITERATIONS = {recommended} '
+            f'({measured * 1000:.1f} ms, target {target * 1000:.0f} ms)'
+        ))
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.models import ChangeLog
+
+
+class Command(BaseCommand):
+    help = 'Removes old tombstones from the delta sync change log'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.CHANGELOG_TOMBSTONE_DAYS,
+            help='Keep tombstones newer than this many days'
+        )
+
+    def handle(self, *args, **options):
+        """Django command to compact the change log"""
+        before = timezone.now() - timedelta(days=options['days'])
+        count = ChangeLog.objects.compact(before)
+
+        self.stdout.write(self.style.SUCCESS(f'Removed {count} tombstones'))
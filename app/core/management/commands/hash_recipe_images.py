@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from core.models import Recipe
+from recipe.images import dhash
+
+
+class Command(BaseCommand):
+    help = 'Computes the perceptual hash of recipe images without one'
+
+    def handle(self, *args, **options):
+        """Django command to hash existing recipe images"""
+        recipes = Recipe.objects.exclude(image='').filter(image_hash='')
+        hashed = failed = 0
+        for recipe in recipes.only('id', 'user_id', 'image').iterator():
+            try:
+                with recipe.image.open('rb') as image:
+                    image_hash = dhash(image)
+            except (OSError, ValueError) as exc:
+                self.stderr.write(f'Recipe {recipe.id}: {exc}')
+                failed += 1
+                continue
+            # Saving records a change log entry, which is how the hash
+            # indexes of running servers learn about the new hash
+            recipe.image_hash = image_hash
+            recipe.save(update_fields=('image_hash',))
+            hashed += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Hashed {hashed} images, {failed} failed'
+        ))
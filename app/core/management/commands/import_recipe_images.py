@@ -0,0 +1,165 @@
+import json
+import os
+import tarfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Recipe, get_recipe_image_file_path
+from recipe.images import dhash
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+
+
+def iter_zip(path, max_bytes):
+    """Yields (name, data) of the files in a zip archive"""
+    with zipfile.ZipFile(path) as archive:
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            if info.file_size > max_bytes:
+                yield info.filename, None
+                continue
+            with archive.open(info) as entry:
+                data = entry.read(max_bytes + 1)
+            yield info.filename, data if len(data) <= max_bytes else None
+
+
+def iter_tar(path, max_bytes):
+    """Yields (name, data) of the files in a tar archive, read as a stream"""
+    with tarfile.open(path, 'r|*') as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            if member.size > max_bytes:
+                yield member.name, None
+                continue
+            yield member.name, archive.extractfile(member).read()
+
+
+def store_image(name, data):
+    """Validates an image, stores it and returns (path, perceptual hash)"""
+    from PIL import Image
+
+    with Image.open(BytesIO(data)) as image:
+        image.verify()
+    image_hash = dhash(BytesIO(data))
+    path = default_storage.save(
+        get_recipe_image_file_path(None, name), ContentFile(data)
+    )
+
+    return path, image_hash
+
+
+class Command(BaseCommand):
+    help = ('Attaches images from a zip or tar archive to recipes, where '
+            'each file is named after its recipe id, e.g. 42.jpg')
+
+    def add_arguments(self, parser):
+        parser.add_argument('archive', help='Zip or tar archive to import')
+        parser.add_argument(
+            '--user',
+            help='Only attach images to recipes of the user with this email'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Threads validating and storing images'
+        )
+        parser.add_argument(
+            '--max-size',
+            type=int,
+            default=10,
+            help='Skip images larger than this many megabytes'
+        )
+        parser.add_argument(
+            '--report',
+            help='Write the per-file report as JSON to this path'
+        )
+
+    def handle(self, *args, **options):
+        """Django command to import recipe images from an archive"""
+        path = options['archive']
+        max_bytes = options['max_size'] << 20
+        if zipfile.is_zipfile(path):
+            entries = iter_zip(path, max_bytes)
+        elif tarfile.is_tarfile(path):
+            entries = iter_tar(path, max_bytes)
+        else:
+            raise CommandError(f'{path} is not a zip or tar archive')
+
+        self.recipes = Recipe.objects.all()
+        if options['user']:
+            self.recipes = self.recipes.filter(user__email=options['user'])
+        self.report = []
+        self.run(entries, options['workers'])
+
+        if options['report']:
+            with open(options['report'], 'w') as report_file:
+                json.dump(self.report, report_file, indent=2)
+        failed = sum(1 for entry in self.report if entry['error'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {len(self.report) - failed} images, {failed} failed'
+        ))
+
+    def run(self, entries, workers):
+        """Stores images on a thread pool while reading the archive"""
+        pending = {}
+        with ThreadPoolExecutor(workers) as pool:
+            for name, data in entries:
+                recipe, error = self.get_recipe(name, data)
+                if error:
+                    self.add_report(name, recipe, error=error)
+                    continue
+                # Bound the images held in memory while the pool is busy
+                if len(pending) >= workers * 2:
+                    self.finish(pending, wait(pending,
+                                              return_when=FIRST_COMPLETED))
+                pending[pool.submit(store_image, name, data)] = name, recipe
+            self.finish(pending, wait(pending))
+
+    def get_recipe(self, name, data):
+        """Returns the recipe an entry belongs to, or an error message"""
+        stem, ext = os.path.splitext(os.path.basename(name))
+        if ext.lower() not in IMAGE_EXTENSIONS:
+            return None, 'Not an image file name'
+        try:
+            recipe_id = int(stem)
+        except ValueError:
+            return None, 'File name is not a recipe id'
+        if data is None:
+            return recipe_id, 'Image is too large'
+        recipe = self.recipes.filter(id=recipe_id).first()
+        if recipe is None:
+            return recipe_id, 'Recipe not found'
+
+        return recipe, None
+
+    def finish(self, pending, futures):
+        """Saves the stored images of completed futures to their recipes"""
+        for future in futures.done:
+            name, recipe = pending.pop(future)
+            try:
+                image, image_hash = future.result()
+            except Exception as exc:
+                self.add_report(name, recipe, error=f'Invalid image: {exc}')
+                continue
+            # Database writes stay on the main thread and its connection
+            recipe.image = image
+            recipe.image_hash = image_hash
+            recipe.save(update_fields=('image', 'image_hash'))
+            self.add_report(name, recipe, image=image)
+
+    def add_report(self, name, recipe, image=None, error=None):
+        """Records the outcome of one archive entry"""
+        self.report.append({
+            'file': name,
+            'recipe': getattr(recipe, 'id', recipe),
+            'image': image,
+            'error': error,
+        })
@@ -0,0 +1,71 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Summarizes the slow query log by query fingerprint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=settings.SLOW_QUERY_LOG['PATH'],
+            help='Slow query log to read'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Show this many queries with the most total time'
+        )
+        parser.add_argument(
+            '--plans',
+            action='store_true',
+            help='Show the captured query plans'
+        )
+
+    def handle(self, *args, **options):
+        """Django command to summarize slow queries"""
+        try:
+            with open(options['path']) as log_file:
+                stats = self.aggregate(log_file)
+        except FileNotFoundError:
+            raise CommandError(f'No slow query log at {options["path"]}')
+
+        ranked = sorted(stats.values(), key=lambda s: s['total_ms'],
+                        reverse=True)
+        for query in ranked[:options['limit']]:
+            self.stdout.write(
+                f'{query["fingerprint"]}  {query["count"]:>6} calls  '
+                f'{query["total_ms"]:>10.1f} ms total  '
+                f'{query["total_ms"] / query["count"]:>8.1f} ms mean  '
+                f'{query["max_ms"]:>8.1f} ms max'
+            )
+            self.stdout.write(f'  views: {", ".join(sorted(query["views"]))}')
+            self.stdout.write(f'  {query["sql"]}')
+            if options['plans'] and query['plan']:
+                for line in query['plan'].splitlines():
+                    self.stdout.write(f'    {line}')
+
+    def aggregate(self, lines):
+        """Returns the statistics of every query fingerprint"""
+        stats = {}
+        for line in lines:
+            entry = json.loads(line)
+            query = stats.setdefault(entry['fingerprint'], {
+                'fingerprint': entry['fingerprint'],
+                'sql': entry['sql'],
+                'count': 0,
+                'total_ms': 0.0,
+                'max_ms': 0.0,
+                'views': set(),
+                'plan': None,
+            })
+            query['count'] += 1
+            query['total_ms'] += entry['duration_ms']
+            query['max_ms'] = max(query['max_ms'], entry['duration_ms'])
+            query['views'].add(entry['view'] or entry['origin'] or '?')
+            query['plan'] = query['plan'] or entry['plan']
+
+        return stats
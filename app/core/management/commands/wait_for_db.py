@@ -1,21 +1,92 @@
+import random
 import time
 
-from django.core.management.base import BaseCommand
-from django.db import connections
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
 
 
 class Command(BaseCommand):
+    help = 'Waits until the database accepts queries'
+    # Run before anything else on startup, the checks only slow it down
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default=DEFAULT_DB_ALIAS,
+            help='Database to wait for'
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=60,
+            help='Give up after this many seconds'
+        )
+        parser.add_argument(
+            '--initial-delay',
+            type=float,
+            default=0.05,
+            help='Seconds before the first retry, doubled on every retry'
+        )
+        parser.add_argument(
+            '--max-delay',
+            type=float,
+            default=2,
+            help='Longest wait between retries'
+        )
+        parser.add_argument(
+            '--check-migrations',
+            action='store_true',
+            help='Also wait until all migrations are applied'
+        )
 
     def handle(self, *args, **options):
         """Django command to wait for execution until db is available"""
         self.stdout.write('Connecting to database...')
-        db_conn = None
-        while not db_conn:
+        db_conn = connections[options['database']]
+        deadline = time.monotonic() + options['timeout']
+        delay = options['initial_delay']
+        while True:
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('Database unavailable, waiting for 1 sec...')
-                time.sleep(1)
+                self.probe(db_conn)
+                pending = options['check_migrations'] \
+                    and self.pending_migrations(db_conn)
+                if not pending:
+                    break
+                reason = f'{pending} migrations not applied'
+            except OperationalError as exc:
+                # Reconnect on the next attempt if the connection broke
+                if db_conn.connection is not None \
+                        and not db_conn.is_usable():
+                    db_conn.close()
+                detail = str(exc).strip().split('\n')[0]
+                reason = f'Database unavailable ({detail})'
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise CommandError(f'{reason}, giving up')
+
+            # Jitter keeps restarting containers from retrying in lockstep
+            wait = min(random.uniform(delay / 2, delay), remaining)
+            self.stdout.write(f'{reason}, waiting {wait:.2f} sec...')
+            time.sleep(wait)
+            delay = min(delay * 2, options['max_delay'])
 
         self.stdout.write(self.style.SUCCESS('Database available!'))
+
+    def probe(self, db_conn):
+        """Runs a trivial query to check that the database answers"""
+        with db_conn.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+    def pending_migrations(self, db_conn):
+        """Returns the number of migrations not applied to the database"""
+        from django.db.migrations.executor import MigrationExecutor
+
+        executor = MigrationExecutor(db_conn)
+
+        return len(executor.migration_plan(
+            executor.loader.graph.leaf_nodes()
+        ))
@@ -0,0 +1,170 @@
+import threading
+from bisect import bisect_left
+
+
+class Metric:
+    """Base class for process-local metrics with optional labels"""
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        """Returns label values in declared order"""
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _format_labels(self, key, extra=()):
+        """Returns labels in exposition format, e.g. {route="x"}"""
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ''
+        labels = ','.join(f'{name}="{value}"' for name, value in pairs)
+
+        return '{' + labels + '}'
+
+    def samples(self):
+        """Returns (suffix, labels, value) of every sample"""
+        raise NotImplementedError
+
+    def render(self):
+        """Returns the metric in Prometheus text exposition format"""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type}',
+        ]
+        for suffix, labels, value in self.samples():
+            lines.append(f'{self.name}{suffix}{labels} {value}')
+
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """Monotonically increasing count"""
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Increments the count of the given labels"""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        """Returns the current count of the given labels"""
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            values = list(self._values.items())
+
+        return [('', self._format_labels(key), value)
+                for key, value in values]
+
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        """Sets the value of the given labels"""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets"""
+    type = 'histogram'
+    DEFAULT_BUCKETS = (
+        .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10
+    )
+
+    def __init__(self, name, documentation, labelnames=(),
+                 buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        """Records a value for the given labels"""
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # Bucket counts, then the overflow bucket, count and sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+                counts.append(0.0)
+            counts[index] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def get(self, **labels):
+        """Returns (count, sum) of the given labels"""
+        counts = self._values.get(self._key(labels))
+        if counts is None:
+            return 0, 0.0
+
+        return counts[-2], counts[-1]
+
+    def samples(self):
+        with self._lock:
+            values = [(key, list(counts))
+                      for key, counts in self._values.items()]
+
+        samples = []
+        for key, counts in values:
+            cumulative = 0
+            bounds = [str(bound) for bound in self.buckets] + ['+Inf']
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = self._format_labels(key, [('le', bound)])
+                samples.append(('_bucket', labels, cumulative))
+            labels = self._format_labels(key)
+            samples.append(('_count', labels, counts[-2]))
+            samples.append(('_sum', labels, counts[-1]))
+
+        return samples
+
+
+class Registry:
+    """Collection of the metrics of this process"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, metric_class, name, *args, **kwargs):
+        """Returns the metric with name, creating it on first use"""
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, *args, **kwargs)
+                self._metrics[name] = metric
+
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """Returns the counter with name"""
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        """Returns the gauge with name"""
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), **kwargs):
+        """Returns the histogram with name"""
+        return self._get_or_create(
+            Histogram, name, documentation, labelnames, **kwargs
+        )
+
+    def render(self):
+        """Returns every metric in Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = Registry()
@@ -0,0 +1,238 @@
+import cProfile
+import os
+import random
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+
+from core.compression import CompressedBodyCache, get_codecs, negotiate
+from core.metrics import REGISTRY
+from core.profiling import RequestProfile, _current_profile
+from core.views import healthz, readyz
+
+request_seconds = REGISTRY.histogram(
+    'http_request_duration_seconds',
+    'Time spent handling requests per route and phase',
+    ('route', 'phase')
+)
+request_queries = REGISTRY.histogram(
+    'http_request_db_queries',
+    'Database queries per request',
+    ('route',),
+    buckets=(0, 1, 2, 5, 10, 20, 50, 100, 200)
+)
+compression_bytes = REGISTRY.counter(
+    'http_response_compression_bytes_total',
+    'Response body bytes before and after compression',
+    ('encoding', 'stage')
+)
+compression_cache_hits = REGISTRY.counter(
+    'http_response_compression_cache_hits_total',
+    'Responses whose compressed body was served from the cache',
+    ('encoding',)
+)
+
+
+class HealthCheckMiddleware:
+    """
+    Answers load balancer probes before any other middleware runs, so
+    they skip sessions, host validation, authentication and profiling.
+    """
+    views = {
+        '/healthz': healthz,
+        '/readyz': readyz,
+    }
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        view = self.views.get(request.path_info)
+        if view is not None:
+            return view(request)
+
+        return self.get_response(request)
+
+
+class CompressionMiddleware:
+    """
+    Compresses responses with the best encoding the client accepts among
+    brotli and zstd, when installed, and gzip. Small bodies and content
+    types that are already compressed, such as images, are sent as is.
+    Streaming responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, get_response):
+        options = settings.RESPONSE_COMPRESSION
+        if not options['ENABLED']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.codecs = get_codecs(options['LEVELS'])
+        self.encodings = [encoding for encoding in options['ENCODINGS']
+                          if encoding in self.codecs]
+        self.min_size = options['MIN_SIZE']
+        self.content_types = tuple(options['CONTENT_TYPES'])
+        self.cache = None
+        if options['CACHE_MAX_BYTES']:
+            self.cache = CompressedBodyCache(options['CACHE_MAX_BYTES'])
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self._is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''),
+                             self.encodings)
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = self._compress_stream(
+                encoding, response.streaming_content
+            )
+            del response['Content-Length']
+        else:
+            compressed = self._compress(encoding, response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # The compressed body differs, so the ETag can only be weak
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = encoding
+
+        return response
+
+    def _is_compressible(self, response):
+        """Returns whether the response is worth compressing"""
+        if (response.has_header('Content-Encoding')
+                or not response.get('Content-Type', '').startswith(
+                    self.content_types)):
+            return False
+
+        return response.streaming or len(response.content) >= self.min_size
+
+    def _compress(self, encoding, content):
+        """Returns the compressed body, from the cache when enabled"""
+        if self.cache is not None:
+            key = self.cache.key(encoding, content)
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                compression_cache_hits.inc(encoding=encoding)
+                return compressed
+
+        compressed = self.codecs[encoding].compress(content)
+        compression_bytes.inc(len(content), encoding=encoding, stage='in')
+        compression_bytes.inc(len(compressed), encoding=encoding,
+                              stage='out')
+        if self.cache is not None:
+            self.cache.set(key, compressed)
+
+        return compressed
+
+    def _compress_stream(self, encoding, chunks):
+        """Yields the compressed chunks of a streaming response"""
+        compressor = self.codecs[encoding].compressor()
+        for chunk in chunks:
+            compression_bytes.inc(len(chunk), encoding=encoding, stage='in')
+            data = compressor.compress(chunk)
+            if data:
+                compression_bytes.inc(len(data), encoding=encoding,
+                                      stage='out')
+                yield data
+        data = compressor.flush()
+        compression_bytes.inc(len(data), encoding=encoding, stage='out')
+        yield data
+
+
+class RequestProfilingMiddleware:
+    """
+    Records per-route histograms of the time spent authenticating,
+    querying the database, serializing and rendering, and dumps cProfile
+    stats of sampled requests. Not installed at all unless enabled in
+    REQUEST_PROFILING.
+    """
+
+    def __init__(self, get_response):
+        self.options = settings.REQUEST_PROFILING
+        if not self.options['ENABLED']:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def _should_sample(self, request):
+        """Returns whether to run the profiler for the request"""
+        token = self.options.get('TOKEN')
+        if token and request.META.get('HTTP_X_PROFILE') == token:
+            return True
+
+        return random.random() < self.options.get('SAMPLE_RATE', 0)
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        request.profile = profile
+        context_token = _current_profile.set(profile)
+        profiler = cProfile.Profile() if self._should_sample(request) \
+            else None
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(profile.record_query)
+                    )
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            _current_profile.reset(context_token)
+        phases = profile.breakdown(time.perf_counter() - start)
+
+        match = request.resolver_match
+        route = match.url_name if match and match.url_name else 'unmatched'
+        for phase, seconds in phases.items():
+            request_seconds.observe(seconds, route=route, phase=phase)
+        request_queries.observe(profile.queries, route=route)
+
+        response['Server-Timing'] = ', '.join(
+            f'{phase};dur={seconds * 1000:.2f}'
+            for phase, seconds in phases.items()
+        )
+        if profiler is not None:
+            self._dump(profiler, route)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.profile.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        profile = request.profile
+        profile.view_end = time.perf_counter()
+
+        def rendered(response):
+            profile.render_end = time.perf_counter()
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def _dump(self, profiler, route):
+        """Writes the profiler stats to the dump directory"""
+        directory = self.options['DUMP_DIR']
+        os.makedirs(directory, exist_ok=True)
+        profiler.dump_stats(os.path.join(
+            directory,
+            f'{route}-{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}'
+            f'-{random.randrange(1 << 16):04x}.prof'
+        ))
@@ -0,0 +1,57 @@
+# Generated by Django 2.2.4 on 2026-10-18 21:40
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def seed_changelog(apps, schema_editor):
+    """Records every existing object so a first sync returns all of them"""
+    ChangeLog = apps.get_model('core', 'ChangeLog')
+    for kind, model_name in (('tag', 'Tag'),
+                             ('ingredient', 'Ingredient'),
+                             ('recipe', 'Recipe')):
+        model = apps.get_model('core', model_name)
+        ChangeLog.objects.bulk_create(
+            ChangeLog(user_id=user_id, kind=kind, object_id=object_id)
+            for object_id, user_id in model.objects.values_list(
+                'id', 'user_id'
+            ).iterator()
+        )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChangeLogHorizon',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('checkpoint', models.IntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ChangeLog',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('recipe', 'Recipe'), ('tag', 'Tag'), ('ingredient', 'Ingredient')], max_length=16)),
+                ('object_id', models.IntegerField()),
+                ('deleted', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['user', 'id'], name='core_change_user_id_ee010b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='changelog',
+            index=models.Index(fields=['kind', 'object_id'], name='core_change_kind_8d1e92_idx'),
+        ),
+        migrations.RunPython(seed_changelog, migrations.RunPython.noop),
+    ]
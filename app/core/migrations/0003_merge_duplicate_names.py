@@ -0,0 +1,62 @@
+# Generated by Django 2.2.4 on 2026-10-18 22:08
+
+from django.db import migrations, models
+
+
+def merge_duplicate_names(apps, schema_editor):
+    """
+    Moves recipes from tags and ingredients sharing a name with an older
+    object of the same user to that object, and removes the duplicates
+    """
+    ChangeLog = apps.get_model('core', 'ChangeLog')
+    Recipe = apps.get_model('core', 'Recipe')
+    for kind, model_name, relation in (('tag', 'Tag', 'tags'),
+                                       ('ingredient', 'Ingredient',
+                                        'ingredients')):
+        model = apps.get_model('core', model_name)
+        through = getattr(Recipe, relation).through
+        field = f'{kind}_id'
+        duplicates = model.objects.values('user_id', 'name').annotate(
+            keep=models.Min('id'), count=models.Count('id')
+        ).filter(count__gt=1)
+        for duplicate in duplicates:
+            removed = list(model.objects.filter(
+                user_id=duplicate['user_id'], name=duplicate['name']
+            ).exclude(id=duplicate['keep']).values_list('id', flat=True))
+            recipes = set(through.objects.filter(**{
+                f'{field}__in': removed
+            }).values_list('recipe_id', flat=True))
+            linked = set(through.objects.filter(**{
+                field: duplicate['keep']
+            }).values_list('recipe_id', flat=True))
+            through.objects.bulk_create(
+                through(recipe_id=recipe_id, **{field: duplicate['keep']})
+                for recipe_id in recipes - linked
+            )
+            model.objects.filter(id__in=removed).delete()
+
+            # Historical models send no signals, update the change log
+            changes = [(kind, object_id, True) for object_id in removed] + \
+                [('recipe', recipe_id, False) for recipe_id in recipes]
+            for change_kind, object_id, deleted in changes:
+                ChangeLog.objects.filter(
+                    kind=change_kind, object_id=object_id
+                ).delete()
+                ChangeLog.objects.create(
+                    user_id=duplicate['user_id'],
+                    kind=change_kind,
+                    object_id=object_id,
+                    deleted=deleted
+                )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_changelog'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_names,
+                             migrations.RunPython.noop),
+    ]
@@ -1,10 +1,15 @@
 import os
 import uuid
+from collections import defaultdict
+
 from django.db import models
 from django.contrib.auth.models import PermissionsMixin, \
                                        AbstractBaseUser, \
                                        BaseUserManager
 from django.conf import settings
+from django.db.models.signals import post_save, post_delete, \
+                                     pre_delete, m2m_changed
+from django.dispatch import receiver
 
 from django.utils import timezone
 
@@ -53,6 +58,34 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+class NamedObjectManager(models.Manager):
+
+    def resolve_names(self, user, names):
+        """
+        Returns the user's objects with the given names in order, creating
+        the missing ones in bulk
+        """
+        objects = {obj.name: obj
+                   for obj in self.filter(user=user, name__in=names)}
+        missing = [name for name in names if name not in objects]
+        if missing:
+            # Names created concurrently by another request are skipped
+            # by the unique constraint and fetched below
+            self.bulk_create(
+                [self.model(user=user, name=name) for name in missing],
+                ignore_conflicts=True
+            )
+            created = list(self.filter(user=user, name__in=missing))
+            ChangeLog.objects.record_many(
+                user.pk,
+                CHANGE_LOG_KINDS[self.model],
+                [obj.pk for obj in created]
+            )
+            objects.update((obj.name, obj) for obj in created)
+
+        return [objects[name] for name in names]
+
+
 class Tag(models.Model):
     """Tag to be used for model recipe"""
     name = models.CharField(max_length=255)
@@ -61,6 +94,16 @@ class Tag(models.Model):
         on_delete=models.CASCADE
     )
 
+    objects = NamedObjectManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_tag_name_per_user'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -73,6 +116,16 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE
     )
 
+    objects = NamedObjectManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                name='unique_ingredient_name_per_user'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -90,6 +143,173 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(blank=True, upload_to=get_recipe_image_file_path)
+    # Perceptual hash of the image, see recipe.images
+    image_hash = models.CharField(max_length=16, blank=True, default='')
 
     def __str__(self):
         return self.title
+
+
+class MealPlan(models.Model):
+    """Recipes a user plans to cook, such as the meals of a week"""
+    user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    name = models.CharField(max_length=255)
+    recipes = models.ManyToManyField('Recipe')
+
+    def __str__(self):
+        return self.name
+
+
+class ChangeLogManager(models.Manager):
+
+    def record(self, user_id, kind, object_id, deleted=False):
+        """Records the latest change of an object, replacing older entries"""
+        self.filter(kind=kind, object_id=object_id).delete()
+        return self.create(
+            user_id=user_id,
+            kind=kind,
+            object_id=object_id,
+            deleted=deleted
+        )
+
+    def record_many(self, user_id, kind, object_ids, deleted=False):
+        """Records the latest change of several objects of one kind"""
+        self.filter(kind=kind, object_id__in=object_ids).delete()
+        self.bulk_create([
+            self.model(
+                user_id=user_id,
+                kind=kind,
+                object_id=object_id,
+                deleted=deleted
+            )
+            for object_id in object_ids
+        ])
+
+    def compact(self, before):
+        """Removes tombstones older than given time and returns count"""
+        tombstones = self.filter(deleted=True, created_at__lt=before)
+        horizons = tombstones.values('user').annotate(
+            checkpoint=models.Max('id')
+        )
+        for horizon in horizons:
+            ChangeLogHorizon.objects.update_or_create(
+                user_id=horizon['user'],
+                defaults={'checkpoint': horizon['checkpoint']}
+            )
+        count, _ = tombstones.delete()
+
+        return count
+
+
+class ChangeLog(models.Model):
+    """Latest change of a user's recipe, tag or ingredient, for delta sync"""
+    RECIPE = 'recipe'
+    TAG = 'tag'
+    INGREDIENT = 'ingredient'
+    KIND_CHOICES = (
+        (RECIPE, 'Recipe'),
+        (TAG, 'Tag'),
+        (INGREDIENT, 'Ingredient'),
+    )
+
+    user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES)
+    object_id = models.IntegerField()
+    deleted = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ChangeLogManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id']),
+            models.Index(fields=['kind', 'object_id']),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+class ChangeLogHorizon(models.Model):
+    """Newest change log entry removed from a user's log by compaction"""
+    user = models.OneToOneField(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE
+    )
+    checkpoint = models.IntegerField(default=0)
+
+
+CHANGE_LOG_KINDS = {
+    Recipe: ChangeLog.RECIPE,
+    Tag: ChangeLog.TAG,
+    Ingredient: ChangeLog.INGREDIENT,
+}
+
+
+def _record_change(instance, deleted=False):
+    """Records change of a recipe, tag or ingredient in the change log"""
+    ChangeLog.objects.record(
+        instance.user_id,
+        CHANGE_LOG_KINDS[type(instance)],
+        instance.pk,
+        deleted
+    )
+
+
+def _record_recipe_changes(recipes):
+    """Records change of every recipe in the given queryset"""
+    recipe_ids = defaultdict(list)
+    for user_id, recipe_id in recipes.values_list('user_id', 'id'):
+        recipe_ids[user_id].append(recipe_id)
+    for user_id, ids in recipe_ids.items():
+        ChangeLog.objects.record_many(user_id, ChangeLog.RECIPE, ids)
+
+
+@receiver(post_delete, sender=User)
+def _user_deleted(sender, instance, **kwargs):
+    # Deleting a user cascades to its objects, whose receivers record
+    # entries after the user's own entries were collected for deletion
+    ChangeLog.objects.filter(user_id=instance.pk).delete()
+
+
+def _object_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _record_change(instance)
+
+
+def _object_deleted(sender, instance, **kwargs):
+    _record_change(instance, deleted=True)
+
+
+def _related_object_deleting(sender, instance, **kwargs):
+    # Through rows are removed without m2m_changed, so the recipes
+    # using a deleted tag or ingredient are recorded here instead
+    _record_recipe_changes(instance.recipe_set.all())
+
+
+def _recipe_relations_changed(sender, instance, action, reverse,
+                              pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            _record_change(instance)
+    elif action in ('post_add', 'post_remove'):
+        _record_recipe_changes(Recipe.objects.filter(pk__in=pk_set))
+    elif action == 'pre_clear':
+        _record_recipe_changes(instance.recipe_set.all())
+
+
+for model in CHANGE_LOG_KINDS:
+    post_save.connect(_object_saved, sender=model)
+    post_delete.connect(_object_deleted, sender=model)
+
+for model in (Tag, Ingredient):
+    pre_delete.connect(_related_object_deleting, sender=model)
+
+for through in (Recipe.tags.through, Recipe.ingredients.through):
+    m2m_changed.connect(_recipe_relations_changed, sender=through)
@@ -0,0 +1,30 @@
+from decimal import Decimal, InvalidOperation
+
+import msgpack
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from core.renderers import DECIMAL_EXT_TYPE
+
+
+def decode_ext(code, data):
+    """Unpacks the decimal extension type of core.renderers"""
+    if code == DECIMAL_EXT_TYPE:
+        try:
+            return Decimal(data.decode('ascii'))
+        except (UnicodeDecodeError, InvalidOperation):
+            raise ValueError('Invalid decimal')
+
+    return msgpack.ExtType(code, data)
+
+
+class MessagePackParser(BaseParser):
+    """Parses MessagePack request bodies, decimals included"""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False,
+                                   ext_hook=decode_ext)
+        except Exception as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current_profile = ContextVar('current_profile', default=None)
+
+
+class RequestProfile:
+    """Time spent per phase while handling one request"""
+
+    def __init__(self):
+        self.phases = {}
+        self.queries = 0
+        self.view_start = None
+        self.view_end = None
+        self.render_end = None
+
+    def add(self, phase, seconds):
+        """Adds time spent in a phase"""
+        self.phases[phase] = self.phases.get(phase, 0) + seconds
+
+    def record_query(self, execute, sql, params, many, context):
+        """Database execute wrapper timing every query"""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add('db', time.perf_counter() - start)
+
+    def breakdown(self, total):
+        """Returns seconds spent in every phase of the request"""
+        phases = {'total': total, 'auth': 0, 'db': 0}
+        phases.update(self.phases)
+        if self.view_start is not None and self.view_end is not None:
+            view = self.view_end - self.view_start
+            # Views mostly run serializers besides authenticating and
+            # querying, rendering happens after the view returns
+            phases['serialization'] = max(
+                view - phases['auth'] - phases['db'], 0
+            )
+        if self.view_end is not None and self.render_end is not None:
+            phases['render'] = self.render_end - self.view_end
+
+        return phases
+
+
+def get_current_profile():
+    """Returns the profile of the current request, if profiling"""
+    return _current_profile.get()
+
+
+@contextmanager
+def profile_phase(phase):
+    """Adds the time spent in the block to the current request profile"""
+    profile = _current_profile.get()
+    if profile is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        profile.add(phase, time.perf_counter() - start)
@@ -0,0 +1,37 @@
+from decimal import Decimal
+
+import msgpack
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# MessagePack extension type of decimals, packed as their string form
+DECIMAL_EXT_TYPE = 1
+
+_json_encoder = JSONEncoder()
+
+
+def encode(obj):
+    """Packs decimals exactly and other types the way JSON responses do"""
+    if isinstance(obj, Decimal):
+        return msgpack.ExtType(DECIMAL_EXT_TYPE, str(obj).encode('ascii'))
+
+    return _json_encoder.default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Renders responses as MessagePack, with decimals as an extension type
+    so clients can read prices without rounding
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+    # Lets decimal fields hand over Decimal instead of strings
+    exact_decimals = True
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        return msgpack.packb(data, default=encode, use_bin_type=True)
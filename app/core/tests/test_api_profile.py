@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from app import settings_api
+
+api_only = override_settings(
+    MIDDLEWARE=settings_api.MIDDLEWARE,
+    ROOT_URLCONF=settings_api.ROOT_URLCONF,
+    REST_FRAMEWORK=settings_api.REST_FRAMEWORK,
+)
+
+
+@api_only
+class ApiOnlyProfileTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='api@gmail.com',
+            password='apipass'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient(enforce_csrf_checks=True)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_api_without_sessions(self):
+        """Test that token requests work without session middleware"""
+        res = self.client.post(
+            reverse('recipe:tag-list'), {'name': 'Vegan'}
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn('sessionid', res.cookies)
+        self.assertNotIn('csrftoken', res.cookies)
+
+    def test_admin_not_routed(self):
+        """Test that the admin is not served by API processes"""
+        res = self.client.get('/admin/')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_system_checks(self):
+        """Test that the API-only settings pass the system checks"""
+        result = subprocess.run(
+            [sys.executable, 'manage.py', 'check'],
+            cwd=settings.BASE_DIR,
+            env=dict(os.environ, DJANGO_SETTINGS_MODULE='app.settings_api'),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT
+        )
+
+        self.assertEqual(result.returncode, 0, result.stdout.decode())
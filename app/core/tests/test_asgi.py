@@ -0,0 +1,181 @@
+import asyncio
+import threading
+from io import BytesIO
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.test import SimpleTestCase
+
+from core.asgi import OffloadingASGIHandler
+
+
+def echo_app(environ, start_response):
+    """WSGI app answering with the request body and its thread name"""
+    body = environ['wsgi.input'].read()
+    start_response('201 Created', [('Content-Type', 'text/plain')])
+
+    return [threading.current_thread().name.encode(), b'|', body]
+
+
+def call(handler, scope, messages):
+    """Runs the handler with the messages and returns what it sent"""
+    sent = []
+    messages = list(messages)
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(handler(scope, receive, send))
+
+    return sent
+
+
+def http_scope(method='GET', path='/api/', headers=()):
+    """Returns an ASGI HTTP scope"""
+    return {
+        'type': 'http',
+        'method': method,
+        'path': path,
+        'query_string': b'a=1',
+        'http_version': '1.1',
+        'headers': list(headers),
+        'client': ('127.0.0.1', 5000),
+        'server': ('testserver', 80),
+    }
+
+
+class StreamingResponse:
+    """WSGI result flagged as streaming, like Django's streaming responses"""
+    streaming = True
+
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.read = []
+        self.closed = False
+
+    def __iter__(self):
+        for chunk in self.chunks:
+            self.read.append(chunk)
+            yield chunk
+
+    def close(self):
+        self.closed = True
+
+
+class OffloadingASGIHandlerTests(SimpleTestCase):
+
+    def setUp(self):
+        self.handler = OffloadingASGIHandler(echo_app, 2, 1,
+                                             max_body_size=8)
+
+    def tearDown(self):
+        for pool in self.handler.pools.values():
+            pool.shutdown()
+
+    def test_request_body_is_passed_to_view(self):
+        """Test that a chunked body reaches the view and response is sent"""
+        sent = call(self.handler, http_scope('POST'), [
+            {'type': 'http.request', 'body': b'he', 'more_body': True},
+            {'type': 'http.request', 'body': b'llo'},
+        ])
+
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'content-type', b'text/plain'), sent[0]['headers'])
+        body = b''.join(message.get('body', b'') for message in sent[1:])
+        self.assertTrue(body.startswith(b'asgi_'))
+        self.assertTrue(body.endswith(b'|hello'))
+
+    def test_uploads_run_on_upload_pool(self):
+        """Test that image uploads use their own thread pool"""
+        sent = call(
+            self.handler,
+            http_scope('POST', '/api/reciperecipes/1/upload-image/'),
+            [{'type': 'http.request', 'body': b''}]
+        )
+
+        self.assertTrue(sent[1]['body'].startswith(b'asgi-upload'))
+
+    def test_disconnect_skips_view(self):
+        """Test that a client leaving during upload never runs the view"""
+        sent = call(self.handler, http_scope('POST'), [
+            {'type': 'http.request', 'body': b'he', 'more_body': True},
+            {'type': 'http.disconnect'},
+        ])
+
+        self.assertEqual(sent, [])
+
+    def test_environ_from_scope(self):
+        """Test that scope headers and client map to the WSGI environ"""
+        scope = http_scope(headers=[
+            (b'content-type', b'application/json'),
+            (b'authorization', b'Token abc'),
+        ])
+        environ = self.handler.get_environ(scope, None)
+
+        self.assertEqual(environ['CONTENT_TYPE'], 'application/json')
+        self.assertEqual(environ['HTTP_AUTHORIZATION'], 'Token abc')
+        self.assertEqual(environ['QUERY_STRING'], 'a=1')
+        self.assertEqual(environ['REMOTE_ADDR'], '127.0.0.1')
+
+    def test_chunked_body_gets_content_length(self):
+        """Test that a body sent without Content-Length reaches Django"""
+        scope = http_scope('POST', headers=[
+            (b'content-type', b'application/json'),
+            (b'transfer-encoding', b'chunked'),
+        ])
+        environ = self.handler.get_environ(scope, BytesIO(b'{"a": 1}'))
+
+        self.assertEqual(environ['CONTENT_LENGTH'], '8')
+        self.assertEqual(WSGIRequest(environ).body, b'{"a": 1}')
+
+    def test_declared_large_body_is_rejected(self):
+        """Test that a Content-Length over the limit gets 413 unread"""
+        scope = http_scope('POST', headers=[(b'content-length', b'9')])
+        sent = call(self.handler, scope, [])
+
+        self.assertEqual(sent[0]['status'], 413)
+
+    def test_streamed_large_body_is_rejected(self):
+        """Test that reading stops once a chunked body passes the limit"""
+        sent = call(self.handler, http_scope('POST'), [
+            {'type': 'http.request', 'body': b'12345', 'more_body': True},
+            {'type': 'http.request', 'body': b'6789', 'more_body': True},
+        ])
+
+        self.assertEqual(sent[0]['status'], 413)
+
+    def test_streaming_response_is_sent_per_chunk(self):
+        """Test that streaming responses are read as they are sent"""
+        response = StreamingResponse([b'a', b'', b'b'])
+        reads = []
+
+        def app(environ, start_response):
+            start_response('200 OK', [])
+            return response
+
+        async def send(message):
+            reads.append(len(response.read))
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        handler = OffloadingASGIHandler(app, 1, 1)
+        asyncio.run(handler(http_scope(), receive, send))
+        handler.shutdown()
+
+        self.assertEqual(reads, [0, 1, 3, 3])
+        self.assertTrue(response.closed)
+
+    def test_lifespan(self):
+        """Test that the lifespan protocol is acknowledged"""
+        sent = call(self.handler, {'type': 'lifespan'}, [
+            {'type': 'lifespan.startup'},
+            {'type': 'lifespan.shutdown'},
+        ])
+
+        self.assertEqual([message['type'] for message in sent], [
+            'lifespan.startup.complete',
+            'lifespan.shutdown.complete',
+        ])
@@ -1,23 +1,92 @@
-from django.test import TestCase
+from io import StringIO
+
+from django.test import TestCase, override_settings
 from django.db.utils import OperationalError
 from django.core.management import call_command
+from django.core.management.base import CommandError
 
 from unittest.mock import patch
 
+from core.management.commands import benchmark_api
+from core.models import ChangeLog, Recipe
+
+ENSURE_CONNECTION = \
+    'django.db.backends.base.base.BaseDatabaseWrapper.ensure_connection'
+MIGRATION_PLAN = \
+    'django.db.migrations.executor.MigrationExecutor.migration_plan'
+
 
 class CommandTest(TestCase):
 
     def test_wait_for_db_ready(self):
         """Test waiting for db when db is available"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.return_value = True
-            call_command('wait_for_db')
-            self.assertEquals(gi.call_count, 1)
+        with patch(ENSURE_CONNECTION) as ec:
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEquals(ec.call_count, 1)
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, *args):
         """Test waiting for db when db is not available"""
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 5 + [True]
-            call_command('wait_for_db')
-            self.assertEquals(gi.call_count, 6)
+        with patch(ENSURE_CONNECTION) as ec:
+            ec.side_effect = [OperationalError] * 5 + [None]
+            call_command('wait_for_db', stdout=StringIO())
+            self.assertEquals(ec.call_count, 6)
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_backoff(self, sleep):
+        """Test that retries start sub-second and back off exponentially"""
+        with patch(ENSURE_CONNECTION) as ec:
+            ec.side_effect = [OperationalError] * 6 + [None]
+            call_command('wait_for_db', initial_delay=0.1, max_delay=1,
+                         stdout=StringIO())
+
+        delays = [call[0][0] for call in sleep.call_args_list]
+        self.assertLessEqual(delays[0], 0.1)
+        for delay, limit in zip(delays, [0.1, 0.2, 0.4, 0.8, 1, 1]):
+            self.assertGreaterEqual(delay, limit / 2)
+            self.assertLessEqual(delay, limit)
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_timeout(self, sleep):
+        """Test that waiting for db gives up after the timeout"""
+        with patch(ENSURE_CONNECTION, side_effect=OperationalError):
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+
+        sleep.assert_not_called()
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_check_migrations(self, sleep):
+        """Test waiting until migrations are applied"""
+        with patch(MIGRATION_PLAN) as plan:
+            plan.side_effect = [['0002_pending'], []]
+            call_command('wait_for_db', check_migrations=True,
+                         stdout=StringIO())
+
+        self.assertEqual(plan.call_count, 2)
+        self.assertEqual(sleep.call_count, 1)
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=2000)
+    def test_benchmark_hashers_recommends_iterations(self):
+        """Test that benchmarking hashers recommends an iteration count"""
+        out = StringIO()
+        call_command('benchmark_hashers', samples=1, target_ms=1, stdout=out)
+
+        self.assertIn('pbkdf2_sha256 (2000 iterations)', out.getvalue())
+        self.assertIn('PASSWORD_HASH_ITERATIONS = ', out.getvalue())
+
+    def test_benchmark_api_seeds_dataset(self):
+        """Test that the benchmark seeds recipes with their change log"""
+        options = {'recipes': 10, 'tags': 4, 'ingredients': 12}
+        command = benchmark_api.Command()
+        email, token, recipe_ids, tag_ids = command.seed(0, options)
+        command.seed(0, options)
+
+        self.assertEqual(Recipe.objects.filter(user__email=email).count(), 10)
+        self.assertEqual(len(tag_ids), 4)
+        self.assertEqual(
+            ChangeLog.objects.filter(user__email=email).count(), 26
+        )
+        recipe = Recipe.objects.get(pk=recipe_ids[0])
+        self.assertEqual(recipe.tags.count(), 3)
+        self.assertEqual(recipe.ingredients.count(), 8)
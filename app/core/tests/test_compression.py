@@ -0,0 +1,145 @@
+import gzip
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.compression import CompressedBodyCache, negotiate
+from core.middleware import CompressionMiddleware
+from core.models import Recipe
+
+BODY = json.dumps([{'id': i, 'title': f'Recipe {i}', 'price': '5.00'}
+                   for i in range(100)]).encode()
+
+
+def compression_settings(**options):
+    """Returns settings overriding some compression options"""
+    return override_settings(
+        RESPONSE_COMPRESSION=dict(settings.RESPONSE_COMPRESSION, **options)
+    )
+
+
+class NegotiationTests(TestCase):
+
+    def test_negotiate(self):
+        """Test choosing the accepted encoding with the best q-value"""
+        encodings = ['br', 'gzip']
+
+        self.assertEqual(negotiate('gzip, deflate, br', encodings), 'br')
+        self.assertEqual(negotiate('br;q=0.5, gzip', encodings), 'gzip')
+        self.assertEqual(negotiate('*', encodings), 'br')
+        self.assertEqual(negotiate('*, br;q=0', encodings), 'gzip')
+        self.assertIsNone(negotiate('identity', encodings))
+        self.assertIsNone(negotiate('gzip;q=0', ['gzip']))
+        self.assertIsNone(negotiate('', encodings))
+
+    def test_body_cache_evicts_least_recently_used(self):
+        """Test that the body cache stays within its size"""
+        cache = CompressedBodyCache(max_bytes=10)
+        cache.set('a', b'aaaa')
+        cache.set('b', b'bbbb')
+        cache.get('a')
+        cache.set('c', b'cccc')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'aaaa')
+        self.assertEqual(cache.size, 8)
+
+
+class CompressionMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def get(self, response, accept_encoding='gzip'):
+        """Returns the response passed through the middleware"""
+        middleware = CompressionMiddleware(lambda request: response)
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+
+        return middleware(request)
+
+    def test_compresses_json(self):
+        """Test that large JSON responses are compressed"""
+        response = HttpResponse(BODY, content_type='application/json')
+        response['ETag'] = '"abc"'
+
+        response = self.get(response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(int(response['Content-Length']),
+                         len(response.content))
+        self.assertEqual(gzip.decompress(response.content), BODY)
+
+    def test_skips_small_images_and_unaccepted(self):
+        """Test that some responses are sent uncompressed"""
+        small = self.get(HttpResponse(b'{}', content_type='application/json'))
+        image = self.get(HttpResponse(BODY, content_type='image/png'))
+        identity = self.get(
+            HttpResponse(BODY, content_type='application/json'),
+            accept_encoding='identity'
+        )
+
+        for response in (small, image, identity):
+            self.assertFalse(response.has_header('Content-Encoding'))
+        self.assertEqual(identity.content, BODY)
+        self.assertEqual(identity['Vary'], 'Accept-Encoding')
+
+    def test_compresses_stream(self):
+        """Test that streaming responses are compressed per chunk"""
+        chunks = [BODY[i:i + 100] for i in range(0, len(BODY), 100)]
+        response = self.get(StreamingHttpResponse(
+            iter(chunks), content_type='text/csv'
+        ))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)), BODY
+        )
+
+    @compression_settings(CACHE_MAX_BYTES=1 << 20)
+    def test_caches_compressed_bodies(self):
+        """Test that equal bodies are compressed once"""
+        middleware = CompressionMiddleware(
+            lambda request: HttpResponse(BODY,
+                                         content_type='application/json')
+        )
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+
+        first = middleware(request)
+        second = middleware(request)
+
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(len(middleware.cache._bodies), 1)
+
+    @compression_settings(ENABLED=False)
+    def test_disabled(self):
+        """Test that the middleware is not used when disabled"""
+        with self.assertRaises(MiddlewareNotUsed):
+            CompressionMiddleware(lambda request: None)
+
+    def test_recipe_list_compressed(self):
+        """Test that recipe lists are compressed end to end"""
+        user = get_user_model().objects.create_user(
+            'test@gmail.com', 'testpass123'
+        )
+        Recipe.objects.bulk_create([
+            Recipe(user=user, title=f'Recipe {i}', time_minutes=5,
+                   price=5.00)
+            for i in range(50)
+        ])
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.get(reverse('recipe:recipe-list'),
+                         HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(len(json.loads(gzip.decompress(res.content))), 50)
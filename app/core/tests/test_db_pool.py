@@ -0,0 +1,153 @@
+import threading
+from unittest.mock import MagicMock, Mock, patch
+
+from django.db.backends.postgresql import base
+from django.test import SimpleTestCase
+
+from core.db.backends.postgresql.base import DatabaseWrapper, _pools
+from core.db.pool import ConnectionPool, PoolTimeout, pool_connections
+
+
+class ConnectionPoolTests(SimpleTestCase):
+
+    def test_released_connection_is_reused(self):
+        """Test that a released connection is handed out again"""
+        pool = ConnectionPool('test', max_size=2)
+        connect = Mock(side_effect=lambda: object())
+        connection = pool.acquire(connect)
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(connect), connection)
+        self.assertEqual(connect.call_count, 1)
+
+    def test_full_pool_times_out(self):
+        """Test that acquiring from an exhausted pool times out"""
+        pool = ConnectionPool('test', max_size=1, timeout=0.01)
+        pool.acquire(object)
+
+        with self.assertRaises(PoolTimeout):
+            pool.acquire(object)
+
+    def test_waiter_gets_released_connection(self):
+        """Test that a waiting thread gets a connection once released"""
+        pool = ConnectionPool('test', max_size=1, timeout=5)
+        connection = pool.acquire(object)
+        acquired = []
+        waiter = threading.Thread(
+            target=lambda: acquired.append(pool.acquire(object))
+        )
+        waiter.start()
+        pool.release(connection)
+        waiter.join()
+
+        self.assertEqual(acquired, [connection])
+
+    def test_discarded_connection_frees_slot(self):
+        """Test that discarding a connection allows opening a new one"""
+        pool = ConnectionPool('test', max_size=1, timeout=0.01)
+        pool.release(pool.acquire(object), discard=True)
+
+        self.assertIsNotNone(pool.acquire(object))
+
+    def test_failed_connect_frees_slot(self):
+        """Test that a failing connect does not leak a pool slot"""
+        pool = ConnectionPool('test', max_size=1, timeout=0.01)
+
+        with self.assertRaises(ValueError):
+            pool.acquire(Mock(side_effect=ValueError))
+        self.assertIsNotNone(pool.acquire(object))
+
+    def test_failed_check_replaces_idle_connection(self):
+        """Test that an idle connection failing the check is replaced"""
+        pool = ConnectionPool('test', max_size=1, timeout=0.01)
+        stale = Mock()
+        pool.release(pool.acquire(lambda: stale))
+        fresh = Mock()
+
+        connection = pool.acquire(lambda: fresh, lambda c: c is not stale)
+
+        self.assertIs(connection, fresh)
+        stale.close.assert_called_once_with()
+
+    def test_check_skips_new_connections(self):
+        """Test that newly opened connections are not checked"""
+        pool = ConnectionPool('test', max_size=1)
+        check = Mock(return_value=False)
+
+        self.assertIsNotNone(pool.acquire(object, check))
+        check.assert_not_called()
+
+    def test_metrics_count_connections(self):
+        """Test that pool gauges track idle and used connections"""
+        pool = ConnectionPool('metrics', max_size=3)
+        first = pool.acquire(object)
+        pool.acquire(object)
+        pool.release(first)
+
+        self.assertEqual(
+            pool_connections.get(alias='metrics', state='idle'),
+            1
+        )
+        self.assertEqual(
+            pool_connections.get(alias='metrics', state='in_use'),
+            1
+        )
+
+
+class PooledDatabaseWrapperTests(SimpleTestCase):
+
+    def setUp(self):
+        self.opened = []
+        patcher = patch.object(base.DatabaseWrapper, 'get_new_connection',
+                               side_effect=self.open_connection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(_pools.pop, 'pooled', None)
+
+    def open_connection(self, conn_params):
+        connection = MagicMock(closed=0)
+        self.opened.append(connection)
+
+        return connection
+
+    def get_wrapper(self, health_checks=True):
+        return DatabaseWrapper({
+            'NAME': 'test',
+            'OPTIONS': {},
+            'CONN_HEALTH_CHECKS': health_checks,
+            'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.01},
+        }, 'pooled')
+
+    def test_dead_idle_connection_is_replaced(self):
+        """Test that a pooled connection closed by the server is replaced"""
+        wrapper = self.get_wrapper()
+        wrapper.get_pool().release(wrapper.get_new_connection({}))
+        stale = self.opened[0]
+        stale.cursor.side_effect = base.Database.OperationalError
+
+        connection = wrapper.get_new_connection({})
+
+        self.assertIsNot(connection, stale)
+        self.assertEqual(len(self.opened), 2)
+        stale.close.assert_called_once_with()
+
+    def test_live_idle_connection_is_reused(self):
+        """Test that a working pooled connection is checked and reused"""
+        wrapper = self.get_wrapper()
+        wrapper.get_pool().release(wrapper.get_new_connection({}))
+
+        connection = wrapper.get_new_connection({})
+
+        self.assertIs(connection, self.opened[0])
+        connection.cursor.assert_called_once_with()
+        connection.rollback.assert_called_once_with()
+
+    def test_idle_connection_unchecked_without_health_checks(self):
+        """Test that health checks can be turned off for pooled reuse"""
+        wrapper = self.get_wrapper(health_checks=False)
+        wrapper.get_pool().release(wrapper.get_new_connection({}))
+
+        connection = wrapper.get_new_connection({})
+
+        self.assertIs(connection, self.opened[0])
+        connection.cursor.assert_not_called()
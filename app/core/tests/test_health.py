@@ -0,0 +1,62 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from rest_framework import status
+
+from core.health import ReadinessCheck
+
+
+class HealthCheckTests(TestCase):
+
+    def setUp(self):
+        self.readiness = ReadinessCheck(3600, ['default'])
+        patcher = patch('core.views.readiness', self.readiness)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(ALLOWED_HOSTS=['api.example.com'])
+    def test_healthz(self):
+        """Test that liveness needs no database, credentials or host"""
+        with self.assertNumQueries(0):
+            res = self.client.get('/healthz', HTTP_HOST='10.0.0.1')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Server-Timing', res)
+
+    def test_readyz_cached(self):
+        """Test that readiness checks the database once, then is cached"""
+        with patch.object(self.readiness, 'check_database',
+                          wraps=self.readiness.check_database) as check:
+            res = self.client.get('/readyz')
+            with self.assertNumQueries(0):
+                self.client.get('/readyz')
+
+        check.assert_called_once_with('default')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.json()['checks'], {
+            'database:default': 'ok',
+            'storage': 'ok',
+        })
+
+    def test_readyz_database_unavailable(self):
+        """Test that readiness fails when the database check fails"""
+        with patch.object(self.readiness, 'check_database',
+                          return_value='Connection refused'):
+            res = self.client.get('/readyz')
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(res.json()['ready'])
+
+    def test_readyz_stale_result(self):
+        """Test that readiness fails when the checks stopped refreshing"""
+        self.client.get('/readyz')
+        self.readiness.status['checked_at'] -= 4 * 3600
+
+        res = self.client.get('/readyz')
+
+        self.assertEqual(res.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertFalse(res.json()['ready'])
+        self.assertIn('fresh', res.json()['checks'])
+        self.assertTrue(self.readiness.status['ready'])
@@ -0,0 +1,120 @@
+import json
+import os
+import tarfile
+import tempfile
+import zipfile
+from io import BytesIO, StringIO
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from core.models import Recipe
+
+
+def jpeg_bytes(color=(200, 80, 40)):
+    """Returns a small encoded JPEG"""
+    output = BytesIO()
+    Image.new('RGB', (32, 32), color).save(output, format='JPEG')
+
+    return output.getvalue()
+
+
+class ImportRecipeImagesTests(TestCase):
+    """Test importing recipe images from archives"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'testpass123'
+        )
+        self.other = get_user_model().objects.create_user(
+            'other@gmail.com', 'testpass123'
+        )
+        self.recipes = [
+            Recipe.objects.create(user=user, title=title, time_minutes=5,
+                                  price=5.00)
+            for user, title in ((self.user, 'First'), (self.user, 'Second'),
+                                (self.other, 'Other'))
+        ]
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        for recipe in self.recipes:
+            recipe.refresh_from_db()
+            recipe.image.delete()
+        self.directory.cleanup()
+
+    def entries(self):
+        """Returns archive entries covering success and failure cases"""
+        first, second, other = self.recipes
+
+        return [
+            (f'photos/{first.id}.jpg', jpeg_bytes()),
+            (f'{second.id}.png', b'not an image'),
+            (f'{other.id}.jpg', jpeg_bytes()),
+            ('0.jpg', jpeg_bytes()),
+            ('notes.txt', b'hello'),
+        ]
+
+    def run_command(self, path, **options):
+        """Runs the command and returns its report by file name"""
+        report_path = os.path.join(self.directory.name, 'report.json')
+        call_command('import_recipe_images', path, report=report_path,
+                     workers=2, stdout=StringIO(), **options)
+        with open(report_path) as report_file:
+            return {entry['file']: entry for entry in json.load(report_file)}
+
+    def assert_report(self, report):
+        """Checks the report and recipes of an import of entries()"""
+        first, second, other = self.recipes
+        for recipe in self.recipes:
+            recipe.refresh_from_db()
+
+        self.assertEqual(len(report), 5)
+        entry = report[f'photos/{first.id}.jpg']
+        self.assertIsNone(entry['error'])
+        self.assertEqual(entry['image'], first.image.name)
+        self.assertTrue(os.path.exists(first.image.path))
+        self.assertEqual(len(first.image_hash), 16)
+        self.assertTrue(
+            report[f'{second.id}.png']['error'].startswith('Invalid image')
+        )
+        self.assertFalse(second.image)
+        self.assertEqual(report[f'{other.id}.jpg']['error'],
+                         'Recipe not found')
+        self.assertFalse(other.image)
+        self.assertEqual(report['0.jpg']['error'], 'Recipe not found')
+        self.assertEqual(report['notes.txt']['error'],
+                         'Not an image file name')
+
+    def test_import_zip(self):
+        """Test importing images from a zip archive"""
+        path = os.path.join(self.directory.name, 'images.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name, data in self.entries():
+                archive.writestr(name, data)
+
+        self.assert_report(self.run_command(path, user=self.user.email))
+
+    def test_import_tar(self):
+        """Test importing images from a compressed tar archive"""
+        path = os.path.join(self.directory.name, 'images.tar.gz')
+        with tarfile.open(path, 'w:gz') as archive:
+            for name, data in self.entries():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, BytesIO(data))
+
+        self.assert_report(self.run_command(path, user=self.user.email))
+
+    def test_import_rejects_other_files(self):
+        """Test that files other than archives are rejected"""
+        path = os.path.join(self.directory.name, 'images.txt')
+        with open(path, 'w') as text_file:
+            text_file.write('hello')
+
+        with self.assertRaises(CommandError):
+            call_command('import_recipe_images', path, stdout=StringIO())
@@ -0,0 +1,38 @@
+from django.test import SimpleTestCase
+
+from core.metrics import Registry
+
+
+class MetricsTests(SimpleTestCase):
+
+    def test_counter_render(self):
+        """Test that counters are rendered per label"""
+        registry = Registry()
+        counter = registry.counter('tests_total', 'Tests', ('result',))
+        counter.inc(result='ok')
+        counter.inc(2, result='ok')
+
+        self.assertIn('tests_total{result="ok"} 3', registry.render())
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that histogram buckets count values up to their bound"""
+        registry = Registry()
+        histogram = registry.histogram('latency', 'Latency', buckets=(1, 2))
+        for value in (0.5, 1.5, 5):
+            histogram.observe(value)
+        output = registry.render()
+
+        self.assertIn('latency_bucket{le="1"} 1', output)
+        self.assertIn('latency_bucket{le="2"} 2', output)
+        self.assertIn('latency_bucket{le="+Inf"} 3', output)
+        self.assertIn('latency_count 3', output)
+        self.assertIn('latency_sum 7.0', output)
+
+    def test_same_name_returns_same_metric(self):
+        """Test that a metric is created once per registry"""
+        registry = Registry()
+
+        self.assertIs(
+            registry.counter('hits', 'Hits'),
+            registry.counter('hits', 'Hits')
+        )
@@ -1,5 +1,9 @@
+from datetime import timedelta
 from unittest.mock import patch
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 from core import models
@@ -91,3 +95,95 @@ class ModelTests(TestCase):
         ext_path = f'uploads/recipe/{test_uuid}.jpg'
 
         self.assertEquals(file_path, ext_path)
+
+    def test_changelog_records_latest_change_only(self):
+        """Test that saving an object twice keeps a single log entry"""
+        tag = models.Tag.objects.create(user=sample_user(), name='Vegan')
+        first = models.ChangeLog.objects.get(kind='tag', object_id=tag.id)
+        tag.name = 'Vegetarian'
+        tag.save()
+
+        entries = models.ChangeLog.objects.filter(
+            kind='tag',
+            object_id=tag.id
+        )
+        self.assertEqual(entries.count(), 1)
+        self.assertGreater(entries[0].id, first.id)
+
+    def test_changelog_tombstone_on_delete(self):
+        """Test that deleting an object leaves a tombstone"""
+        ingredient = models.Ingredient.objects.create(
+            user=sample_user(),
+            name='Salt'
+        )
+        ingredient_id = ingredient.id
+        ingredient.delete()
+
+        entry = models.ChangeLog.objects.get(
+            kind='ingredient',
+            object_id=ingredient_id
+        )
+        self.assertTrue(entry.deleted)
+
+    def test_deleting_tag_records_recipes_in_bulk(self):
+        """Test that deleting a tag costs the same for more recipes"""
+        user = sample_user()
+        query_counts = []
+        for count in (1, 5):
+            tag = models.Tag.objects.create(user=user, name=f'Tag {count}')
+            recipes = [
+                models.Recipe.objects.create(
+                    user=user,
+                    title=f'Recipe {index}',
+                    time_minutes=5,
+                    price=5.00
+                )
+                for index in range(count)
+            ]
+            tag.recipe_set.add(*recipes)
+            logged = models.ChangeLog.objects.get(
+                kind='recipe',
+                object_id=recipes[0].id
+            )
+
+            with CaptureQueriesContext(connection) as queries:
+                tag.delete()
+            query_counts.append(len(queries))
+
+            entry = models.ChangeLog.objects.get(
+                kind='recipe',
+                object_id=recipes[0].id
+            )
+            self.assertGreater(entry.id, logged.id)
+
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_changelog_compact_removes_old_tombstones(self):
+        """Test that compaction removes tombstones and sets the horizon"""
+        user = sample_user()
+        tag = models.Tag.objects.create(user=user, name='Old')
+        models.Tag.objects.create(user=user, name='Kept')
+        tag.delete()
+        tombstone = models.ChangeLog.objects.get(deleted=True)
+
+        count = models.ChangeLog.objects.compact(
+            timezone.now() + timedelta(seconds=1)
+        )
+
+        self.assertEqual(count, 1)
+        self.assertEqual(models.ChangeLog.objects.filter(user=user).count(), 1)
+        self.assertEqual(user.changeloghorizon.checkpoint, tombstone.id)
+
+    def test_deleting_user_clears_changelog(self):
+        """Test that deleting a user removes all of its log entries"""
+        user = sample_user()
+        recipe = models.Recipe.objects.create(
+            user=user,
+            title='Soup',
+            time_minutes=5,
+            price=5.00
+        )
+        recipe.tags.add(models.Tag.objects.create(user=user, name='Hot'))
+        user.delete()
+
+        self.assertFalse(models.ChangeLog.objects.exists())
@@ -0,0 +1,117 @@
+from datetime import datetime
+from decimal import Decimal
+from io import BytesIO
+
+import msgpack
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIClient
+
+from core.models import Recipe
+from core.parsers import MessagePackParser, decode_ext
+from core.renderers import MessagePackRenderer
+
+MSGPACK = 'application/msgpack'
+
+
+def unpack(content):
+    """Returns unpacked MessagePack content with decimals"""
+    return msgpack.unpackb(content, raw=False, ext_hook=decode_ext)
+
+
+class MessagePackTests(TestCase):
+
+    def test_round_trip(self):
+        """Test that rendered data parses back with exact decimals"""
+        data = {
+            'price': Decimal('12.30'),
+            'prices': [Decimal('0.1'), Decimal('-1E+2')],
+            'title': 'Soup',
+        }
+
+        content = MessagePackRenderer().render(data)
+        parsed = MessagePackParser().parse(BytesIO(content))
+
+        self.assertEqual(parsed, data)
+        self.assertEqual(str(parsed['price']), '12.30')
+
+    def test_render_json_types(self):
+        """Test that other types are rendered like JSON responses"""
+        content = MessagePackRenderer().render({
+            'time': datetime(2019, 9, 1, 12, 30),
+        })
+
+        self.assertEqual(unpack(content), {'time': '2019-09-01T12:30:00'})
+        self.assertEqual(MessagePackRenderer().render(None), b'')
+
+    def test_parse_invalid(self):
+        """Test that invalid bodies are rejected as parse errors"""
+        bad_decimal = msgpack.packb(msgpack.ExtType(1, b'twelve'))
+
+        for content in (b'\xc1', bad_decimal):
+            with self.assertRaises(ParseError):
+                MessagePackParser().parse(BytesIO(content))
+
+
+class MessagePackApiTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@gmail.com', 'testpass123'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_recipe_list(self):
+        """Test listing recipes as MessagePack with decimal prices"""
+        Recipe.objects.create(user=self.user, title='Soup', time_minutes=5,
+                              price=Decimal('5.25'))
+
+        res = self.client.get(reverse('recipe:recipe-list'),
+                              HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(res['Content-Type'], MSGPACK)
+        recipes = unpack(res.content)
+        self.assertEqual(recipes[0]['title'], 'Soup')
+        self.assertEqual(recipes[0]['price'], Decimal('5.25'))
+        json_res = self.client.get(reverse('recipe:recipe-list'))
+        self.assertEqual(json_res.data[0]['price'], '5.25')
+
+    def test_create_recipe(self):
+        """Test creating a recipe from a MessagePack body"""
+        body = MessagePackRenderer().render({
+            'title': 'Stew',
+            'time_minutes': 30,
+            'price': Decimal('7.10'),
+            'tags': ['Dinner'],
+            'ingredients': [],
+        })
+
+        res = self.client.post(reverse('recipe:recipe-list'), body,
+                               content_type=MSGPACK, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=unpack(res.content)['id'])
+        self.assertEqual(recipe.price, Decimal('7.10'))
+        self.assertEqual(recipe.tags.get().name, 'Dinner')
+
+    def test_user_views(self):
+        """Test that user endpoints negotiate MessagePack"""
+        res = self.client.get(reverse('user:me'), HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(unpack(res.content)['email'], 'test@gmail.com')
+
+        body = MessagePackRenderer().render({
+            'email': 'test@gmail.com',
+            'password': 'testpass123',
+        })
+        res = APIClient().post(reverse('user:token'), body,
+                               content_type=MSGPACK, HTTP_ACCEPT=MSGPACK)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('token', unpack(res.content))
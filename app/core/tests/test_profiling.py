@@ -0,0 +1,92 @@
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.middleware import request_seconds, request_queries
+
+RECIPES_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('metrics')
+
+
+def profiling(**options):
+    """Returns settings enabling request profiling with options"""
+    defaults = {
+        'ENABLED': True,
+        'SAMPLE_RATE': 0,
+        'TOKEN': None,
+        'DUMP_DIR': tempfile.gettempdir(),
+    }
+    defaults.update(options)
+
+    return override_settings(REQUEST_PROFILING=defaults)
+
+
+class RequestProfilingTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='profile@gmail.com',
+            password='profilepass'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    @profiling()
+    def test_phases_are_recorded_per_route(self):
+        """Test that request phases are timed for the route"""
+        count, _ = request_seconds.get(route='recipe-list', phase='auth')
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        timing = res['Server-Timing']
+        for phase in ('total', 'auth', 'db', 'serialization', 'render'):
+            self.assertIn(f'{phase};dur=', timing)
+        self.assertEqual(
+            request_seconds.get(route='recipe-list', phase='auth')[0],
+            count + 1
+        )
+        self.assertGreater(request_queries.get(route='recipe-list')[1], 0)
+
+    def test_disabled_by_default(self):
+        """Test that the middleware is not installed unless enabled"""
+        res = self.client.get(RECIPES_URL)
+
+        self.assertNotIn('Server-Timing', res)
+
+    def test_profile_dump_on_demand(self):
+        """Test that a request with the profiling token is profiled"""
+        with tempfile.TemporaryDirectory() as directory:
+            with profiling(TOKEN='secret', DUMP_DIR=directory):
+                self.client.get(RECIPES_URL)
+                self.client.get(RECIPES_URL, HTTP_X_PROFILE='secret')
+
+            dumps = os.listdir(directory)
+
+        self.assertEqual(len(dumps), 1)
+        self.assertTrue(dumps[0].startswith('recipe-list-'))
+
+
+class MetricsViewTests(TestCase):
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_metrics_exposed(self):
+        """Test that metrics are served in Prometheus text format"""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(b'# TYPE', res.content)
+
+    def test_metrics_disabled(self):
+        """Test that metrics are not served unless enabled"""
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,183 @@
+import os
+import shutil
+import tempfile
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, router, transaction
+from django.test import SimpleTestCase, TransactionTestCase, \
+    override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.db.routers import check_pin_cache
+from core.models import Recipe
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+PIN_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'replica-pin': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'replica-pin',
+    },
+}
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def test_writes_use_primary(self):
+        """Test that writes always go to the primary"""
+        self.assertEqual(router.db_for_write(Recipe), 'default')
+
+    def test_reads_default_to_primary(self):
+        """Test that reads outside replica views use the primary"""
+        self.assertEqual(router.db_for_read(Recipe), 'default')
+
+    def test_migrations_skip_replica(self):
+        """Test that migrations are not applied to replicas"""
+        self.assertFalse(router.allow_migrate('replica', 'core'))
+        self.assertTrue(router.allow_migrate('default', 'core'))
+
+    def test_pin_cache_must_be_shared(self):
+        """Test that pins need a cache shared between processes"""
+        shared = {'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+                  'LOCATION': 'replica_pin_cache'}
+        local = {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}
+        with override_settings(CACHES={'default': local,
+                                       'replica-pin': shared}):
+            check_pin_cache()
+
+        for pin_caches in ({'default': local},
+                           {'default': local, 'replica-pin': local}):
+            with override_settings(CACHES=pin_caches):
+                with self.assertRaises(ImproperlyConfigured):
+                    check_pin_cache()
+
+
+@override_settings(
+    DATABASE_REPLICAS=['replica'],
+    REPLICA_STICKY_SECONDS=5,
+    CACHES=PIN_CACHES
+)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Runs requests against a replica in its own SQLite file, which only
+    holds the primary's rows as of the last replicate() call
+    """
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.replica_dir = tempfile.mkdtemp()
+        connections.databases['replica'] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(cls.replica_dir, 'replica.sqlite3'),
+        }
+        connections.ensure_defaults('replica')
+        connections.prepare_test_settings('replica')
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        connections['replica'].close()
+        del connections['replica']
+        del connections.databases['replica']
+        shutil.rmtree(cls.replica_dir)
+
+    def setUp(self):
+        caches['replica-pin'].clear()
+        self.user = get_user_model().objects.create_user(
+            email='replica@gmail.com',
+            password='replicapass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def replicate(self):
+        """Rebuilds the replica as a copy of the primary's current rows"""
+        replica = connections['replica']
+        replica.close()
+        if os.path.exists(replica.settings_dict['NAME']):
+            os.remove(replica.settings_dict['NAME'])
+
+        models = [model for model in apps.get_models()
+                  if model._meta.managed and not model._meta.proxy]
+        with replica.schema_editor() as editor:
+            for model in models:
+                editor.create_model(model)
+        with transaction.atomic(using='replica'):
+            for model in apps.get_models(include_auto_created=True):
+                if model._meta.managed and not model._meta.proxy:
+                    model._base_manager.using('replica').bulk_create(
+                        model._base_manager.using('default').all()
+                    )
+
+    def create_recipe(self, title):
+        return Recipe.objects.create(
+            user=self.user,
+            title=title,
+            time_minutes=5,
+            price=5.00
+        )
+
+    def get_titles(self):
+        res = self.client.get(RECIPES_URL)
+        self.assertEqual(res.status_code, 200)
+
+        return sorted(recipe['title'] for recipe in res.json())
+
+    def test_reads_use_replica(self):
+        """Test that safe requests read the replica's rows"""
+        self.create_recipe('Replicated')
+        self.replicate()
+        self.create_recipe('Not replicated')
+
+        self.assertEqual(self.get_titles(), ['Replicated'])
+
+    def test_writes_use_primary(self):
+        """Test that API writes land on the primary only"""
+        self.replicate()
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Written',
+            'time_minutes': 5,
+            'price': 5.00
+        })
+
+        self.assertEqual(res.status_code, 201)
+        self.assertTrue(
+            Recipe.objects.using('default').filter(title='Written').exists()
+        )
+        self.assertFalse(
+            Recipe.objects.using('replica').filter(title='Written').exists()
+        )
+
+    def test_reads_after_write_use_primary(self):
+        """Test that a user reads their own writes right after writing"""
+        self.replicate()
+        self.client.post(RECIPES_URL, {
+            'title': 'Written',
+            'time_minutes': 5,
+            'price': 5.00
+        })
+
+        self.assertEqual(self.get_titles(), ['Written'])
+
+    def test_pin_expiry_returns_reads_to_replica(self):
+        """Test that reads go back to the replica once the pin expires"""
+        self.replicate()
+        self.client.post(RECIPES_URL, {
+            'title': 'Written',
+            'time_minutes': 5,
+            'price': 5.00
+        })
+        caches['replica-pin'].clear()
+
+        self.assertEqual(self.get_titles(), [])
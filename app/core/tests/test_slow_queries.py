@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models.query import QuerySet
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.db import instrumentation
+from core.db.instrumentation import SlowQueryLogger, normalize_sql
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class SlowQueryLogTests(TestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user(
+            email='slow@gmail.com',
+            password='slowpass'
+        )
+        token = Token.objects.create(user=user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        handle, self.path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+        self.logger = SlowQueryLogger(0, self.path)
+        for patcher in (
+            patch('core.db.instrumentation.logger'),
+            patch.object(QuerySet, '_chain',
+                         instrumentation._chain_recording_origin),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def read_log(self):
+        with open(self.path) as log_file:
+            return [json.loads(line) for line in log_file]
+
+    def test_normalize_sql(self):
+        """Test that literals and parameter lists are normalized"""
+        sql = normalize_sql(
+            "SELECT  a FROM t WHERE b IN (%s, %s, %s) AND c = 'x' LIMIT 21"
+        )
+
+        self.assertEqual(sql, 'SELECT a FROM t WHERE b IN (...) AND c = ? '
+                              'LIMIT ?')
+
+    def test_slow_queries_logged_with_view(self):
+        """Test that slow queries are logged with their view and plan"""
+        with connection.execute_wrapper(self.logger):
+            self.client.get(RECIPES_URL)
+            self.client.get(RECIPES_URL)
+
+        entries = [entry for entry in self.read_log()
+                   if 'core_recipe' in entry['sql']]
+        self.assertEqual(len(entries), 2)
+        self.assertEqual(entries[0]['view'], 'RecipeViewSet.list')
+        self.assertRegex(entries[0]['origin'],
+                         r'^recipe\.views\.RecipeViewSet\.get_queryset:\d+$')
+        self.assertEqual(entries[0]['fingerprint'], entries[1]['fingerprint'])
+        self.assertTrue(entries[0]['plan'])
+        self.assertIsNone(entries[1]['plan'])
+
+    def test_queries_outside_querysets_use_app_frame(self):
+        """Test that other queries are traced to the app code running them"""
+        with connection.execute_wrapper(self.logger):
+            self.client.post(RECIPES_URL, {
+                'title': 'Traced',
+                'time_minutes': 5,
+                'price': 5.00
+            })
+
+        entries = [entry for entry in self.read_log()
+                   if entry['sql'].startswith('INSERT INTO "core_recipe"')]
+        self.assertEqual(len(entries), 1)
+        self.assertEqual(entries[0]['view'], 'RecipeViewSet.create')
+        self.assertIsNotNone(entries[0]['origin'])
+
+    def test_fast_queries_not_logged(self):
+        """Test that queries under the threshold are not logged"""
+        self.logger.threshold = 60
+        with connection.execute_wrapper(self.logger):
+            self.client.get(RECIPES_URL)
+
+        self.assertEqual(self.read_log(), [])
+
+    def test_slow_queries_command(self):
+        """Test that the command summarizes queries by fingerprint"""
+        with connection.execute_wrapper(self.logger):
+            for _ in range(3):
+                self.client.get(RECIPES_URL)
+        out = StringIO()
+        call_command('slow_queries', path=self.path, plans=True, stdout=out)
+
+        self.assertIn('3 calls', out.getvalue())
+        self.assertIn('RecipeViewSet.list', out.getvalue())
@@ -0,0 +1,26 @@
+from django.test import SimpleTestCase
+
+from bench.startup import COMMAND, WORKER, import_profile
+
+# Seconds of imports allowed on startup, well above what a development
+# machine needs so that only real regressions fail
+STARTUP_BUDGET = 2.0
+
+
+class StartupTests(SimpleTestCase):
+
+    def test_worker_startup(self):
+        """Test that workers start without Pillow or admin modules"""
+        total, modules = import_profile(WORKER)
+
+        self.assertLess(total, STARTUP_BUDGET)
+        self.assertNotIn('PIL', modules)
+        self.assertNotIn('core.admin', modules)
+
+    def test_wait_for_db_startup(self):
+        """Test that waiting for the database skips the heavy imports"""
+        total, modules = import_profile(COMMAND)
+
+        self.assertLess(total, STARTUP_BUDGET)
+        self.assertNotIn('PIL', modules)
+        self.assertNotIn('django.contrib.auth.admin', modules)
@@ -0,0 +1,105 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework import status
+
+from core import throttling
+
+RECIPES_URL = reverse('recipe:recipe-list')
+
+
+class ThrottlingTests(TestCase):
+
+    def setUp(self):
+        throttling.get_store.cache_clear()
+        self.user = get_user_model().objects.create_user(
+            email='throttle@gmail.com',
+            password='throttlepass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        throttling.get_store.cache_clear()
+
+    def test_store_allows_burst_then_waits(self):
+        """Test that the bucket allows its capacity and then waits"""
+        store = throttling.LocalMemoryStore()
+        results = [store.update('key', 100.0, 1.0, 3.0) for _ in range(4)]
+
+        self.assertEqual(results[:3], [0, 0, 0])
+        self.assertAlmostEqual(results[3], 1.0)
+        self.assertEqual(store.update('key', 101.0, 1.0, 3.0), 0)
+
+    def test_store_evicts_refilled_keys(self):
+        """Test that a full store drops keys with a refilled bucket"""
+        store = throttling.LocalMemoryStore(max_keys=2)
+        store.update('old', 0.0, 1.0, 5.0)
+        store.update('recent', 10.0, 1.0, 5.0)
+        store.update('new', 10.0, 1.0, 5.0)
+
+        self.assertNotIn('old', store._arrivals)
+        self.assertIn('new', store._arrivals)
+
+    def test_store_stays_bounded_when_all_keys_active(self):
+        """Test that a full store of active keys drops the least recent"""
+        store = throttling.LocalMemoryStore(max_keys=10)
+        for index in range(10):
+            store.update(f'key{index}', 0.0, 60.0, 600.0)
+        store.update('key0', 0.0, 60.0, 600.0)
+        store.update('new', 0.0, 60.0, 600.0)
+
+        self.assertEqual(len(store._arrivals), 10)
+        self.assertNotIn('key1', store._arrivals)
+        self.assertIn('key0', store._arrivals)
+        self.assertIn('new', store._arrivals)
+
+    @override_settings(REST_FRAMEWORK={
+        'DEFAULT_THROTTLE_CLASSES': ['core.throttling.GCRAThrottle'],
+        'DEFAULT_THROTTLE_RATES': {'read': '2/min', 'write': '5/min'},
+    })
+    def test_requests_over_rate_are_throttled(self):
+        """Test that exceeding the rate returns 429 with Retry-After"""
+        for _ in range(2):
+            res = self.client.get(RECIPES_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(RECIPES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '30')
+
+    @override_settings(REST_FRAMEWORK={
+        'DEFAULT_THROTTLE_CLASSES': ['core.throttling.GCRAThrottle'],
+        'DEFAULT_THROTTLE_RATES': {'read': '1/min', 'write': '5/min'},
+    })
+    def test_read_and_write_budgets_are_separate(self):
+        """Test that reads being throttled does not block writes"""
+        self.client.get(RECIPES_URL)
+        res = self.client.post(RECIPES_URL, {
+            'title': 'Sample',
+            'time_minutes': 5,
+            'price': 5.00
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+    def test_throttle_overhead(self):
+        """Test that throttling a request costs less than 100 µs"""
+        request = Request(APIRequestFactory().get(RECIPES_URL))
+        request.user = self.user
+        throttle = throttling.GCRAThrottle()
+        view = object()
+        runs = 2000
+
+        start = time.perf_counter()
+        for _ in range(runs):
+            throttle.allow_request(request, view)
+        elapsed = (time.perf_counter() - start) / runs
+
+        self.assertLess(elapsed, 100e-6)
@@ -0,0 +1,150 @@
+import math
+import threading
+import time
+from functools import lru_cache
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class LocalMemoryStore:
+    """
+    Keeps the theoretical arrival time (TAT) of every key in process
+    memory, which is one float per client and scope. Keys are ordered by
+    their last allowed request.
+    """
+    # Evict down to this fraction so eviction does not run on every write
+    low_water = 0.9
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._arrivals = {}
+        self._lock = threading.Lock()
+
+    def update(self, key, now, interval, capacity):
+        """
+        Registers a request for key and returns the seconds to wait before
+        it would conform, or 0 when the request is allowed
+        """
+        with self._lock:
+            arrival = max(self._arrivals.get(key, now), now) + interval
+            wait = arrival - capacity - now
+            if wait > 0:
+                return wait
+
+            # Reinserting moves the key behind the less recently used ones
+            self._arrivals.pop(key, None)
+            if len(self._arrivals) >= self.max_keys:
+                self._evict(now)
+            self._arrivals[key] = arrival
+
+        return 0
+
+    def _evict(self, now):
+        """
+        Drops keys whose bucket has fully refilled, then the least recently
+        used keys until the store is down to the low water mark
+        """
+        arrivals = {
+            key: arrival for key, arrival in self._arrivals.items()
+            if arrival > now
+        }
+        excess = len(arrivals) - int(self.max_keys * self.low_water)
+        for key in list(islice(arrivals, max(excess, 0))):
+            del arrivals[key]
+        self._arrivals = arrivals
+
+
+class CacheStore:
+    """
+    Keeps arrival times in a Django cache shared between processes. The
+    read and write are not atomic, so concurrent requests of one client
+    may occasionally exceed the budget slightly.
+    """
+
+    def __init__(self, alias='default'):
+        self.cache = caches[alias]
+
+    def update(self, key, now, interval, capacity):
+        """Same as LocalMemoryStore.update"""
+        arrival = max(self.cache.get(key, now), now) + interval
+        wait = arrival - capacity - now
+        if wait > 0:
+            return wait
+
+        self.cache.set(key, arrival, math.ceil(arrival - now))
+        return 0
+
+
+@lru_cache(maxsize=None)
+def get_store():
+    """Returns the configured rate limit store of this process"""
+    options = dict(settings.RATE_LIMIT_STORE)
+    store_class = import_string(options.pop('BACKEND'))
+
+    return store_class(**options)
+
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """Converts a rate such as '100/min' into (requests, seconds)"""
+    num, period = rate.split('/')
+
+    return int(num), DURATIONS[period[0]]
+
+
+class GCRAThrottle(BaseThrottle):
+    """
+    Token bucket throttle implemented as the generic cell rate algorithm.
+    Budgets are separate for reads, writes and image uploads, and are
+    counted per user, or per client address for anonymous requests.
+    """
+
+    def __init__(self):
+        self.wait_time = None
+
+    def get_scope(self, request, view):
+        """Returns the throttle rate scope of the request"""
+        if getattr(view, 'action', None) == 'upload_image':
+            return 'upload'
+        elif request.method in SAFE_METHODS:
+            return 'read'
+        else:
+            return 'write'
+
+    def get_key(self, request, scope):
+        """Returns the store key identifying the client and scope"""
+        user = request.user
+        if user and user.is_authenticated:
+            return f'throttle:{scope}:user:{user.pk}'
+
+        return f'throttle:{scope}:ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        """Allows the request if it conforms to the scope's rate"""
+        scope = self.get_scope(request, view)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+
+        num, duration = parse_rate(rate)
+        interval = duration / num
+        self.wait_time = get_store().update(
+            self.get_key(request, scope),
+            time.time(),
+            interval,
+            interval * num
+        )
+
+        return not self.wait_time
+
+    def wait(self):
+        """Returns seconds until the next request would be allowed"""
+        return self.wait_time
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse, JsonResponse
+
+from core.health import readiness
+from core.metrics import REGISTRY
+
+
+def metrics(request):
+    """Returns the metrics of this process in Prometheus text format"""
+    if not settings.METRICS_ENABLED:
+        raise Http404()
+
+    return HttpResponse(
+        REGISTRY.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+def healthz(request):
+    """Returns 200 while the process is able to answer requests"""
+    return HttpResponse('ok', content_type='text/plain')
+
+
+def readyz(request):
+    """Returns the last readiness check, 503 unless all checks passed"""
+    status = readiness.get()
+    response = JsonResponse(status, status=200 if status['ready'] else 503)
+    response['Cache-Control'] = 'no-store'
+
+    return response
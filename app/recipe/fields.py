@@ -0,0 +1,109 @@
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+
+class UserOwnedManyRelatedField(serializers.ManyRelatedField):
+    """
+    Resolves a list of primary keys with a single query, reporting every
+    key that does not exist at once. With create_by_name, items can also
+    be names, which are returned as strings for the serializer to
+    resolve when saving.
+    """
+    default_error_messages = {
+        'does_not_exist': 'Invalid pk(s) {pk_values} - object does not '
+                          'exist.',
+        'invalid_name': 'Names must have 1 to {max_length} characters.',
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        queryset = self.child_relation.get_queryset()
+        items = list(dict.fromkeys(
+            self.parse_item(item, queryset.model) for item in data
+        ))
+        pks = [value for kind, value in items if kind == 'pk']
+
+        objects = queryset.in_bulk(pks) if pks else {}
+        missing = [pk for pk in pks if pk not in objects]
+        if missing:
+            self.fail('does_not_exist',
+                      pk_values=', '.join(str(pk) for pk in missing))
+
+        return [objects[value] if kind == 'pk' else value
+                for kind, value in items]
+
+    def parse_item(self, item, model):
+        """Returns ('pk', primary key) or ('name', name) of an item"""
+        if self.child_relation.create_by_name:
+            # Numeric names have to be sent as {"name": "..."}
+            if isinstance(item, dict):
+                name = item.get('name')
+            elif isinstance(item, str) and not item.strip().isdigit():
+                name = item
+            else:
+                name = None
+            if name is not None:
+                max_length = model._meta.get_field('name').max_length
+                if not isinstance(name, str) \
+                        or not 0 < len(name.strip()) <= max_length:
+                    self.fail('invalid_name', max_length=max_length)
+                return 'name', name.strip()
+
+        try:
+            return 'pk', model._meta.pk.to_python(item)
+        except (TypeError, ValidationError):
+            self.child_relation.fail(
+                'incorrect_type', data_type=type(item).__name__
+            )
+
+
+class UserOwnedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary key relation limited to objects of the requesting user, so
+    ids of other users' objects are rejected as if they did not exist
+    """
+
+    def __init__(self, create_by_name=False, **kwargs):
+        self.create_by_name = create_by_name
+        super().__init__(**kwargs)
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return UserOwnedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None:
+            return queryset.none()
+
+        return queryset.filter(user=request.user)
+
+
+class ExactDecimalField(serializers.DecimalField):
+    """
+    Decimal field rendered as a string, or as a Decimal for renderers
+    that encode decimals exactly
+    """
+
+    def to_representation(self, value):
+        value = super().to_representation(value)
+        request = self.context.get('request')
+        renderer = getattr(request, 'accepted_renderer', None)
+        if isinstance(value, str) and getattr(renderer, 'exact_decimals',
+                                              False):
+            return Decimal(value)
+
+        return value
@@ -0,0 +1,306 @@
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from core.models import ChangeLog, Recipe
+
+HASH_SIZE = 8
+# Newest change log entries searched for a settled one to sync from
+SYNC_SCAN_LIMIT = 1000
+# Seconds between syncs with the change log, and between checks for
+# deleted users, whose change log entries are deleted with them
+SYNC_INTERVAL = 1
+PRUNE_INTERVAL = 300
+# Users looked up per query when pruning
+PRUNE_BATCH_SIZE = 500
+
+_popcount = None
+_index = None
+_index_lock = threading.Lock()
+
+
+def dhash(file):
+    """Returns the 64 bit difference hash of an image file in hex"""
+    from PIL import Image
+
+    file.seek(0)
+    with Image.open(file) as image:
+        # JPEGs are decoded at a fraction of their size in draft mode
+        image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+        pixels = list(image.convert('L').resize(
+            (HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS
+        ).getdata())
+    file.seek(0)
+
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            value = value << 1 | (left > pixels[row * (HASH_SIZE + 1) +
+                                                col + 1])
+
+    return f'{value:016x}'
+
+
+def popcount(values):
+    """Returns the number of set bits of every uint64 value"""
+    import numpy as np
+
+    global _popcount
+    if _popcount is None:
+        _popcount = np.array([bin(i).count('1') for i in range(256)],
+                             dtype=np.uint8)
+    bytes_ = values.view(np.uint8).reshape(values.shape + (8,))
+
+    return _popcount[bytes_].sum(axis=-1, dtype=np.int64)
+
+
+class HashIndex:
+    """
+    Image hashes of recipes in NumPy arrays, searched by Hamming distance
+    for one user or across all users. Rows are replaced in place and
+    appended to arrays that grow by doubling, so single changes are cheap.
+    """
+    chunk_size = 256
+
+    def __init__(self, rows=()):
+        import numpy as np
+
+        self.size = 0
+        self.positions = {}
+        self.recipe_ids = np.zeros(16, dtype=np.int64)
+        self.user_ids = np.zeros(16, dtype=np.int64)
+        self.hashes = np.zeros(16, dtype=np.uint64)
+        # Change log entry the index is up to date with, entries after it
+        # that were already applied, and when it was synced and pruned
+        self.synced_through = 0
+        self.applied = set()
+        self.synced_at = self.pruned_at = time.monotonic()
+        self._lock = threading.RLock()
+        for recipe_id, user_id, image_hash in rows:
+            self.update(recipe_id, user_id, image_hash)
+
+    def _grow(self):
+        """Doubles the capacity of the arrays"""
+        import numpy as np
+
+        capacity = len(self.hashes) * 2
+        for name in ('recipe_ids', 'user_ids', 'hashes'):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            setattr(self, name, grown)
+
+    def update(self, recipe_id, user_id, image_hash):
+        """Adds or replaces the hash of a recipe, removing it when empty"""
+        with self._lock:
+            if not image_hash:
+                return self.remove(recipe_id)
+
+            row = self.positions.get(recipe_id)
+            if row is None:
+                if self.size == len(self.hashes):
+                    self._grow()
+                row = self.positions[recipe_id] = self.size
+                self.size += 1
+            self.recipe_ids[row] = recipe_id
+            self.user_ids[row] = user_id
+            self.hashes[row] = int(image_hash, 16)
+
+    def remove(self, recipe_id):
+        """Removes the hash of a recipe, if indexed"""
+        with self._lock:
+            row = self.positions.pop(recipe_id, None)
+            if row is None:
+                return
+            # Move the last row into the gap to keep rows contiguous
+            last = self.size - 1
+            if row != last:
+                self.recipe_ids[row] = self.recipe_ids[last]
+                self.user_ids[row] = self.user_ids[last]
+                self.hashes[row] = self.hashes[last]
+                self.positions[int(self.recipe_ids[row])] = row
+            self.size = last
+
+    def remove_users(self, user_ids):
+        """Removes the hashes of all recipes of the given users"""
+        import numpy as np
+
+        with self._lock:
+            keep = ~np.isin(self.user_ids[:self.size], list(user_ids))
+            for name in ('recipe_ids', 'user_ids', 'hashes'):
+                array = getattr(self, name)
+                kept = array[:self.size][keep]
+                array[:len(kept)] = kept
+            self.size = int(keep.sum())
+            self.positions = {
+                int(recipe_id): row
+                for row, recipe_id in enumerate(self.recipe_ids[:self.size])
+            }
+
+    def user_ids_indexed(self):
+        """Returns the ids of the users with indexed hashes"""
+        import numpy as np
+
+        with self._lock:
+            return [int(user_id)
+                    for user_id in np.unique(self.user_ids[:self.size])]
+
+    def nearest(self, image_hash, max_distance, user_id=None):
+        """Returns (recipe id, distance) of similar images, closest first"""
+        import numpy as np
+
+        with self._lock:
+            hashes = self.hashes[:self.size]
+            distances = popcount(hashes ^ np.uint64(int(image_hash, 16)))
+            mask = distances <= max_distance
+            if user_id is not None:
+                mask &= self.user_ids[:self.size] == user_id
+            recipe_ids = self.recipe_ids[:self.size][mask]
+        distances = distances[mask]
+
+        return [(int(recipe_ids[i]), int(distances[i]))
+                for i in np.argsort(distances, kind='stable')]
+
+    def groups(self, user_id, max_distance):
+        """Returns groups of the user's recipes with similar images"""
+        import numpy as np
+
+        with self._lock:
+            mine = self.user_ids[:self.size] == user_id
+            hashes = self.hashes[:self.size][mine]
+            recipe_ids = self.recipe_ids[:self.size][mine]
+        parents = list(range(len(hashes)))
+
+        def find(i):
+            while parents[i] != i:
+                parents[i] = parents[parents[i]]
+                i = parents[i]
+            return i
+
+        # Compare blocks of rows with all hashes, to bound memory use
+        for start in range(0, len(hashes), self.chunk_size):
+            block = hashes[start:start + self.chunk_size]
+            distances = popcount(block[:, None] ^ hashes[None, :])
+            for row, col in zip(*np.nonzero(distances <= max_distance)):
+                first, second = find(start + row), find(col)
+                if first != second:
+                    parents[max(first, second)] = min(first, second)
+
+        groups = {}
+        for i, recipe_id in enumerate(recipe_ids):
+            groups.setdefault(find(i), []).append(int(recipe_id))
+
+        return sorted(
+            (sorted(group) for group in groups.values() if len(group) > 1),
+            key=lambda group: group[0]
+        )
+
+
+def _settled_before():
+    """Returns the time before which change log entries are committed"""
+    return timezone.now() - timedelta(
+        seconds=settings.CHANGELOG_CHECKPOINT_LAG_SECONDS
+    )
+
+
+def _build_index():
+    """Returns a new index of every recipe image hash"""
+    index = HashIndex()
+    # Start syncing from the newest settled entry, before reading rows,
+    # so changes made while building are applied by the next sync
+    settled = _settled_before()
+    recent = ChangeLog.objects.order_by('-id').values_list(
+        'id', 'created_at'
+    )[:SYNC_SCAN_LIMIT]
+    index.synced_through = next(
+        (entry_id for entry_id, created_at in recent
+         if created_at <= settled),
+        0
+    )
+    for row in Recipe.objects.exclude(image_hash='').values_list(
+            'id', 'user_id', 'image_hash').iterator():
+        index.update(*row)
+
+    return index
+
+
+def _sync_index(index):
+    """Applies recipe changes of the change log made since the last sync"""
+    settled = _settled_before()
+    entries = ChangeLog.objects.filter(
+        id__gt=index.synced_through,
+        kind=ChangeLog.RECIPE
+    ).order_by('id').values_list('id', 'object_id', 'created_at')
+    recipe_ids = set()
+    synced_through = index.synced_through
+    applied = set()
+    advancing = True
+    for entry_id, object_id, created_at in entries:
+        if entry_id not in index.applied:
+            recipe_ids.add(object_id)
+        # Entries from the first recent one on are read again by the next
+        # sync, in case an entry with a lower id is still being committed
+        advancing = advancing and created_at <= settled
+        if advancing:
+            synced_through = entry_id
+        else:
+            applied.add(entry_id)
+
+    if recipe_ids:
+        rows = Recipe.objects.filter(id__in=recipe_ids).values_list(
+            'id', 'user_id', 'image_hash'
+        )
+        for recipe_id, user_id, image_hash in rows:
+            recipe_ids.discard(recipe_id)
+            index.update(recipe_id, user_id, image_hash)
+        for recipe_id in recipe_ids:
+            index.remove(recipe_id)
+    index.synced_through = synced_through
+    index.applied = applied
+    index.synced_at = time.monotonic()
+
+
+def _prune_index(index):
+    """Removes the hashes of users who were deleted"""
+    user_ids = index.user_ids_indexed()
+    deleted = set(user_ids)
+    for start in range(0, len(user_ids), PRUNE_BATCH_SIZE):
+        deleted.difference_update(get_user_model().objects.filter(
+            id__in=user_ids[start:start + PRUNE_BATCH_SIZE]
+        ).values_list('id', flat=True))
+    if deleted:
+        index.remove_users(deleted)
+    index.pruned_at = time.monotonic()
+
+
+def get_index():
+    """
+    Returns the hash index of this process, after applying the recipe
+    changes other processes recorded in the change log since last use,
+    at most every SYNC_INTERVAL seconds
+    """
+    global _index
+
+    with _index_lock:
+        if _index is None:
+            _index = _build_index()
+            _sync_index(_index)
+        now = time.monotonic()
+        if now - _index.synced_at >= SYNC_INTERVAL:
+            _sync_index(_index)
+        if now - _index.pruned_at >= PRUNE_INTERVAL:
+            _prune_index(_index)
+
+        return _index
+
+
+def update_index(recipe):
+    """Updates the hash of one recipe, when the index is already built"""
+    with _index_lock:
+        if _index is not None:
+            _index.update(recipe.id, recipe.user_id, recipe.image_hash)
@@ -1,9 +1,51 @@
+from django.conf import settings
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
 
-from core.models import Tag, Ingredient, Recipe
+from core.models import Tag, Ingredient, Recipe, MealPlan
+from recipe.fields import ExactDecimalField, \
+    UserOwnedPrimaryKeyRelatedField
+from recipe.images import dhash, get_index, update_index
 
 
-class TagSerializer(serializers.ModelSerializer):
+class UniqueNameMixin:
+    """
+    Validates that the user has no other object with the same name. The
+    check gives a readable error, the unique constraint settles races.
+    """
+
+    def duplicate_name_error(self, value):
+        return serializers.ValidationError(
+            f'You already have a {self.Meta.model._meta.verbose_name} '
+            f'named {value}.'
+        )
+
+    def validate_name(self, value):
+        queryset = self.Meta.model.objects.filter(
+            user=self.context['request'].user,
+            name=value
+        )
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        if queryset.exists():
+            raise self.duplicate_name_error(value)
+
+        return value
+
+    def create(self, validated_data):
+        try:
+            # A savepoint keeps the request's transaction usable
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                'name': self.duplicate_name_error(
+                    validated_data['name']
+                ).detail
+            })
+
+
+class TagSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serializer for tag objects"""
 
     class Meta:
@@ -12,7 +54,7 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(UniqueNameMixin, serializers.ModelSerializer):
     """Serializer for ingredient objects"""
 
     class Meta:
@@ -23,24 +65,136 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Serializer for Recipe objects"""
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserOwnedPrimaryKeyRelatedField(
+        many=True,
+        queryset=Ingredient.objects.all(),
+        create_by_name=True
+    )
+
+    tags = UserOwnedPrimaryKeyRelatedField(
         many=True,
-        queryset=Ingredient.objects.all()
+        queryset=Tag.objects.all(),
+        create_by_name=True
     )
+    price = ExactDecimalField(max_digits=5, decimal_places=2)
 
-    tags = serializers.PrimaryKeyRelatedField(
+    add_ingredients = UserOwnedPrimaryKeyRelatedField(
+        many=True,
+        queryset=Ingredient.objects.all(),
+        create_by_name=True,
+        write_only=True,
+        required=False
+    )
+    remove_ingredients = UserOwnedPrimaryKeyRelatedField(
+        many=True,
+        queryset=Ingredient.objects.all(),
+        write_only=True,
+        required=False
+    )
+    add_tags = UserOwnedPrimaryKeyRelatedField(
         many=True,
-        queryset=Tag.objects.all()
+        queryset=Tag.objects.all(),
+        create_by_name=True,
+        write_only=True,
+        required=False
     )
+    remove_tags = UserOwnedPrimaryKeyRelatedField(
+        many=True,
+        queryset=Tag.objects.all(),
+        write_only=True,
+        required=False
+    )
+
+    # Relations that can also be changed with add_<name> and remove_<name>
+    delta_fields = ('ingredients', 'tags')
 
     class Meta:
         model = Recipe
         fields = (
             'id', 'title', 'ingredients', 'tags',
-            'time_minutes', 'price', 'link'
+            'time_minutes', 'price', 'link',
+            'add_ingredients', 'remove_ingredients', 'add_tags',
+            'remove_tags',
         )
         read_only_fields = ('id',)
 
+    def validate(self, attrs):
+        for name in self.delta_fields:
+            # Form data sends absent lists as empty lists
+            if name in attrs and (attrs.get(f'add_{name}')
+                                  or attrs.get(f'remove_{name}')):
+                raise serializers.ValidationError({
+                    name: f'Send either {name} or add_{name} and '
+                          f'remove_{name}, not both.'
+                })
+
+        return attrs
+
+    def resolve_names(self, validated_data):
+        """
+        Replaces names of tags and ingredients by the user's objects,
+        creating the missing ones
+        """
+        user = self.context['request'].user
+        for field_name in (*self.delta_fields,
+                           *(f'add_{name}' for name in self.delta_fields)):
+            objects = validated_data.get(field_name)
+            names = [obj for obj in objects or () if isinstance(obj, str)]
+            if not names:
+                continue
+            model = self.fields[field_name].child_relation.queryset.model
+            resolved = dict(zip(
+                names, model.objects.resolve_names(user, names)
+            ))
+            validated_data[field_name] = [
+                resolved[obj] if isinstance(obj, str) else obj
+                for obj in objects
+            ]
+
+    @transaction.atomic
+    def create(self, validated_data):
+        self.resolve_names(validated_data)
+        for name in self.delta_fields:
+            added = validated_data.pop(f'add_{name}', [])
+            validated_data.pop(f'remove_{name}', None)
+            validated_data[name] = validated_data.get(name, []) + added
+
+        return super().create(validated_data)
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        self.resolve_names(validated_data)
+        changes = {
+            name: (
+                validated_data.pop(name, None),
+                validated_data.pop(f'add_{name}', []),
+                validated_data.pop(f'remove_{name}', []),
+            )
+            for name in self.delta_fields
+        }
+        instance = super().update(instance, validated_data)
+        for name, (objects, added, removed) in changes.items():
+            self.update_relation(getattr(instance, name), objects, added,
+                                 removed)
+
+        return instance
+
+    def update_relation(self, manager, objects, added, removed):
+        """
+        Adds and removes only the related objects that changed, given
+        either the full new list or the objects to add and remove
+        """
+        if objects is not None:
+            current = set(manager.values_list('pk', flat=True))
+            wanted = {obj.pk for obj in objects}
+            added = [obj for obj in objects if obj.pk not in current]
+            removed = current - wanted
+
+        if removed:
+            manager.remove(*removed)
+        if added:
+            manager.add(*added)
+
 
 class RecipeDetailSerializer(RecipeSerializer):
     """Serializer for recipe detail"""
@@ -53,5 +207,50 @@ class RecipeImageSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'image_hash')
+        read_only_fields = ('id', 'image_hash')
+
+    def find_duplicate(self, instance, image_hash):
+        """Returns another recipe of the user with a near-identical image"""
+        matches = get_index().nearest(
+            image_hash,
+            settings.RECIPE_IMAGE_DEDUPE['MAX_DISTANCE'],
+            user_id=instance.user_id
+        )
+        recipe_ids = [recipe_id for recipe_id, distance in matches
+                      if recipe_id != instance.id]
+
+        return Recipe.objects.filter(
+            id__in=recipe_ids,
+            user=instance.user
+        ).exclude(image='').order_by('id').first()
+
+    def update(self, instance, validated_data):
+        image = validated_data.get('image')
+        if image:
+            validated_data['image_hash'] = dhash(image)
+            if settings.RECIPE_IMAGE_DEDUPE['ENABLED']:
+                duplicate = self.find_duplicate(
+                    instance, validated_data['image_hash']
+                )
+                if duplicate is not None:
+                    # Share the stored file instead of writing a copy
+                    validated_data['image'] = duplicate.image.name
+
+        instance = super().update(instance, validated_data)
+        update_index(instance)
+
+        return instance
+
+
+class MealPlanSerializer(serializers.ModelSerializer):
+    """Serializer for meal plans"""
+    recipes = UserOwnedPrimaryKeyRelatedField(
+        many=True,
+        queryset=Recipe.objects.all()
+    )
+
+    class Meta:
+        model = MealPlan
+        fields = ('id', 'name', 'recipes')
         read_only_fields = ('id',)
@@ -0,0 +1,79 @@
+from decimal import Decimal
+
+from django.db.models import Avg, Count, F, Max, Min, Value
+from django.db.models.functions import Floor
+
+from core.models import Recipe
+
+
+def money(value):
+    """Formats a price like the recipe serializer does"""
+    return None if value is None else f'{value:.2f}'
+
+
+def histogram(recipes, field, width, formatter=int):
+    """Returns recipe counts per bucket of width, empty buckets omitted"""
+    buckets = recipes.annotate(
+        bucket=Floor(F(field) / Value(width))
+    ).values('bucket').annotate(count=Count('id')).order_by('bucket')
+
+    return [
+        {
+            'from': formatter(int(row['bucket']) * width),
+            'to': formatter((int(row['bucket']) + 1) * width),
+            'count': row['count'],
+        }
+        for row in buckets
+    ]
+
+
+def top_related(through, field, user, top):
+    """Returns the user's most used tags or ingredients"""
+    rows = through.objects.filter(recipe__user=user).values(
+        f'{field}_id', f'{field}__name'
+    ).annotate(
+        recipe_count=Count('recipe_id')
+    ).order_by('-recipe_count', f'{field}__name')[:top]
+
+    return [
+        {
+            'id': row[f'{field}_id'],
+            'name': row[f'{field}__name'],
+            'recipe_count': row['recipe_count'],
+        }
+        for row in rows
+    ]
+
+
+def recipe_stats(user, top=10, price_bucket=Decimal(5), time_bucket=15):
+    """Returns price and time distributions and top tags and ingredients"""
+    recipes = Recipe.objects.filter(user=user)
+    summary = recipes.aggregate(
+        recipe_count=Count('id'),
+        price_min=Min('price'),
+        price_max=Max('price'),
+        price_mean=Avg('price'),
+        time_min=Min('time_minutes'),
+        time_max=Max('time_minutes'),
+        time_mean=Avg('time_minutes'),
+    )
+
+    return {
+        'recipe_count': summary['recipe_count'],
+        'price': {
+            'min': money(summary['price_min']),
+            'max': money(summary['price_max']),
+            'mean': money(summary['price_mean']),
+            'histogram': histogram(recipes, 'price', price_bucket, money),
+        },
+        'time_minutes': {
+            'min': summary['time_min'],
+            'max': summary['time_max'],
+            'mean': summary['time_mean'] and round(summary['time_mean'], 1),
+            'histogram': histogram(recipes, 'time_minutes', time_bucket),
+        },
+        'top_tags': top_related(Recipe.tags.through, 'tag', user, top),
+        'top_ingredients': top_related(
+            Recipe.ingredients.through, 'ingredient', user, top
+        ),
+    }
@@ -0,0 +1,185 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Recipe, Tag, Ingredient, ChangeLog
+from recipe.views import ChangesView
+
+CHANGES_URL = reverse('recipe:changes')
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample title',
+        'time_minutes': 5,
+        'price': 12.84
+    }
+    defaults.update(**params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+class PublicChangesApiTests(TestCase):
+    """Test unauthenticated delta sync access"""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_login_required(self):
+        """Test that authentication is required for syncing"""
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+@override_settings(CHANGELOG_CHECKPOINT_LAG_SECONDS=0)
+class PrivateChangesApiTests(TestCase):
+    """Test authenticated delta sync"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='sync@gmail.com',
+            password='syncpassword'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_initial_sync_returns_everything(self):
+        """Test that syncing without checkpoint returns all objects"""
+        recipe = sample_recipe(user=self.user)
+        tag = Tag.objects.create(user=self.user, name='Dinner')
+        Ingredient.objects.create(user=self.user, name='Rice')
+        recipe.tags.add(tag)
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.data['reset'])
+        self.assertEqual(len(res.data['recipes']['updated']), 1)
+        self.assertEqual(res.data['recipes']['updated'][0]['tags'], [tag.id])
+        self.assertEqual(len(res.data['tags']['updated']), 1)
+        self.assertEqual(len(res.data['ingredients']['updated']), 1)
+
+    def test_sync_returns_only_changes_since_checkpoint(self):
+        """Test that only objects changed after checkpoint are returned"""
+        sample_recipe(user=self.user, title='Unchanged')
+        recipe = sample_recipe(user=self.user, title='Changed')
+        tag = Tag.objects.create(user=self.user, name='Lunch')
+        checkpoint = self.client.get(CHANGES_URL).data['checkpoint']
+
+        recipe.tags.add(tag)
+        tag_id = tag.id
+        tag.delete()
+
+        res = self.client.get(CHANGES_URL, {'since': checkpoint})
+
+        updated = res.data['recipes']['updated']
+        self.assertEqual([r['title'] for r in updated], ['Changed'])
+        self.assertEqual(updated[0]['tags'], [])
+        self.assertEqual(res.data['tags']['deleted'], [tag_id])
+        self.assertGreater(int(res.data['checkpoint']), int(checkpoint))
+
+    def test_sync_limited_to_user(self):
+        """Test that changes of other users are not returned"""
+        user2 = get_user_model().objects.create_user(
+            email='other@gmail.com',
+            password='otherpassword'
+        )
+        sample_recipe(user=user2)
+
+        res = self.client.get(CHANGES_URL)
+
+        self.assertEqual(res.data['recipes']['updated'], [])
+
+    def test_sync_after_compaction_resets(self):
+        """Test that a checkpoint older than compaction forces a reset"""
+        sample_recipe(user=self.user)
+        checkpoint = self.client.get(CHANGES_URL).data['checkpoint']
+        tag = Tag.objects.create(user=self.user, name='Gone')
+        tag.delete()
+        ChangeLog.objects.compact(timezone.now() + timedelta(seconds=1))
+
+        res = self.client.get(CHANGES_URL, {'since': checkpoint})
+
+        self.assertTrue(res.data['reset'])
+        self.assertEqual(len(res.data['recipes']['updated']), 1)
+        self.assertEqual(res.data['tags']['deleted'], [])
+
+    def test_sync_after_compaction_reaches_steady_state(self):
+        """Test that a paged reset ends at a checkpoint past the horizon"""
+        recipes = [sample_recipe(user=self.user, title=f'Recipe {i}')
+                   for i in range(3)]
+        tag = Tag.objects.create(user=self.user, name='Gone')
+        tag.delete()
+        ChangeLog.objects.compact(timezone.now() + timedelta(seconds=1))
+
+        with patch.object(ChangesView, 'page_size', 2):
+            pages = [self.client.get(CHANGES_URL, {'since': 1}).data]
+            while pages[-1]['has_more']:
+                pages.append(self.client.get(
+                    CHANGES_URL, {'since': pages[-1]['checkpoint']}
+                ).data)
+                self.assertLess(len(pages), 5)
+            steady = self.client.get(
+                CHANGES_URL, {'since': pages[-1]['checkpoint']}
+            ).data
+
+        self.assertEqual([page['reset'] for page in pages], [True, False])
+        self.assertEqual(
+            sorted(r['id'] for page in pages
+                   for r in page['recipes']['updated']),
+            [recipe.id for recipe in recipes]
+        )
+        self.assertFalse(steady['reset'])
+        self.assertFalse(steady['has_more'])
+        self.assertEqual(steady['recipes']['updated'], [])
+        self.assertEqual(steady['checkpoint'], pages[-1]['checkpoint'])
+
+    def test_invalid_checkpoint(self):
+        """Test that an invalid checkpoint is rejected"""
+        for since in ('abc', '-1', 'r'):
+            res = self.client.get(CHANGES_URL, {'since': since})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ChangesCheckpointLagTests(TestCase):
+    """Test that checkpoints stay behind recently committed changes"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='sync@gmail.com',
+            password='syncpassword'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_checkpoint_stops_before_recent_changes(self):
+        """Test that recent changes are sent again by the next sync"""
+        old = sample_recipe(user=self.user, title='Old')
+        ChangeLog.objects.filter(object_id=old.id).update(
+            created_at=timezone.now() - timedelta(minutes=1)
+        )
+        recent = sample_recipe(user=self.user, title='Recent')
+
+        with patch.object(ChangesView, 'page_size', 1):
+            first = self.client.get(CHANGES_URL).data
+            second = self.client.get(
+                CHANGES_URL, {'since': first['checkpoint']}
+            ).data
+        third = self.client.get(CHANGES_URL,
+                                {'since': second['checkpoint']}).data
+
+        self.assertTrue(first['has_more'])
+        self.assertEqual(second['recipes']['updated'][0]['id'], recent.id)
+        self.assertFalse(second['has_more'])
+        self.assertEqual(second['checkpoint'], first['checkpoint'])
+        self.assertEqual(third['recipes']['updated'][0]['id'], recent.id)
@@ -0,0 +1,271 @@
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from PIL import Image, ImageDraw
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Recipe
+from recipe.images import HashIndex, dhash, get_index
+
+DUPLICATES_URL = reverse('recipe:recipe-duplicates')
+
+
+def recipe_image_upload_url(recipe_id):
+    """Return URL for recipe image upload"""
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def sample_image(shade=0, size=(64, 48)):
+    """Returns a temporary JPEG with a gradient and a square"""
+    width, height = size
+    image = Image.new('L', size)
+    image.putdata([(x * 200 // width + shade) % 256 for y in range(height)
+                   for x in range(width)])
+    ImageDraw.Draw(image).rectangle(
+        (width // 6, height // 5, width // 2, height * 2 // 3),
+        fill=255 - shade
+    )
+    ntf = tempfile.NamedTemporaryFile(suffix='.jpg')
+    image.convert('RGB').save(ntf, format='JPEG')
+    ntf.seek(0)
+
+    return ntf
+
+
+def sample_recipe(user, title='Sample recipe'):
+    """Create and return a sample recipe"""
+    return Recipe.objects.create(
+        user=user, title=title, time_minutes=10, price=5.00
+    )
+
+
+class ImageHashTests(TestCase):
+    """Test perceptual hashes and the hash index"""
+
+    def test_dhash_similar_images(self):
+        """Test that re-encoded images hash alike and others differ"""
+        with sample_image() as first, sample_image() as second:
+            self.assertEqual(dhash(first), dhash(second))
+            self.assertEqual(first.tell(), 0)
+        with sample_image() as small, sample_image(size=(128, 96)) as large:
+            self.assertLessEqual(
+                bin(int(dhash(small), 16) ^ int(dhash(large), 16)).count('1'),
+                4
+            )
+        with sample_image() as first, sample_image(shade=128) as second:
+            self.assertNotEqual(dhash(first), dhash(second))
+
+    def test_index_nearest_and_groups(self):
+        """Test searching the index for one user and across users"""
+        index = HashIndex([
+            (1, 1, '0000000000000000'),
+            (2, 1, '0000000000000003'),
+            (3, 1, 'ffffffffffffffff'),
+            (4, 2, '0000000000000001'),
+            (5, 1, 'fffffffffffffffe'),
+        ])
+
+        self.assertEqual(index.nearest('0000000000000000', 2),
+                         [(1, 0), (4, 1), (2, 2)])
+        self.assertEqual(index.nearest('0000000000000000', 2, user_id=1),
+                         [(1, 0), (2, 2)])
+        self.assertEqual(index.groups(1, 2), [[1, 2], [3, 5]])
+        self.assertEqual(index.groups(1, 0), [])
+        self.assertEqual(index.groups(3, 64), [])
+
+    def test_index_updates_in_place(self):
+        """Test replacing, removing and appending single hashes"""
+        index = HashIndex((i, 1, f'{i:016x}') for i in range(1, 21))
+
+        index.update(1, 1, '00000000000000ff')
+        index.remove(2)
+        index.update(3, 1, '')
+        index.update(30, 2, '0000000000000002')
+
+        self.assertEqual(index.size, 19)
+        self.assertEqual(index.nearest('00000000000000ff', 0), [(1, 0)])
+        self.assertEqual(index.nearest('0000000000000002', 0), [(30, 0)])
+        self.assertEqual(index.nearest('0000000000000003', 0), [])
+        self.assertEqual(index.nearest('0000000000000014', 0), [(20, 0)])
+
+    def test_index_removes_users(self):
+        """Test that removing users keeps the other rows findable"""
+        index = HashIndex([
+            (1, 1, '0000000000000001'),
+            (2, 2, '0000000000000001'),
+            (3, 1, '0000000000000002'),
+            (4, 3, '0000000000000002'),
+        ])
+        index.remove_users({1})
+
+        self.assertEqual(index.user_ids_indexed(), [2, 3])
+        self.assertEqual(index.nearest('0000000000000002', 0), [(4, 0)])
+        index.update(4, 3, '0000000000000003')
+        self.assertEqual(index.nearest('0000000000000003', 0), [(4, 0)])
+
+
+class ImageHashApiTests(TestCase):
+    """Test hashing of uploads and the duplicates endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='temp@gmail.com',
+            password='supersecrettestpassword'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipes = []
+        # Every test starts without an index built by an earlier one, and
+        # syncs it on every use
+        for patcher in (patch('recipe.images._index', None),
+                        patch('recipe.images.SYNC_INTERVAL', 0)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for recipe in self.recipes:
+            recipe.refresh_from_db()
+            recipe.image.delete()
+
+    def upload(self, recipe, **params):
+        """Uploads a sample image to the recipe"""
+        self.recipes.append(recipe)
+        with sample_image(**params) as ntf:
+            res = self.client.post(
+                recipe_image_upload_url(recipe.id),
+                {'image': ntf},
+                format='multipart'
+            )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        recipe.refresh_from_db()
+
+        return res
+
+    def test_upload_stores_hash(self):
+        """Test that uploading an image stores its hash"""
+        recipe = sample_recipe(self.user)
+        res = self.upload(recipe)
+
+        self.assertEqual(len(recipe.image_hash), 16)
+        self.assertEqual(res.data['image_hash'], recipe.image_hash)
+
+    def test_duplicates(self):
+        """Test listing the user's recipes with near-identical images"""
+        first = sample_recipe(self.user, 'First')
+        second = sample_recipe(self.user, 'Second')
+        other = sample_recipe(self.user, 'Other')
+        self.upload(first)
+        self.upload(second, size=(128, 96))
+        self.upload(other, shade=128)
+        user2 = get_user_model().objects.create_user(
+            'other@gmail.com', 'password123'
+        )
+        self.client.force_authenticate(user2)
+        self.upload(sample_recipe(user2))
+        self.client.force_authenticate(self.user)
+
+        res = self.client.get(DUPLICATES_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['groups'], [[first.id, second.id]])
+
+    def test_duplicates_invalid_distance(self):
+        """Test that max_distance is validated"""
+        for value in ('-1', '65', 'x'):
+            res = self.client.get(DUPLICATES_URL, {'max_distance': value})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(RECIPE_IMAGE_DEDUPE={'ENABLED': True,
+                                            'MAX_DISTANCE': 4})
+    def test_dedupe_reuses_file(self):
+        """Test that a duplicate upload reuses the existing file"""
+        first = sample_recipe(self.user, 'First')
+        second = sample_recipe(self.user, 'Second')
+        other = sample_recipe(self.user, 'Other')
+        self.upload(first)
+        self.upload(second)
+        self.upload(other, shade=128)
+
+        self.assertEqual(second.image.name, first.image.name)
+        self.assertNotEqual(other.image.name, first.image.name)
+        self.recipes.remove(second)
+
+    def test_index_follows_change_log(self):
+        """Test that changes saved by other processes reach the index"""
+        kept = sample_recipe(self.user, 'Kept')
+        deleted = sample_recipe(self.user, 'Deleted')
+        Recipe.objects.filter(id__in=[kept.id, deleted.id]).update(
+            image_hash='0000000000000001'
+        )
+        self.assertEqual(len(get_index().nearest('0000000000000001', 0)), 2)
+
+        # Saved without update_index, as another process would
+        kept.image_hash = '00000000000000ff'
+        kept.save()
+        deleted.delete()
+        added = sample_recipe(self.user, 'Added')
+        added.image_hash = '0000000000000001'
+        added.save()
+
+        index = get_index()
+        self.assertEqual(index.nearest('00000000000000ff', 0),
+                         [(kept.id, 0)])
+        self.assertEqual(index.nearest('0000000000000001', 0),
+                         [(added.id, 0)])
+
+    def test_index_syncs_at_most_every_interval(self):
+        """Test that lookups in quick succession share one sync"""
+        get_index()
+
+        with patch('recipe.images.SYNC_INTERVAL', 60), \
+                self.assertNumQueries(0):
+            get_index()
+
+    def test_index_skips_applied_entries(self):
+        """Test that recent entries are not applied again on every sync"""
+        recipe = sample_recipe(self.user)
+        recipe.image_hash = '0000000000000001'
+        recipe.save()
+        get_index()
+
+        # Only the change log is read, the recipe is not loaded again
+        with self.assertNumQueries(1):
+            get_index()
+
+    def test_index_drops_deleted_users(self):
+        """Test that hashes of deleted users are pruned from the index"""
+        other = get_user_model().objects.create_user(
+            email='other@gmail.com',
+            password='otherpassword'
+        )
+        recipe = sample_recipe(other)
+        recipe.image_hash = '0000000000000001'
+        recipe.save()
+        self.assertEqual(len(get_index().nearest('0000000000000001', 0)), 1)
+
+        other.delete()
+        with patch('recipe.images.PRUNE_INTERVAL', 0):
+            index = get_index()
+
+        self.assertEqual(index.nearest('0000000000000001', 0), [])
+
+    def test_hash_recipe_images_command(self):
+        """Test that the command hashes images stored without a hash"""
+        recipe = sample_recipe(self.user)
+        self.upload(recipe)
+        image_hash = recipe.image_hash
+        Recipe.objects.filter(id=recipe.id).update(image_hash='')
+
+        call_command('hash_recipe_images', stdout=StringIO())
+
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.image_hash, image_hash)
@@ -4,13 +4,15 @@ import os
 from PIL import Image
 
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
-from core.models import Recipe, Tag, Ingredient
+from core.models import Recipe, Tag, Ingredient, ChangeLog
 from recipe.serializers import RecipeSerializer, RecipeDetailSerializer
 
 RECIPE_URL = reverse('recipe:recipe-list')
@@ -171,11 +173,99 @@ class PrivateRecipeTest(TestCase):
         self.assertIn(ingredient1, ingredients)
         self.assertIn(ingredient2, ingredients)
 
+    def test_create_recipe_with_many_ingredients_queries(self):
+        """Test that ingredient ids are validated with a single query"""
+        Ingredient.objects.bulk_create([
+            Ingredient(user=self.user, name=f'ingredient{i}')
+            for i in range(50)
+        ])
+        ids = list(Ingredient.objects.filter(user=self.user)
+                   .values_list('id', flat=True))
+        payload = {
+            'title': 'Big recipe',
+            'ingredients': ids,
+            'tags': [],
+            'time_minutes': 40,
+            'price': 20.00
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data['ingredients'], ids)
+        self.assertLess(len(queries), 15)
+
+    def test_create_recipe_with_other_users_tags_fails(self):
+        """Test that tags of other users are rejected all at once"""
+        other_user = get_user_model().objects.create_user(
+            email='other@gmail.com',
+            password='otherpass'
+        )
+        own = sample_tag(user=self.user, name='Own')
+        foreign = sample_tag(user=other_user, name='Foreign')
+        payload = {
+            'title': 'Sample title',
+            'tags': [own.id, foreign.id, 9999],
+            'time_minutes': 5,
+            'price': 10.00
+        }
+        res = self.client.post(RECIPE_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(f'{foreign.id}, 9999', res.data['tags'][0])
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_with_names(self):
+        """Test creating a recipe with new and existing tags by name"""
+        existing = sample_tag(user=self.user, name='Vegan')
+        salt = sample_ingredient(user=self.user, name='Salt')
+        payload = {
+            'title': 'Named recipe',
+            'tags': ['Vegan', 'Quick', {'name': '2024'}],
+            'ingredients': [salt.id, 'Pepper'],
+            'time_minutes': 10,
+            'price': 5.00
+        }
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        recipe = Recipe.objects.get(id=res.data['id'])
+        tags = Tag.objects.filter(user=self.user)
+        self.assertEqual(tags.count(), 3)
+        self.assertEqual(res.data['tags'][0], existing.id)
+        self.assertEqual(
+            set(recipe.tags.values_list('name', flat=True)),
+            {'Vegan', 'Quick', '2024'}
+        )
+        self.assertEqual(
+            set(recipe.ingredients.values_list('name', flat=True)),
+            {'Salt', 'Pepper'}
+        )
+        created = tags.get(name='Quick')
+        self.assertTrue(ChangeLog.objects.filter(
+            kind=ChangeLog.TAG, object_id=created.id
+        ).exists())
+
+    def test_create_recipe_with_invalid_name(self):
+        """Test that blank names are rejected"""
+        payload = {
+            'title': 'Named recipe',
+            'tags': [{'name': ' '}],
+            'ingredients': [],
+            'time_minutes': 10,
+            'price': 5.00
+        }
+        res = self.client.post(RECIPE_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Tag.objects.exists())
+
     def test_partial_update(self):
         """Test that creating partial update is successful"""
         recipe = sample_recipe(user=self.user)
         recipe.tags.add(sample_tag(user=self.user))
-        new_tag = sample_tag(user=self.user, name='Sample tag')
+        new_tag = sample_tag(user=self.user, name='New tag')
 
         payload = {
             'title': 'New title',
@@ -190,6 +280,56 @@ class PrivateRecipeTest(TestCase):
         self.assertEqual(tags.count(), 1)
         self.assertIn(new_tag, tags)
 
+    def test_partial_update_tag_deltas(self):
+        """Test adding and removing tags without sending the full list"""
+        recipe = sample_recipe(user=self.user)
+        tag1 = sample_tag(user=self.user, name='Tag1')
+        tag2 = sample_tag(user=self.user, name='Tag2')
+        tag3 = sample_tag(user=self.user, name='Tag3')
+        recipe.tags.add(tag1, tag2)
+
+        payload = {'add_tags': [tag3.id], 'remove_tags': [tag1.id]}
+        res = self.client.patch(get_detail_url(recipe.id), payload,
+                                format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(res.data['tags']), {tag2.id, tag3.id})
+        self.assertNotIn('add_tags', res.data)
+
+    def test_partial_update_writes_only_changes(self):
+        """Test that unchanged relations are not rewritten"""
+        recipe = sample_recipe(user=self.user)
+        ingredients = [sample_ingredient(user=self.user, name=f'i{i}')
+                       for i in range(40)]
+        recipe.ingredients.add(*ingredients)
+        tag = sample_tag(user=self.user)
+
+        payload = {
+            'ingredients': [ingredient.id for ingredient in ingredients],
+            'tags': [tag.id],
+        }
+        with CaptureQueriesContext(connection) as queries:
+            self.client.patch(get_detail_url(recipe.id), payload,
+                              format='json')
+
+        writes = [query['sql'] for query in queries
+                  if 'core_recipe_ingredients' in query['sql']
+                  and not query['sql'].startswith('SELECT')]
+        self.assertEqual(writes, [])
+        self.assertEqual(recipe.ingredients.count(), 40)
+        self.assertEqual(list(recipe.tags.all()), [tag])
+
+    def test_partial_update_list_and_delta_fails(self):
+        """Test that a full list and deltas of one relation are rejected"""
+        recipe = sample_recipe(user=self.user)
+        tag = sample_tag(user=self.user)
+
+        payload = {'tags': [tag.id], 'add_tags': [tag.id]}
+        res = self.client.patch(get_detail_url(recipe.id), payload,
+                                format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_full_update(self):
         """Test creating full update is successful"""
         recipe = sample_recipe(user=self.user)
@@ -0,0 +1,110 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Recipe, Ingredient, MealPlan
+
+SHOPPING_LIST_URL = reverse('recipe:recipe-shopping-list')
+MEAL_PLANS_URL = reverse('recipe:mealplan-list')
+
+
+def sample_recipe(user, ingredients, **params):
+    """Create and return a sample recipe with ingredients"""
+    defaults = {
+        'title': 'Sample title',
+        'time_minutes': 10,
+        'price': 5.50
+    }
+    defaults.update(params)
+    recipe = Recipe.objects.create(user=user, **defaults)
+    recipe.ingredients.add(*ingredients)
+
+    return recipe
+
+
+class ShoppingListApiTests(TestCase):
+    """Test the shopping list and meal plan API"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='shopper@gmail.com',
+            password='shopperpass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        self.rice = Ingredient.objects.create(user=self.user, name='Rice')
+        self.lime = Ingredient.objects.create(user=self.user, name='Lime')
+        self.recipe1 = sample_recipe(self.user, [self.salt, self.rice])
+        self.recipe2 = sample_recipe(self.user, [self.salt, self.lime],
+                                     time_minutes=25, price=3.25)
+
+    def test_shopping_list_by_recipe_ids(self):
+        """Test combining the ingredients of several recipes"""
+        with self.assertNumQueries(2):
+            res = self.client.get(SHOPPING_LIST_URL, {
+                'recipes': f'{self.recipe1.id},{self.recipe2.id}'
+            })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 2)
+        self.assertEqual(res.data['total_price'], '8.75')
+        self.assertEqual(res.data['total_time_minutes'], 35)
+        self.assertEqual(res.data['ingredients'], [
+            {'id': self.lime.id, 'name': 'Lime', 'recipe_count': 1},
+            {'id': self.rice.id, 'name': 'Rice', 'recipe_count': 1},
+            {'id': self.salt.id, 'name': 'Salt', 'recipe_count': 2},
+        ])
+
+    def test_shopping_list_ignores_other_users_recipes(self):
+        """Test that recipes of other users are not included"""
+        other_user = get_user_model().objects.create_user(
+            email='other@gmail.com',
+            password='otherpass'
+        )
+        other = sample_recipe(other_user, [])
+
+        res = self.client.get(SHOPPING_LIST_URL, {
+            'recipes': f'{self.recipe1.id},{other.id}'
+        })
+
+        self.assertEqual(res.data['recipe_count'], 1)
+        self.assertEqual(len(res.data['ingredients']), 2)
+
+    def test_shopping_list_requires_recipes(self):
+        """Test that recipes or a meal plan must be given"""
+        res = self.client.get(SHOPPING_LIST_URL, {'recipes': 'a,b'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_shopping_list_by_meal_plan(self):
+        """Test creating a meal plan and its shopping list"""
+        res = self.client.post(MEAL_PLANS_URL, {
+            'name': 'Week 1',
+            'recipes': [self.recipe2.id],
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        res = self.client.get(SHOPPING_LIST_URL, {'meal_plan': res.data['id']})
+
+        self.assertEqual(res.data['recipe_count'], 1)
+        self.assertEqual(
+            [row['name'] for row in res.data['ingredients']],
+            ['Lime', 'Salt']
+        )
+
+    def test_shopping_list_other_users_meal_plan(self):
+        """Test that meal plans of other users are not found"""
+        other_user = get_user_model().objects.create_user(
+            email='other@gmail.com',
+            password='otherpass'
+        )
+        plan = MealPlan.objects.create(user=other_user, name='Theirs')
+
+        res = self.client.get(SHOPPING_LIST_URL, {'meal_plan': plan.id})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Recipe, Tag, Ingredient
+
+STATS_URL = reverse('recipe:recipe-stats')
+
+
+class RecipeStatsApiTests(TestCase):
+    """Test the recipe statistics API"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='stats@gmail.com',
+            password='statspass'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+        self.vegan = Tag.objects.create(user=self.user, name='Vegan')
+        self.quick = Tag.objects.create(user=self.user, name='Quick')
+        self.salt = Ingredient.objects.create(user=self.user, name='Salt')
+        for price, minutes, tags in ((2.50, 10, [self.vegan]),
+                                     (4.00, 20, [self.vegan, self.quick]),
+                                     (12.00, 50, [self.vegan])):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title='Recipe',
+                price=price,
+                time_minutes=minutes
+            )
+            recipe.tags.add(*tags)
+            recipe.ingredients.add(self.salt)
+
+    def test_stats(self):
+        """Test price and time histograms and top tags"""
+        res = self.client.get(STATS_URL, {'time_bucket': 30})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['recipe_count'], 3)
+        self.assertEqual(res.data['price']['min'], '2.50')
+        self.assertEqual(res.data['price']['histogram'], [
+            {'from': '0.00', 'to': '5.00', 'count': 2},
+            {'from': '10.00', 'to': '15.00', 'count': 1},
+        ])
+        self.assertEqual(res.data['time_minutes']['histogram'], [
+            {'from': 0, 'to': 30, 'count': 2},
+            {'from': 30, 'to': 60, 'count': 1},
+        ])
+        self.assertEqual(res.data['top_tags'], [
+            {'id': self.vegan.id, 'name': 'Vegan', 'recipe_count': 3},
+            {'id': self.quick.id, 'name': 'Quick', 'recipe_count': 1},
+        ])
+        self.assertEqual(res.data['top_ingredients'][0]['recipe_count'], 3)
+
+    def test_stats_cached_until_write(self):
+        """Test that statistics are cached and refreshed after writes"""
+        self.client.get(STATS_URL)
+        with self.assertNumQueries(1):
+            self.client.get(STATS_URL)
+
+        Recipe.objects.create(user=self.user, title='New', price=1,
+                              time_minutes=5)
+        res = self.client.get(STATS_URL)
+
+        self.assertEqual(res.data['recipe_count'], 4)
+
+    def test_stats_invalid_params(self):
+        """Test that invalid parameters are rejected"""
+        for params in ({'top': 0}, {'price_bucket': 'NaN'},
+                       {'time_bucket': 'x'}):
+            res = self.client.get(STATS_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -1,3 +1,5 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -84,6 +86,25 @@ class PrivateTagApiTests(TestCase):
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
+    def test_create_tag_duplicate_name(self):
+        """Test that a user cannot create two tags with the same name"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Tag.objects.filter(name='Vegan').count(), 1)
+
+    def test_create_tag_duplicate_name_race(self):
+        """Test that a duplicate created after validation gets a 400"""
+        Tag.objects.create(user=self.user, name='Vegan')
+        with patch.object(TagSerializer, 'validate_name',
+                          side_effect=lambda value: value):
+            res = self.client.post(TAGS_URL, {'name': 'Vegan'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('name', res.data)
+        self.assertEqual(Tag.objects.filter(name='Vegan').count(), 1)
+
     def test_filter_tag_assigned_to_recipe(self):
         """Test filtering tags those assigned to recipies only"""
         tag1 = Tag.objects.create(user=self.user, name='tag1')
@@ -0,0 +1,154 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO
+
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from core.models import Recipe
+from recipe.thumbnails import ThumbnailCache, get_cache, thumbnail_requests
+
+
+def thumbnail_url(recipe_id, size=64, image_format='jpeg'):
+    """Return URL for a recipe thumbnail"""
+    return reverse('recipe:recipe-thumbnail',
+                   args=[recipe_id, size, image_format])
+
+
+def sample_recipe(user, **params):
+    """Create and return a sample recipe"""
+    defaults = {
+        'title': 'Sample recipe',
+        'time_minutes': 10,
+        'price': 5.00,
+    }
+    defaults.update(params)
+
+    return Recipe.objects.create(user=user, **defaults)
+
+
+def sample_image_file(size=(600, 400)):
+    """Returns an uploaded JPEG file"""
+    output = BytesIO()
+    Image.new('RGB', size, (200, 80, 40)).save(output, format='JPEG')
+
+    return SimpleUploadedFile('photo.jpg', output.getvalue(),
+                              content_type='image/jpeg')
+
+
+class ThumbnailCacheTests(TestCase):
+    """Test the size-bounded thumbnail disk cache"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = ThumbnailCache(self.directory, max_bytes=300)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_get_and_put(self):
+        """Test that stored thumbnails are returned by key"""
+        self.assertIsNone(self.cache.get('abc-64.jpeg'))
+
+        self.cache.put('abc-64.jpeg', b'data')
+
+        with self.cache.get('abc-64.jpeg') as thumbnail:
+            self.assertEqual(thumbnail.read(), b'data')
+
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest unused files are removed over the limit"""
+        for index, key in enumerate(('aa-1', 'bb-1', 'cc-1')):
+            path = self.cache.put(key, b'x' * 100)
+            os.utime(path, (index, index))
+        # Reading refreshes the first file, so it outlives the others
+        self.cache.get('aa-1').close()
+
+        self.cache.put('dd-1', b'x' * 100)
+
+        self.assertIsNone(self.cache.get('bb-1'))
+        self.assertIsNone(self.cache.get('cc-1'))
+        for key in ('aa-1', 'dd-1'):
+            self.cache.get(key).close()
+        self.assertEqual(self.cache.disk_usage(), 200)
+
+
+class ThumbnailApiTests(TestCase):
+    """Test the recipe thumbnail endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='temp@gmail.com',
+            password='supersecrettestpassword'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = sample_recipe(self.user, image=sample_image_file())
+
+    def tearDown(self):
+        self.recipe.image.delete()
+        shutil.rmtree(get_cache().directory, ignore_errors=True)
+
+    def test_thumbnail_rendered_then_cached(self):
+        """Test that a thumbnail is rendered once and then served cached"""
+        hits = thumbnail_requests.get(result='hit')
+        misses = thumbnail_requests.get(result='miss')
+        url = thumbnail_url(self.recipe.id, 128, 'png')
+
+        res = self.client.get(url)
+        body = b''.join(res.streaming_content)
+        cached = self.client.get(url)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'image/png')
+        self.assertIn('max-age=', res['Cache-Control'])
+        with Image.open(BytesIO(body)) as image:
+            self.assertEqual(image.size, (128, 85))
+        self.assertEqual(b''.join(cached.streaming_content), body)
+        self.assertEqual(thumbnail_requests.get(result='miss'), misses + 1)
+        self.assertEqual(thumbnail_requests.get(result='hit'), hits + 1)
+
+    def test_thumbnail_not_modified(self):
+        """Test that a matching ETag is answered without a body"""
+        url = thumbnail_url(self.recipe.id)
+        res = self.client.get(url)
+        res.close()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=res['ETag'])
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_thumbnail_unsupported_size_or_format(self):
+        """Test that only whitelisted sizes and formats are rendered"""
+        for size, image_format in ((65, 'jpeg'), (64, 'gif')):
+            res = self.client.get(
+                thumbnail_url(self.recipe.id, size, image_format)
+            )
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_thumbnail_without_image(self):
+        """Test that recipes without image have no thumbnail"""
+        recipe = sample_recipe(self.user)
+
+        res = self.client.get(thumbnail_url(recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_thumbnail_of_other_user(self):
+        """Test that thumbnails of other users' recipes are not served"""
+        user2 = get_user_model().objects.create_user(
+            'other@gmail.com', 'password123'
+        )
+        self.client.force_authenticate(user2)
+
+        res = self.client.get(thumbnail_url(self.recipe.id))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
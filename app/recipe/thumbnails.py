@@ -0,0 +1,158 @@
+import hashlib
+import os
+import tempfile
+import threading
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+
+from core.metrics import REGISTRY
+
+CONTENT_TYPES = {
+    'jpeg': 'image/jpeg',
+    'png': 'image/png',
+    'webp': 'image/webp',
+}
+
+thumbnail_requests = REGISTRY.counter(
+    'recipe_thumbnail_requests_total',
+    'Thumbnail requests by whether the rendition was cached',
+    ('result',)
+)
+
+
+class ThumbnailCache:
+    """
+    Rendered thumbnails on disk, bounded in total size. Hits refresh the
+    file's modification time, and the least recently used files are
+    removed once the directory grows past max_bytes.
+    """
+    # Evict down to this fraction so eviction does not run on every write
+    low_water = 0.9
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None
+        self._lock = threading.Lock()
+
+    def path(self, key):
+        """Returns the file path of a cache key"""
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        """Returns a cached thumbnail opened for reading, or None"""
+        path = self.path(key)
+        try:
+            thumbnail = open(path, 'rb')
+        except FileNotFoundError:
+            return None
+        os.utime(thumbnail.fileno())
+
+        return thumbnail
+
+    def put(self, key, data):
+        """Stores a thumbnail and returns its path"""
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Renaming is atomic, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self.disk_usage()
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self.evict()
+
+        return path
+
+    def files(self):
+        """Returns (mtime, size, path) of every cached file"""
+        files = []
+        for root, dirs, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        return files
+
+    def disk_usage(self):
+        """Returns the total size of the cached files"""
+        return sum(size for mtime, size, path in self.files())
+
+    def evict(self):
+        """Removes the least recently used files down to the low water mark"""
+        # Other processes share the directory, so start from the disk
+        files = sorted(self.files())
+        self._size = sum(size for mtime, size, path in files)
+        for mtime, size, path in files:
+            if self._size <= self.max_bytes * self.low_water:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+
+@lru_cache(maxsize=None)
+def get_cache():
+    """Returns the thumbnail cache of this process"""
+    options = settings.RECIPE_THUMBNAILS
+
+    return ThumbnailCache(
+        os.path.join(settings.MEDIA_ROOT, options['DIRECTORY']),
+        options['MAX_BYTES']
+    )
+
+
+def get_key(image_name, size, image_format):
+    """Returns the cache key of a rendition of an image"""
+    # Uploads get a new file name, so replaced images get new keys
+    digest = hashlib.sha1(image_name.encode('utf8')).hexdigest()[:20]
+
+    return f'{digest}-{size}.{image_format}'
+
+
+def render(file, size, image_format, quality):
+    """Returns the image scaled to fit size x size, encoded as bytes"""
+    from PIL import Image
+
+    with Image.open(file) as image:
+        # JPEGs are decoded at the smallest scale still covering size
+        image.draft('RGB', (size, size))
+        image.thumbnail((size, size), Image.LANCZOS)
+        if image_format == 'jpeg' and image.mode != 'RGB':
+            image = image.convert('RGB')
+        output = BytesIO()
+        image.save(output, format=image_format, quality=quality,
+                   optimize=True)
+
+    return output.getvalue()
+
+
+def get_thumbnail(recipe, size, image_format):
+    """Returns the recipe's thumbnail opened, rendering it if needed"""
+    cache = get_cache()
+    key = get_key(recipe.image.name, size, image_format)
+    thumbnail = cache.get(key)
+    if thumbnail is not None:
+        thumbnail_requests.inc(result='hit')
+        return thumbnail
+
+    thumbnail_requests.inc(result='miss')
+    with recipe.image.open('rb') as image:
+        data = render(image, size, image_format,
+                      settings.RECIPE_THUMBNAILS['QUALITY'])
+
+    return open(cache.put(key, data), 'rb')
@@ -10,7 +10,9 @@ router = DefaultRouter()
 router.register('tags', views.TagViewSet)
 router.register('ingredient', views.IngredientViewSet)
 router.register('recipes', views.RecipeViewSet)
+router.register('meal-plans', views.MealPlanViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+    path('changes/', views.ChangesView.as_view(), name='changes'),
 ]
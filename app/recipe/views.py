@@ -1,14 +1,30 @@
-from rest_framework import viewsets, mixins, status
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max, Sum
+from django.http import FileResponse, Http404, HttpResponseNotModified
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import viewsets, mixins, status, views
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
 from . import serializers
-from core.models import Tag, Ingredient, Recipe
+from .images import get_index
+from .stats import recipe_stats
+from .thumbnails import CONTENT_TYPES, get_key, get_thumbnail
+from core.authentication import TokenAuthentication
+from core.db.routers import ReadReplicaMixin
+from core.models import Tag, Ingredient, Recipe, ChangeLog, \
+                        ChangeLogHorizon, MealPlan
 
 
-class BaseRecipeViewSet(viewsets.GenericViewSet,
+class BaseRecipeViewSet(ReadReplicaMixin,
+                        viewsets.GenericViewSet,
                         mixins.ListModelMixin,
                         mixins.CreateModelMixin):
     """Base class for recipe viewsets"""
@@ -46,7 +62,7 @@ class IngredientViewSet(BaseRecipeViewSet):
     queryset = Ingredient.objects.all()
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ReadReplicaMixin, viewsets.ModelViewSet):
     """Manage recipe in database"""
     serializer_class = serializers.RecipeSerializer
     authentication_classes = (TokenAuthentication,)
@@ -106,3 +122,254 @@ class RecipeViewSet(viewsets.ModelViewSet):
                 serializer.errors,
                 status=status.HTTP_400_BAD_REQUEST
             )
+
+    @action(methods=['get'], detail=True,
+            url_path=r'thumbnail/(?P<size>[0-9]+)\.(?P<image_format>[a-z]+)')
+    def thumbnail(self, request, size, image_format, pk=None):
+        """Returns the recipe image scaled down to a whitelisted size"""
+        options = settings.RECIPE_THUMBNAILS
+        size = int(size)
+        if size not in options['SIZES'] or image_format not in options[
+                'FORMATS']:
+            raise Http404('Unsupported thumbnail size or format.')
+
+        recipe = self.get_object()
+        if not recipe.image:
+            raise Http404('Recipe has no image.')
+
+        etag = f'"{get_key(recipe.image.name, size, image_format)}"'
+        if etag in request.META.get('HTTP_IF_NONE_MATCH', ''):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(
+                get_thumbnail(recipe, size, image_format),
+                content_type=CONTENT_TYPES[image_format]
+            )
+        response['ETag'] = etag
+        response['Cache-Control'] = (
+            f'private, max-age={options["MAX_AGE"]}'
+        )
+
+        return response
+
+    @action(methods=['get'], detail=False)
+    def duplicates(self, request):
+        """Returns groups of the user's recipes with near-identical images"""
+        try:
+            max_distance = int(request.query_params.get('max_distance', 5))
+        except ValueError:
+            max_distance = -1
+        if not 0 <= max_distance <= 64:
+            raise ValidationError('max_distance must be 0 to 64.')
+
+        return Response({
+            'max_distance': max_distance,
+            'groups': get_index().groups(request.user.pk, max_distance),
+        })
+
+    def _get_shopping_list_recipes(self):
+        """Returns the recipes given by ids or by a meal plan"""
+        params = self.request.query_params
+        recipes = Recipe.objects.filter(user=self.request.user)
+        try:
+            if 'meal_plan' in params:
+                plan = get_object_or_404(
+                    MealPlan.objects.filter(user=self.request.user),
+                    pk=int(params['meal_plan'])
+                )
+                return recipes.filter(mealplan=plan)
+            elif 'recipes' in params:
+                return recipes.filter(
+                    id__in=self._params_to_int(params['recipes'])
+                )
+        except ValueError:
+            pass
+
+        raise ValidationError(
+            'Pass recipe ids as recipes=1,2,3 or a meal plan id as '
+            'meal_plan=1.'
+        )
+
+    @action(methods=['get'], detail=False, url_path='shopping-list')
+    def shopping_list(self, request):
+        """Returns the combined ingredients and totals of several recipes"""
+        recipes = self._get_shopping_list_recipes()
+        ingredients = Recipe.ingredients.through.objects.filter(
+            recipe__in=recipes
+        ).values('ingredient_id', 'ingredient__name').annotate(
+            recipe_count=Count('recipe_id')
+        ).order_by('ingredient__name', 'ingredient_id')
+        totals = recipes.aggregate(
+            recipe_count=Count('id'),
+            total_price=Sum('price'),
+            total_time_minutes=Sum('time_minutes')
+        )
+
+        return Response({
+            'recipe_count': totals['recipe_count'],
+            'total_price': f'{totals["total_price"] or 0:.2f}',
+            'total_time_minutes': totals['total_time_minutes'] or 0,
+            'ingredients': [
+                {
+                    'id': row['ingredient_id'],
+                    'name': row['ingredient__name'],
+                    'recipe_count': row['recipe_count'],
+                }
+                for row in ingredients
+            ],
+        })
+
+    def _get_stats_params(self):
+        """Returns top and bucket widths given in query params"""
+        params = self.request.query_params
+        try:
+            top = int(params.get('top', 10))
+            price_bucket = Decimal(params.get('price_bucket', 5)).quantize(
+                Decimal('0.01')
+            )
+            time_bucket = int(params.get('time_bucket', 15))
+            valid = 0 < top <= 100 and price_bucket > 0 and time_bucket > 0
+        except (ValueError, InvalidOperation):
+            valid = False
+        if not valid:
+            raise ValidationError(
+                'top must be 1 to 100, bucket widths must be positive.'
+            )
+
+        return top, price_bucket, time_bucket
+
+    @action(methods=['get'], detail=False)
+    def stats(self, request):
+        """Returns price and time distributions, top tags and ingredients"""
+        top, price_bucket, time_bucket = self._get_stats_params()
+        # Every write to the user's catalogue adds a change log entry, so
+        # the newest entry id versions the cached statistics
+        version = ChangeLog.objects.filter(
+            user=request.user
+        ).aggregate(version=Max('id'))['version']
+        key = (f'recipe-stats:{request.user.pk}:{version}:{top}:'
+               f'{price_bucket}:{time_bucket}')
+
+        data = cache.get(key)
+        if data is None:
+            data = recipe_stats(request.user, top, price_bucket, time_bucket)
+            cache.set(key, data, settings.RECIPE_STATS_CACHE_SECONDS)
+
+        return Response(data)
+
+
+class MealPlanViewSet(ReadReplicaMixin, viewsets.ModelViewSet):
+    """Manage meal plans in database"""
+    serializer_class = serializers.MealPlanSerializer
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    queryset = MealPlan.objects.prefetch_related('recipes')
+
+    def get_queryset(self):
+        """Return meal plans of the authenticated user"""
+        return self.queryset.filter(user=self.request.user).order_by('id')
+
+    def perform_create(self, serializer):
+        """Create a new meal plan"""
+        serializer.save(user=self.request.user)
+
+
+class ChangesView(views.APIView):
+    """Returns recipes, tags and ingredients changed since a checkpoint"""
+    authentication_classes = (TokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    page_size = 500
+    kinds = (
+        ('recipes', ChangeLog.RECIPE,
+         Recipe.objects.prefetch_related('tags', 'ingredients'),
+         serializers.RecipeSerializer),
+        ('tags', ChangeLog.TAG, Tag.objects.all(),
+         serializers.TagSerializer),
+        ('ingredients', ChangeLog.INGREDIENT, Ingredient.objects.all(),
+         serializers.IngredientSerializer),
+    )
+
+    def _get_since(self):
+        """
+        Returns the checkpoint given in query params, and whether it is
+        the cursor of a snapshot sent in several pages
+        """
+        since = self.request.query_params.get('since', '0')
+        resuming = since.startswith('r')
+        try:
+            since = int(since[1:] if resuming else since)
+        except ValueError:
+            since = -1
+
+        if since < 0:
+            raise ValidationError({'since': 'Invalid checkpoint.'})
+
+        return since, resuming
+
+    def _get_checkpoint(self, entries, since):
+        """
+        Returns the id of the last entry older than the checkpoint lag.
+
+        Ids are taken on insert but become visible on commit, so a recent
+        entry may have an uncommitted entry with a lower id before it.
+        Checkpoints stop below recent entries, which are sent again by the
+        next sync, so the client cannot move past a change still being
+        committed.
+        """
+        lag = timezone.now() - timedelta(
+            seconds=settings.CHANGELOG_CHECKPOINT_LAG_SECONDS
+        )
+        for entry in entries:
+            if entry.created_at > lag:
+                return max(since, entry.id - 1)
+
+        return entries[-1].id if entries else since
+
+    def get(self, request):
+        """Lists changes newer than the checkpoint, oldest first"""
+        since, resuming = self._get_since()
+        horizon = ChangeLogHorizon.objects.filter(
+            user=request.user
+        ).values_list('checkpoint', flat=True).first() or 0
+        # Tombstones after the checkpoint were compacted away, so the
+        # client has to replace its data with a full snapshot
+        reset = not resuming and 0 < since < horizon
+        if reset:
+            since = 0
+        snapshot = resuming or since == 0
+
+        entries = list(ChangeLog.objects.filter(
+            user=request.user,
+            id__gt=since
+        ).order_by('id')[:self.page_size + 1])
+        has_more = len(entries) > self.page_size
+        entries = entries[:self.page_size]
+
+        checkpoint = self._get_checkpoint(entries, since)
+        if entries and checkpoint < entries[-1].id:
+            # The rest is sent again once it is older than the lag
+            has_more = False
+        if snapshot and not has_more:
+            # Everything up to the horizon was compacted or just sent
+            checkpoint = max(checkpoint, horizon)
+        data = {
+            # Pages of a snapshot that end below the horizon continue the
+            # snapshot instead of starting a new reset
+            'checkpoint': f'r{checkpoint}' if checkpoint < horizon
+            else str(checkpoint),
+            'reset': reset,
+            'has_more': has_more,
+        }
+        for key, kind, queryset, serializer_class in self.kinds:
+            updated = [e.object_id for e in entries
+                       if e.kind == kind and not e.deleted]
+            deleted = [e.object_id for e in entries
+                       if e.kind == kind and e.deleted]
+            objects = queryset.filter(user=request.user, id__in=updated) \
+                if updated else queryset.none()
+            data[key] = {
+                'updated': serializer_class(objects, many=True).data,
+                'deleted': deleted,
+            }
+
+        return Response(data)
@@ -0,0 +1,122 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from core.metrics import REGISTRY
+
+hash_seconds = REGISTRY.histogram(
+    'login_password_hash_seconds',
+    'Time spent hashing passwords for logins'
+)
+rejected_logins = REGISTRY.counter(
+    'login_rejected_total',
+    'Login attempts rejected before checking the password',
+    ('reason',)
+)
+
+
+class HashingUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, try again later.'
+    default_code = 'hashing_unavailable'
+
+
+class PasswordHashPool:
+    """
+    Runs password hashing on a bounded number of threads. Hashing releases
+    the GIL, so request threads stay responsive, and attempts beyond the
+    pool and its queue are rejected instead of piling up.
+    """
+
+    def __init__(self, workers, queue_size, timeout):
+        self.workers = workers
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        """Returns the executor, starting it on first use"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix='password-hash'
+                )
+
+        return self._executor
+
+    def run(self, func, *args):
+        """Runs func on the pool and returns its result"""
+        if not self._slots.acquire(timeout=self.timeout):
+            rejected_logins.inc(reason='pool_full')
+            raise HashingUnavailable()
+
+        try:
+            start = time.perf_counter()
+            result = self._get_executor().submit(func, *args).result()
+            hash_seconds.observe(time.perf_counter() - start)
+        finally:
+            self._slots.release()
+
+        return result
+
+
+hash_pool = PasswordHashPool(
+    settings.LOGIN_HASH_POOL['WORKERS'],
+    settings.LOGIN_HASH_POOL['QUEUE_SIZE'],
+    settings.LOGIN_HASH_POOL['TIMEOUT']
+)
+
+
+def verify_password(password, encoded):
+    """Returns whether password matches and whether to rehash it"""
+    must_update = []
+    matches = check_password(
+        password,
+        encoded,
+        setter=lambda raw_password: must_update.append(True)
+    )
+
+    return matches, bool(must_update)
+
+
+class EmailBackend(ModelBackend):
+    """Authenticates by email, hashing passwords on the hash pool"""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """Returns the user if the credentials are valid"""
+        user_model = get_user_model()
+        if username is None:
+            username = kwargs.get(user_model.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = user_model._default_manager.get_by_natural_key(username)
+        except user_model.DoesNotExist:
+            # Hash anyway so unknown emails take as long as known ones
+            hash_pool.run(make_password, password)
+            return None
+
+        matches, must_update = hash_pool.run(
+            verify_password,
+            password,
+            user.password
+        )
+        if not matches:
+            return None
+
+        if must_update:
+            user.password = hash_pool.run(make_password, password)
+            user.save(update_fields=['password'])
+
+        if self.user_can_authenticate(user):
+            return user
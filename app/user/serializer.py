@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model, authenticate
 from django.utils.translation import ugettext_lazy as _
-from rest_framework import serializers
+from rest_framework import serializers, exceptions
+
+from user.throttling import LoginThrottle
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -39,16 +41,27 @@ class AuthTokenSerializer(serializers.Serializer):
         """Validate and authenticate the user"""
         email = attrs.get('email')
         password = attrs.get('password')
+        request = self.context.get('request')
+
+        # Reject throttled attempts before spending time on hashing
+        throttle = LoginThrottle(request, email)
+        wait = throttle.wait()
+        if wait:
+            raise exceptions.Throttled(wait)
+
         user = authenticate(
-            request=self.context.get('request'),
+            request=request,
             username=email,
             password=password
         )
 
         # If user is not authenticate then raise validation error
         if not user:
+            throttle.failed()
             msg = _('Unable to authenticate with the given credentials.')
             raise serializers.ValidationError(msg, code='authentication')
 
+        throttle.succeeded()
+
         attrs['user'] = user
         return attrs
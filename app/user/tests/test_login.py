@@ -0,0 +1,159 @@
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+from rest_framework import status
+
+from user import backends
+
+CREATE_TOKEN_URL = reverse('user:token')
+
+
+class LoginThrottleTests(TestCase):
+    """Test backing off repeated failed logins"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.payload = {'email': 'login@gmail.com', 'password': 'login@1234'}
+        get_user_model().objects.create_user(**self.payload)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _login(self, password):
+        """Requests a token with the given password"""
+        return self.client.post(CREATE_TOKEN_URL, {
+            'email': self.payload['email'],
+            'password': password
+        })
+
+    def test_failures_beyond_limit_are_rejected_before_hashing(self):
+        """Test that a blocked email is rejected without hashing"""
+        for _ in range(6):
+            self._login('wrong')
+
+        with patch('user.backends.hash_pool.run') as run:
+            res = self._login(self.payload['password'])
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+        run.assert_not_called()
+
+    def test_failures_within_limit_allow_login(self):
+        """Test that a few failures do not block a valid login"""
+        for _ in range(5):
+            self._login('wrong')
+
+        res = self._login(self.payload['password'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_failures_are_tracked_per_ip(self):
+        """Test that failures for many emails block the client address"""
+        for index in range(21):
+            self.client.post(CREATE_TOKEN_URL, {
+                'email': f'user{index}@gmail.com',
+                'password': 'wrong'
+            })
+
+        res = self._login(self.payload['password'])
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_forwarded_for_rotation_is_blocked(self):
+        """Test that spoofed X-Forwarded-For headers share one address"""
+        for index in range(21):
+            self.client.post(CREATE_TOKEN_URL, {
+                'email': f'user{index}@gmail.com',
+                'password': 'wrong'
+            }, HTTP_X_FORWARDED_FOR=f'10.0.0.{index}')
+
+        res = self.client.post(CREATE_TOKEN_URL, self.payload,
+                               HTTP_X_FORWARDED_FOR='10.0.1.1')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    def test_trusted_proxy_address_is_used(self):
+        """Test that clients behind a trusted proxy are told apart"""
+        rest_framework = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        with self.settings(REST_FRAMEWORK=rest_framework):
+            for index in range(21):
+                self.client.post(CREATE_TOKEN_URL, {
+                    'email': f'user{index}@gmail.com',
+                    'password': 'wrong'
+                }, HTTP_X_FORWARDED_FOR=f'10.0.0.{index}, 1.2.3.4')
+
+            blocked = self.client.post(
+                CREATE_TOKEN_URL, self.payload,
+                HTTP_X_FORWARDED_FOR='10.0.1.1, 1.2.3.4'
+            )
+            allowed = self.client.post(
+                CREATE_TOKEN_URL, self.payload,
+                HTTP_X_FORWARDED_FOR='1.2.3.4, 5.6.7.8'
+            )
+
+        self.assertEqual(blocked.status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(allowed.status_code, status.HTTP_200_OK)
+
+
+class PasswordRehashTests(TestCase):
+    """Test upgrading stored password hashes on login"""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.payload = {'email': 'rehash@gmail.com', 'password': 'rehash@123'}
+
+    def test_login_rehashes_when_cost_changes(self):
+        """Test that a successful login stores a hash with the new cost"""
+        with self.settings(PASSWORD_HASH_ITERATIONS=1000):
+            user = get_user_model().objects.create_user(**self.payload)
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            res = self.client.post(CREATE_TOKEN_URL, self.payload)
+
+        user.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    @override_settings(PASSWORD_HASH_ITERATIONS=1000)
+    def test_failed_login_keeps_hash(self):
+        """Test that a failed login does not rehash the password"""
+        user = get_user_model().objects.create_user(**self.payload)
+        encoded = user.password
+
+        with self.settings(PASSWORD_HASH_ITERATIONS=2000):
+            self.client.post(CREATE_TOKEN_URL, {
+                'email': self.payload['email'],
+                'password': 'wrong'
+            })
+
+        user.refresh_from_db()
+        self.assertEqual(user.password, encoded)
+
+
+class PasswordHashPoolTests(TestCase):
+    """Test the bounded password hashing pool"""
+
+    def test_full_pool_rejects(self):
+        """Test that hashing is rejected when no slot frees up"""
+        pool = backends.PasswordHashPool(workers=1, queue_size=0, timeout=0)
+        pool._slots.acquire()
+
+        with self.assertRaises(backends.HashingUnavailable):
+            pool.run(len, 'password')
+
+    def test_hash_time_is_recorded(self):
+        """Test that hashing time is recorded in the histogram"""
+        pool = backends.PasswordHashPool(workers=1, queue_size=0, timeout=1)
+        count, _ = backends.hash_seconds.get()
+
+        self.assertEqual(pool.run(len, 'password'), 8)
+        self.assertEqual(backends.hash_seconds.get()[0], count + 1)
@@ -0,0 +1,73 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+from core.metrics import REGISTRY
+from user.backends import rejected_logins
+
+failed_logins = REGISTRY.counter(
+    'login_failed_total',
+    'Login attempts with invalid credentials'
+)
+
+
+class LoginThrottle:
+    """
+    Tracks failed logins per email and per client address, and blocks
+    further attempts with exponentially growing delays once the allowed
+    number of failures is exceeded.
+    """
+
+    def __init__(self, request, email):
+        self.options = settings.LOGIN_THROTTLE
+        self.cache = caches[self.options.get('CACHE', 'default')]
+        self.keys = (
+            (self._key('email', email.lower()),
+             self.options['EMAIL_FAILURES']),
+            # Honours NUM_PROXIES, so clients cannot pick their address
+            (self._key('ip', BaseThrottle().get_ident(request)),
+             self.options['IP_FAILURES']),
+        )
+
+    def _key(self, scope, value):
+        """Returns cache key of the value, safe for any cache backend"""
+        digest = hashlib.sha1(str(value).encode()).hexdigest()
+
+        return f'login-throttle:{scope}:{digest}'
+
+    def wait(self):
+        """Returns seconds until a login may be attempted again, or 0"""
+        now = time.time()
+        states = self.cache.get_many([key for key, _ in self.keys])
+        blocked_until = max(
+            [state[1] for state in states.values()] + [now]
+        )
+        if blocked_until > now:
+            rejected_logins.inc(reason='backoff')
+
+        return blocked_until - now
+
+    def failed(self):
+        """Records a failed login attempt"""
+        failed_logins.inc()
+        now = time.time()
+        states = self.cache.get_many([key for key, _ in self.keys])
+        updates = {}
+        for key, allowed in self.keys:
+            failures = states.get(key, (0, 0))[0] + 1
+            blocked_until = 0
+            if failures > allowed:
+                delay = min(
+                    self.options['BASE_DELAY'] * 2 ** (failures - allowed - 1),
+                    self.options['MAX_DELAY']
+                )
+                blocked_until = now + delay
+            updates[key] = (failures, blocked_until)
+        self.cache.set_many(updates, self.options['RESET_AFTER'])
+
+    def succeeded(self):
+        """Forgets the failed attempts for the email"""
+        self.cache.delete(self.keys[0][0])